@@ -1,16 +1,97 @@
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from typing import List, Optional
+
 from fastapi import FastAPI, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from io import BytesIO
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, roc_auc_score
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .cache import ResultCache, cache_key
+from .executor import (
+    AnalysisExecutor, JobTimeoutError, QueueFullError, remove_spooled, spool_to_disk
+)
+from .ingest import (
+    MEDIAN_EXACT_LIMIT, MEDIAN_RELATIVE_ACCURACY, CSVParseError, MissingColumnsError
+)
+from .insights import analyze_report
+from .jobs import JobManager
+from .model_registry import NotEnoughDataError, registry, summarize, train_report
+from .rule_index import RuleIndex
+
+logger = logging.getLogger(__name__)
+
+# Worker pool for CPU-bound analysis jobs
+analysis_executor = AnalysisExecutor(
+    max_workers=int(os.environ.get("RETAIL_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.environ.get("RETAIL_MAX_QUEUE", "8")),
+    timeout=float(os.environ.get("RETAIL_JOB_TIMEOUT_SECONDS", "300")),
+)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Compiled association rules for basket recommendations
+RULE_INDEX_PATH = os.environ.get(
+    "RETAIL_RULE_INDEX", str(Path(__file__).resolve().parent / "models" / "rules.idx")
+)
+RULES_CSV_PATH = os.environ.get(
+    "RETAIL_RULES_CSV", str(_REPO_ROOT / "data" / "processed" / "top_association_rules.csv")
+)
+rule_index = None
+
+# UCI transactions behind the country sales dashboard and chart data
+RETAIL_DATA_PATH = os.environ.get(
+    "RETAIL_DATA_PATH", str(_REPO_ROOT / "data" / "raw" / "Online Retail.csv")
+)
+
+# Largest point budget a chart-data request may ask for
+CHART_MAX_POINTS = int(os.environ.get("RETAIL_CHART_MAX_POINTS", "20000"))
+
+
+def load_rule_index():
+    """
+    Load the rule index, compiling it from the rules CSV on first use and
+    whenever the CSV has changed since the index was compiled.
+    """
+    index = RuleIndex.load(RULE_INDEX_PATH) if os.path.exists(RULE_INDEX_PATH) else None
+    if not os.path.exists(RULES_CSV_PATH):
+        return index
+    if index is not None and index.is_current(RULES_CSV_PATH):
+        return index
+    if index is not None:
+        logger.info("Rules CSV %s changed; recompiling %s", RULES_CSV_PATH, RULE_INDEX_PATH)
+    index = RuleIndex.from_csv(RULES_CSV_PATH)
+    try:
+        os.makedirs(os.path.dirname(RULE_INDEX_PATH), exist_ok=True)
+        index.save(RULE_INDEX_PATH)
+    except OSError as e:
+        logger.warning("Could not save rule index %s: %s", RULE_INDEX_PATH, e)
+    return index
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the active churn model so the first request does not pay for it
+    model = registry.latest()
+    logger.info("Churn model: %s", f"v{model.version}" if model else "none registered yet")
+    global rule_index
+    rule_index = load_rule_index()
+    logger.info("Rule index: %s", rule_index.stats() if rule_index else "no rules available")
+    yield
+    job_manager.shutdown()
+    analysis_executor.shutdown()
+
 
 app = FastAPI(
     title="Retail Stock Behavior API",
     description="Backend API to serve customer behavior predictions to the dashboard.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -21,10 +102,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Result cache for repeated uploads of the same report
+result_cache = ResultCache(
+    max_bytes=int(float(os.environ.get("RETAIL_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    max_age=float(os.environ.get("RETAIL_CACHE_TTL_SECONDS", str(24 * 60 * 60))),
+    cache_dir=os.environ.get(
+        "RETAIL_CACHE_DIR", str(Path(__file__).resolve().parent / ".cache" / "predict")
+    ),
+    max_disk_bytes=int(float(os.environ.get("RETAIL_CACHE_DISK_MAX_MB", "512")) * 1024 * 1024),
+)
+
+# Asynchronous jobs share the worker pool (and its queue bound) with predict
+job_manager = JobManager(
+    executor=analysis_executor,
+    cache=result_cache,
+    ttl=float(os.environ.get("RETAIL_JOB_TTL_SECONDS", "3600")),
+    max_finished=int(os.environ.get("RETAIL_JOB_MAX_FINISHED", "256")),
+)
+
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "cache": result_cache.stats(),
+        "executor": analysis_executor.stats(),
+        "jobs": job_manager.stats(),
+        "rules": rule_index.stats() if rule_index else None,
+        "ingest": {
+            # Past this many distinct revenue values the median is approximate
+            "medianExactLimit": MEDIAN_EXACT_LIMIT,
+            "medianRelativeAccuracy": MEDIAN_RELATIVE_ACCURACY,
+        },
+    }
+
+
+def _queue_full_response(e):
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(e)},
+        headers={"Retry-After": "5"},
+    )
 
 
 @app.post("/api/predict")
@@ -35,332 +153,273 @@ async def predict(
     """
     Parse the uploaded CSV and return REAL insights based on that file.
     No hard-coded mock values – everything comes from the data.
-    """
-    content = await file.read()
-    
-    # DEBUG: Log file information
-    print(f"\n=== FILE UPLOAD DEBUG ===")
-    print(f"Filename: {file.filename}")
-    print(f"File size: {len(content)} bytes")
-    print(f"Content type: {file.content_type}")
-    
-    try:
-        df = pd.read_csv(BytesIO(content))
-        print(f"DataFrame shape: {df.shape}")
-        print(f"Columns: {list(df.columns)}")
-    except Exception as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Failed to parse CSV: {str(e)}"}
-        )
 
-    # Flexible column name handling
-    date_col_candidates = ["date", "Date", "InvoiceDate"]
-    revenue_col_candidates = ["revenue", "Revenue", "TotalPrice", "Sales", "Amount"]
-    qty_col_candidates = ["quantity", "Quantity", "qty", "Qty"]
-    customer_col_candidates = ["customer_id", "CustomerID", "customer", "Customer"]
-    product_col_candidates = ["product_id", "StockCode", "product", "ProductID"]
-
-    def pick_col(candidates):
-        for c in candidates:
-            if c in df.columns:
-                return c
-        return None
-
-    date_col = pick_col(date_col_candidates)
-    revenue_col = pick_col(revenue_col_candidates)
-    qty_col = pick_col(qty_col_candidates)
-    cust_col = pick_col(customer_col_candidates)
-    prod_col = pick_col(product_col_candidates)
-
-    # If the CSV doesn't match expected schema, return a clear 400 error
-    if not (date_col and revenue_col and qty_col and cust_col and prod_col):
-        return JSONResponse(
-            status_code=400,
-            content={
-                "error": "CSV does not contain required columns.",
-                "required_like": {
-                    "date": date_col_candidates,
-                    "revenue": revenue_col_candidates,
-                    "quantity": qty_col_candidates,
-                    "customer": customer_col_candidates,
-                    "product": product_col_candidates,
-                },
-                "received_columns": list(df.columns),
-            },
-        )
+    The upload is streamed in bounded chunks through a single fused
+    aggregation pass (see ``backend/ingest.py``), so memory use follows the
+    number of customers and products, not rows. The work runs in a bounded
+    process pool; a full queue answers 503 and a slow job 504.
+    """
+    logger.debug("Upload %s: %s bytes, %s", file.filename, file.size, file.content_type)
 
-    # Clean numeric fields
-    df[revenue_col] = pd.to_numeric(df[revenue_col], errors="coerce").fillna(0)
-    df[qty_col] = pd.to_numeric(df[qty_col], errors="coerce").fillna(0)
+    # Identical bytes + parameters always produce the same response.
+    # Hashing and spooling are blocking file I/O, so keep them off the loop.
+    key = await run_in_threadpool(
+        cache_key, file.file, periodicity, registry.latest_version()
+    )
+    cached = await run_in_threadpool(result_cache.get, key)
+    if cached is not None:
+        logger.debug("Cache hit: %s", key)
+        return Response(content=cached, media_type="application/json")
 
-    # Parse dates if present
+    # Parsing, aggregation and model training run in a worker process
+    path = await run_in_threadpool(spool_to_disk, file.file)
     try:
-        df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-    except Exception:
-        pass
-
-    total_revenue = float(df[revenue_col].sum())
-    total_quantity = int(df[qty_col].sum())
-    unique_customers = int(df[cust_col].nunique())
-    unique_products = int(df[prod_col].nunique())
-
-    # Top product by revenue
-    prod_rev = df.groupby(prod_col)[revenue_col].sum().sort_values(ascending=False)
-    top_product_id = str(prod_rev.index[0])
-    top_product_revenue = float(prod_rev.iloc[0])
-    
-    # DEBUG: Log top results
-    print(f"Top product ID: {top_product_id}, Revenue: {top_product_revenue}")
-    print(f"Top 5 products: {[str(x) for x in prod_rev.head(5).index.tolist()]}")
-
-    # Top product by quantity
-    prod_qty = df.groupby(prod_col)[qty_col].sum().sort_values(ascending=False)
-    top_qty_product_id = str(prod_qty.index[0])
-    top_qty = int(prod_qty.iloc[0])
-
-    # Highest earning customer
-    cust_rev = df.groupby(cust_col)[revenue_col].sum().sort_values(ascending=False)
-    top_customer_id = str(cust_rev.index[0])
-    top_customer_revenue = float(cust_rev.iloc[0])
-    
-    # DEBUG: Log top results
-    print(f"Top customer ID: {top_customer_id}, Revenue: {top_customer_revenue}")
-    print(f"Top 5 customers: {[str(x) for x in cust_rev.head(5).index.tolist()]}")
-    print("=" * 50)
-
-    # Most frequent customer (by transactions)
-    cust_freq = df[cust_col].value_counts()
-    most_freq_customer_id = str(cust_freq.index[0])
-    most_freq_visits = int(cust_freq.iloc[0])
-
-    # Top 5 customers by revenue
-    top_5_customers = []
-    for idx, (cust_id, rev) in enumerate(cust_rev.head(5).items()):
-        visit_count = int(cust_freq.get(cust_id, 0))
-        top_5_customers.append({
-            "rank": idx + 1,
-            "customerId": str(cust_id),
-            "revenue": float(rev),
-            "visits": visit_count,
-            "avgSpendPerVisit": float(rev / visit_count) if visit_count > 0 else 0.0
-        })
-
-    # Top 5 products by revenue
-    top_5_products_rev = []
-    for idx, (prod_id, rev) in enumerate(prod_rev.head(5).items()):
-        qty = int(prod_qty[prod_id]) if prod_id in prod_qty.index else 0
-        top_5_products_rev.append({
-            "rank": idx + 1,
-            "productId": str(prod_id),
-            "revenue": float(rev),
-            "quantity": qty,
-            "avgPrice": float(rev / qty) if qty > 0 else 0.0
-        })
-
-    # Customer segmentation (high/medium/low spenders)
-    customer_revenues = df.groupby(cust_col)[revenue_col].sum()
-    high_threshold = customer_revenues.quantile(0.8)
-    medium_threshold = customer_revenues.quantile(0.5)
-    
-    high_spenders = int((customer_revenues >= high_threshold).sum())
-    medium_spenders = int(((customer_revenues >= medium_threshold) & (customer_revenues < high_threshold)).sum())
-    low_spenders = int((customer_revenues < medium_threshold).sum())
-
-    # Average transaction value
-    avg_transaction_value = float(df[revenue_col].mean())
-    median_transaction_value = float(df[revenue_col].median())
-
-    # Customer purchase frequency stats
-    avg_visits_per_customer = float(cust_freq.mean())
-    median_visits_per_customer = float(cust_freq.median())
-
-    # Simple data-driven text summary
-    avg_record_revenue = float(df[revenue_col].mean())
-    max_record_revenue = float(df[revenue_col].max())
-    min_record_revenue = float(df[revenue_col].min())
-
-    forecast_summary = (
-        f"Across the uploaded report, total revenue is Rs{total_revenue:,.0f} "
-        f"over {len(df):,} records, with an average of Rs{avg_record_revenue:,.0f} "
-        f"per record. The highest single-record revenue is Rs{max_record_revenue:,.0f} "
-        f"and the lowest is Rs{min_record_revenue:,.0f}. Use these patterns to plan "
-        "stock levels and staffing for similar periods."
-    )
+        response = await analysis_executor.run(
+            analyze_report, path, periodicity, cleanup=lambda: remove_spooled(path)
+        )
+    except MissingColumnsError as e:
+        # If the CSV doesn't match expected schema, return a clear 400 error
+        return JSONResponse(status_code=400, content=e.to_content())
+    except CSVParseError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    except JobTimeoutError as e:
+        return JSONResponse(status_code=504, content={"error": str(e)})
+
+    payload = json.dumps(response).encode("utf-8")
+    await run_in_threadpool(result_cache.put, key, payload)
+    return Response(content=payload, media_type="application/json")
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    periodicity: str = Form("monthly"),
+):
+    """
+    Submit the same CSV and periodicity as /api/predict as a background job.
 
-    churn_summary = (
-        f"Based on this report, focus retention on customers whose spend or visit "
-        f"frequency is dropping between periods, especially compared to your top "
-        f"earners like customer {top_customer_id} (who spent Rs{top_customer_revenue:,.0f}). "
-        f"Product {top_product_id} generated the highest revenue (Rs{top_product_revenue:,.0f}), "
-        f"while product {top_qty_product_id} sold the most units ({top_qty:,})."
+    Returns a job id immediately. Poll ``GET /api/jobs/{id}`` for status and
+    progress, then fetch ``GET /api/jobs/{id}/result``.
+    """
+    key = await run_in_threadpool(
+        cache_key, file.file, periodicity, registry.latest_version()
     )
+    cached = await run_in_threadpool(result_cache.get, key)
+    if cached is not None:
+        job = job_manager.create_completed(cached)
+    else:
+        path = await run_in_threadpool(spool_to_disk, file.file)
+        try:
+            job = job_manager.submit(key, path, periodicity)
+        except QueueFullError as e:
+            os.unlink(path)
+            return _queue_full_response(e)
+
+    return JSONResponse(status_code=202, content=job.to_dict(job_manager.progress(job)))
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status and progress of a submitted job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired job: {job_id}"})
+    return job.to_dict(job_manager.progress(job))
+
+
+@app.get("/api/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    Result of a finished job.
 
-    # ------------------------------------------------------------------
-    # Random Forest customer churn modeling (classification)
-    # ------------------------------------------------------------------
-    rf_results = {
-        "modelUsed": False,
-        "description": (
-            "Random Forest is an ensemble machine learning algorithm for classification "
-            "and regression. It builds many decision trees on different subsets of the data "
-            "and averages their results (or takes a majority vote) to improve accuracy and "
-            "reduce overfitting. Here it is used to predict which customers are at higher "
-            "risk of churn based on recency, frequency and monetary value."
-        ),
+    Answers 202 with the job status while it is still queued or running, and
+    the job's error (with its original status code) if it failed.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired job: {job_id}"})
+    if job.status == "succeeded":
+        return Response(content=job.payload, media_type="application/json")
+    if job.status == "failed":
+        return JSONResponse(status_code=job.status_code, content=job.error)
+    return JSONResponse(status_code=202, content=job.to_dict(job_manager.progress(job)))
+
+
+@app.get("/api/models/churn")
+def get_churn_model():
+    """Active churn model version and the metadata of all stored versions."""
+    return {
+        "activeVersion": registry.latest_version(),
+        "driftThreshold": registry.drift_threshold,
+        "versions": [summarize(m) for m in registry.versions()],
     }
 
+
+@app.post("/api/models/churn/train")
+async def train_churn_model(file: UploadFile = File(...)):
+    """
+    Explicitly train and register a new churn model version from a CSV.
+
+    The new version becomes active for all subsequent predictions.
+    """
+    path = await run_in_threadpool(spool_to_disk, file.file)
     try:
-        # Build customer-level features: recency, frequency, total spend
-        reference_date = df[date_col].max() + pd.Timedelta(days=1)
-        cust_last_purchase = df.groupby(cust_col)[date_col].max()
-        recency = (reference_date - cust_last_purchase).dt.days
-
-        # Align frequency and revenue with the same customer index
-        freq_aligned = cust_freq.reindex(cust_last_purchase.index).fillna(0)
-        rev_aligned = cust_rev.reindex(cust_last_purchase.index).fillna(0.0)
-
-        customer_features = pd.DataFrame(
-            {
-                "customerId": cust_last_purchase.index.astype(str),
-                "Recency": recency.astype("int64"),
-                "Frequency": freq_aligned.astype("int64"),
-                "TotalSpent": rev_aligned.astype("float64"),
-            }
+        metadata = await analysis_executor.run(
+            train_report, path, cleanup=lambda: remove_spooled(path)
         )
+    except MissingColumnsError as e:
+        return JSONResponse(status_code=400, content=e.to_content())
+    except (CSVParseError, NotEnoughDataError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    except JobTimeoutError as e:
+        return JSONResponse(status_code=504, content={"error": str(e)})
 
-        # Define churn label: customers with Recency > 90 days are treated as churned
-        customer_features["Churned"] = (
-            customer_features["Recency"] > 90
-        ).astype(int)
-
-        # Only train the model if we have enough variation in the label
-        if customer_features["Churned"].nunique() > 1 and len(customer_features) >= 20:
-            feature_cols = ["Recency", "Frequency", "TotalSpent"]
-            X = customer_features[feature_cols]
-            y = customer_features["Churned"]
-
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.3, random_state=42, stratify=y
-            )
-
-            rf = RandomForestClassifier(
-                n_estimators=200,
-                max_depth=None,
-                random_state=42,
-                class_weight="balanced_subsample",
-            )
-            rf.fit(X_train, y_train)
-
-            y_pred = rf.predict(X_test)
-            y_proba = rf.predict_proba(X_test)[:, 1]
-
-            accuracy = float(accuracy_score(y_test, y_pred))
-            try:
-                roc_auc = float(roc_auc_score(y_test, y_proba))
-            except ValueError:
-                roc_auc = None
-
-            feature_importances = {
-                col: float(imp)
-                for col, imp in zip(feature_cols, rf.feature_importances_)
-            }
-
-            # Estimate churn probability for all customers and surface top 5 at-risk
-            all_proba = rf.predict_proba(X)[:, 1]
-            customer_features["churnProbability"] = all_proba
-
-            top_at_risk = (
-                customer_features.sort_values(
-                    "churnProbability", ascending=False
-                )
-                .head(5)
-                .reset_index(drop=True)
-            )
-
-            top_at_risk_list = []
-            for _, row in top_at_risk.iterrows():
-                top_at_risk_list.append(
-                    {
-                        "customerId": str(row["customerId"]),
-                        "recencyDays": int(row["Recency"]),
-                        "frequency": int(row["Frequency"]),
-                        "totalSpent": float(row["TotalSpent"]),
-                        "churnProbability": float(row["churnProbability"]),
-                    }
-                )
-
-            rf_results.update(
-                {
-                    "modelUsed": True,
-                    "accuracy": accuracy,
-                    "rocAuc": roc_auc,
-                    "featureImportances": feature_importances,
-                    "topAtRiskCustomers": top_at_risk_list,
-                }
-            )
-        else:
-            rf_results.update(
-                {
-                    "reason": (
-                        "Not enough variation in churn behaviour in this file to train a "
-                        "reliable Random Forest model."
-                    )
-                }
-            )
-    except Exception as e:
-        rf_results.update(
-            {
-                "reason": f"Random Forest model could not be trained on this file: {str(e)}"
-            }
-        )
+    return metadata
 
-    response = {
-        "horizon": "Next 6 months" if periodicity == "monthly" else "Next 3 years",
-        "forecastSummary": forecast_summary,
-        "churnSummary": churn_summary,
-        "kpis": {
-            "totalRevenue": total_revenue,
-            "totalQuantity": total_quantity,
-            "uniqueCustomers": unique_customers,
-            "uniqueProducts": unique_products,
-            "avgTransactionValue": avg_transaction_value,
-            "medianTransactionValue": median_transaction_value,
-        },
-        "topInsights": {
-            "topProductByRevenue": {
-                "productId": top_product_id,
-                "revenue": top_product_revenue,
-            },
-            "topProductByQuantity": {
-                "productId": top_qty_product_id,
-                "quantity": top_qty,
-            },
-            "highestEarningCustomer": {
-                "customerId": top_customer_id,
-                "revenue": top_customer_revenue,
-            },
-            "mostFrequentCustomer": {
-                "customerId": most_freq_customer_id,
-                "visits": most_freq_visits,
-            },
-        },
-        "detailedInsights": {
-            "top5Customers": top_5_customers,
-            "top5Products": top_5_products_rev,
-            "customerSegmentation": {
-                "highSpenders": high_spenders,
-                "mediumSpenders": medium_spenders,
-                "lowSpenders": low_spenders,
-                "highSpenderThreshold": float(high_threshold),
-                "mediumSpenderThreshold": float(medium_threshold),
-            },
-            "purchaseFrequency": {
-                "avgVisitsPerCustomer": avg_visits_per_customer,
-                "medianVisitsPerCustomer": median_visits_per_customer,
-            },
-        },
-        "randomForestModel": rf_results,
+
+class BasketRequest(BaseModel):
+    basket: List[str]
+    k: int = 5
+
+
+@app.post("/api/rules/recommend")
+async def recommend_for_basket(request: BasketRequest):
+    """
+    Top-k consequent items for a basket from the compiled association rules.
+
+    Lookups only touch the posting lists of the basket's items, so this is
+    cheap enough to call on every POS scan; it runs inline on the event loop.
+    """
+    if rule_index is None:
+        return JSONResponse(status_code=503, content={"error": "No association rules are loaded"})
+    if request.k < 1:
+        return JSONResponse(status_code=400, content={"error": "k must be at least 1"})
+    return {
+        "basket": request.basket,
+        "recommendations": rule_index.recommend(request.basket, k=request.k),
     }
 
-    return JSONResponse(content=response)
+
+def _missing_data_response():
+    return JSONResponse(
+        status_code=404,
+        content={"error": f"Transaction data not found: {RETAIL_DATA_PATH}"},
+    )
+
+
+def _country_sales_response(period, country):
+    """Cached country x period sales rollup of RETAIL_DATA_PATH as JSON rows."""
+    # Imported lazily: the analysis package pulls in the forecasting libraries
+    from src.analysis.sales_rollup import load_country_sales
+
+    rollup = load_country_sales(RETAIL_DATA_PATH, period=period)
+    countries = sorted(rollup["Country"].unique().tolist())
+    if country:
+        rollup = rollup[rollup["Country"] == country]
+    rows = [
+        {
+            "country": row.Country,
+            "year": int(row.Year),
+            **({"month": int(row.Month)} if period == "month" else {}),
+            "totalSales": round(float(row.Total_Sales), 2),
+            "totalQuantity": int(row.Total_Quantity),
+            "transactions": int(row.Num_Transactions),
+            "uniqueInvoices": int(row.Unique_Invoices),
+        }
+        for row in rollup.itertuples(index=False)
+    ]
+    return {"period": period, "countries": countries, "rows": rows}
+
+
+@app.get("/api/sales/countries")
+async def get_country_sales(period: str = "year", country: Optional[str] = None):
+    """
+    Sales per country and year (``period=year``) or month (``period=month``).
+
+    Served from the rollup cached next to RETAIL_DATA_PATH, which is only
+    rebuilt when that file changes, so switching the dashboard's country
+    (``country=...``) never recomputes from the transactions.
+    """
+    if period not in ("year", "month"):
+        return JSONResponse(status_code=400, content={"error": f"Unknown period: {period}"})
+    if not os.path.exists(RETAIL_DATA_PATH):
+        return _missing_data_response()
+    return await run_in_threadpool(_country_sales_response, period, country)
+
+
+def _daily_sales_chart(country, budget):
+    """Daily sales of RETAIL_DATA_PATH, LTTB-downsampled to ``budget`` points."""
+    from src.analysis.sales_rollup import load_country_sales
+    from src.visualization.chart_data import downsample_series
+
+    daily = load_country_sales(RETAIL_DATA_PATH, period="day")
+    if country:
+        daily = daily[daily["Country"] == country]
+    series = daily.groupby("Date", sort=True)["Total_Sales"].sum().reset_index()
+    points = downsample_series(series, "Date", "Total_Sales", budget=budget)
+    return {
+        "chart": "daily-sales",
+        "totalPoints": len(series),
+        "points": [
+            {"date": date.strftime("%Y-%m-%d"), "totalSales": round(float(sales), 2)}
+            for date, sales in zip(points["Date"], points["Total_Sales"])
+        ],
+    }
+
+
+def _customer_segments_chart(method, budget):
+    """Customer RFM scatter, sampled by cluster or binned to ``budget`` points."""
+    from src.analysis.customer_segmentation import load_customer_segments
+    from src.visualization.chart_data import scatter_data
+
+    segments = load_customer_segments(RETAIL_DATA_PATH)
+    points = scatter_data(segments, "Recency", "Monetary", by="Cluster", budget=budget,
+                          method=method)
+    if method == "bins":
+        rows = [
+            {"recency": float(r), "monetary": round(float(m), 2), "cluster": int(c),
+             "count": int(n)}
+            for r, m, c, n in zip(points["Recency"], points["Monetary"], points["Cluster"],
+                                  points["count"])
+        ]
+    else:
+        rows = [
+            {"recency": int(r), "frequency": int(f), "monetary": round(float(m), 2),
+             "cluster": int(c)}
+            for r, f, m, c in zip(points["Recency"], points["Frequency"], points["Monetary"],
+                                  points["Cluster"])
+        ]
+    return {"chart": "customers", "method": method, "totalPoints": len(segments), "points": rows}
+
+
+@app.get("/api/charts/{chart}")
+async def get_chart_data(chart: str, budget: int = 2000, country: Optional[str] = None,
+                         method: str = "sample"):
+    """
+    Chart-ready data reduced to at most ``budget`` points.
+
+    - ``daily-sales``: daily sales (optionally for one ``country``),
+      downsampled with LTTB so peaks and troughs survive
+    - ``customers``: the RFM scatter, as a cluster-stratified sample
+      (``method=sample``) or a density grid (``method=bins``)
+
+    Response size is bounded by the budget however large the data grows.
+    """
+    if not 3 <= budget <= CHART_MAX_POINTS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"budget must be between 3 and {CHART_MAX_POINTS}"},
+        )
+    if not os.path.exists(RETAIL_DATA_PATH):
+        return _missing_data_response()
+    if chart == "daily-sales":
+        return await run_in_threadpool(_daily_sales_chart, country, budget)
+    if chart == "customers":
+        if method not in ("sample", "bins"):
+            return JSONResponse(status_code=400, content={"error": f"Unknown method: {method}"})
+        return await run_in_threadpool(_customer_segments_chart, method, budget)
+    return JSONResponse(status_code=404, content={"error": f"Unknown chart: {chart}"})
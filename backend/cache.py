@@ -0,0 +1,222 @@
+"""
+Content-addressed cache for /api/predict responses.
+
+Stores re-upload the same daily export many times as dashboards refresh, so
+responses are cached under a hash of the uploaded bytes plus the request
+parameters. Entries live in an in-memory LRU tier bounded by size and age,
+backed by a disk tier that survives restarts.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Bump when the response format changes so stale entries are never served.
+CACHE_VERSION = "2"
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def cache_key(fileobj, *params):
+    """
+    Hash a file object's bytes together with request parameters.
+
+    The file is read in fixed-size blocks and rewound afterwards, so hashing
+    does not hold the upload in memory.
+
+    Parameters:
+    -----------
+    fileobj : file-like
+        Seekable binary file object
+    *params : str
+        Request parameters that change the response (e.g. periodicity)
+
+    Returns:
+    --------
+    str
+        Hex digest identifying the request
+    """
+    digest = hashlib.sha256()
+    digest.update(CACHE_VERSION.encode())
+    for param in params:
+        digest.update(b"\0" + str(param).encode())
+    digest.update(b"\0")
+
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(_HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier LRU cache of serialised JSON responses.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Size budget of the in-memory tier
+    max_age : float
+        Seconds after which an entry expires, in both tiers
+    cache_dir : str or Path, optional
+        Directory of the disk tier. If None, only memory is used.
+    max_disk_bytes : int, optional
+        Size budget of the disk tier. Defaults to ``8 * max_bytes``.
+    """
+
+    def __init__(self, max_bytes, max_age, cache_dir=None, max_disk_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else 8 * max_bytes
+
+        # key -> (payload bytes, created_at), least recently used first
+        self._entries = OrderedDict()
+        self._size = 0
+        # The memory tier's lock is never held during disk I/O; the disk tier
+        # has its own, so a slow write only delays other writers
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._counters = {"memoryHits": 0, "diskHits": 0, "misses": 0, "evictions": 0}
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key):
+        """
+        Return the cached payload bytes for ``key``, or None.
+
+        May read from disk; call it from a worker thread, not the event loop.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, created_at = entry
+                if now - created_at <= self.max_age:
+                    self._entries.move_to_end(key)
+                    self._counters["memoryHits"] += 1
+                    return payload
+                self._drop(key)
+
+        payload, created_at = self._read_disk(key, now)
+        with self._lock:
+            if payload is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["diskHits"] += 1
+            self._insert(key, payload, created_at)
+            return payload
+
+    def put(self, key, payload):
+        """
+        Store serialised ``payload`` bytes under ``key`` in both tiers.
+
+        Writes to disk; call it from a worker thread, not the event loop.
+        """
+        created_at = time.time()
+        with self._lock:
+            self._insert(key, payload, created_at)
+        self._write_disk(key, payload)
+
+    def stats(self):
+        """Hit/miss counters and current occupancy, for /health."""
+        with self._lock:
+            hits = self._counters["memoryHits"] + self._counters["diskHits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hitRate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "maxBytes": self.max_bytes,
+                "maxAgeSeconds": self.max_age,
+                "diskEnabled": self.cache_dir is not None,
+            }
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+    def _insert(self, key, payload, created_at):
+        if key in self._entries:
+            self._drop(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (payload, created_at)
+        self._size += len(payload)
+        self._evict(time.time())
+
+    def _drop(self, key):
+        payload, _ = self._entries.pop(key)
+        self._size -= len(payload)
+
+    def _evict(self, now):
+        expired = [k for k, (_, created_at) in self._entries.items()
+                   if now - created_at > self.max_age]
+        for key in expired:
+            self._drop(key)
+        while self._size > self.max_bytes:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self._counters["evictions"] += 1
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, key, now):
+        if not self.cache_dir:
+            return None, None
+        path = self._path(key)
+        try:
+            created_at = path.stat().st_mtime
+            if now - created_at > self.max_age:
+                path.unlink(missing_ok=True)
+                return None, None
+            payload = path.read_bytes()
+        except OSError:
+            return None, None
+        # Refresh the access time used for LRU eviction on disk
+        os.utime(path, (now, created_at))
+        return payload, created_at
+
+    def _write_disk(self, key, payload):
+        if not self.cache_dir:
+            return
+        tmp_path = self._path(key).with_suffix(f".{threading.get_ident()}.tmp")
+        with self._disk_lock:
+            try:
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                return
+            self._evict_disk(time.time())
+
+    def _evict_disk(self, now):
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                files.append((st.st_atime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._counters["evictions"] += 1
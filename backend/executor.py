@@ -0,0 +1,164 @@
+"""
+Bounded process-pool execution for CPU-bound analysis jobs.
+
+CSV parsing, aggregation and model training run in worker processes so they
+never block the event loop. The number of in-flight jobs (running plus
+queued) is capped; once the queue is full new work is rejected immediately
+so the API can answer 503 instead of piling up requests.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue is at capacity."""
+
+
+class JobTimeoutError(TimeoutError):
+    """Raised when a job does not finish within the configured timeout."""
+
+
+class AnalysisExecutor:
+    """
+    Process pool with queue-depth backpressure and per-job timeouts.
+
+    Parameters:
+    -----------
+    max_workers : int
+        Number of worker processes
+    max_queue : int
+        Jobs allowed to wait for a free worker before new ones are rejected
+    timeout : float
+        Seconds a caller waits for a job before giving up
+    """
+
+    def __init__(self, max_workers, max_queue, timeout):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._pool = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0,
+                          "rejected": 0, "timedOut": 0}
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn keeps workers independent of the server's threads and loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def submit(self, fn, *args):
+        """
+        Submit ``fn(*args)`` to the pool and return its concurrent future.
+
+        The in-flight slot is released when the job actually finishes, not
+        when a caller stops waiting, so capacity reflects real pool load.
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._counters["rejected"] += 1
+                raise QueueFullError(
+                    f"Analysis queue is full ({self.capacity} jobs in flight)"
+                )
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._counters["failed"] += 1
+            else:
+                self._counters["completed"] += 1
+
+    async def run(self, fn, *args, cleanup=None):
+        """
+        Run ``fn(*args)`` in the pool and await its result with a timeout.
+
+        ``cleanup()`` (e.g. removing the job's input file) is called once the
+        job has really finished -- not when the caller stops waiting, since a
+        timed-out job may already be in the pool's call queue and still run
+        -- or right away if the job is rejected.
+        """
+        try:
+            future = self.submit(fn, *args)
+        except Exception:
+            if cleanup is not None:
+                cleanup()
+            raise
+        if cleanup is not None:
+            future.add_done_callback(lambda _: cleanup())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Drops the job if it is still queued; a running (or already
+            # dispatched) job finishes in the background and then frees its
+            # slot and runs its cleanup.
+            future.cancel()
+            with self._lock:
+                self._counters["timedOut"] += 1
+            raise JobTimeoutError(f"Analysis did not finish within {self.timeout:g}s")
+
+    def stats(self):
+        """Pool occupancy and counters, for /health."""
+        with self._lock:
+            return {
+                **self._counters,
+                "inFlight": self._in_flight,
+                "workers": self.max_workers,
+                "maxQueue": self.max_queue,
+                "timeoutSeconds": self.timeout,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def spool_to_disk(fileobj, suffix=".csv"):
+    """
+    Copy an upload to a named temporary file that worker processes can open.
+
+    Returns:
+    --------
+    str
+        Path of the temporary file; the caller is responsible for removing it
+    """
+    fileobj.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(fileobj, tmp, length=1 << 20)
+    fileobj.seek(0)
+    return tmp.name
+
+
+def remove_spooled(path):
+    """Remove a file written by ``spool_to_disk``, if it still exists."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
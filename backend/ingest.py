@@ -0,0 +1,430 @@
+"""
+Streaming CSV ingestion for the prediction API.
+
+Uploaded reports are parsed in bounded chunks and folded into running
+aggregates, so peak memory depends on the number of customers and products
+in the file rather than on the number of rows.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Flexible column name handling
+DATE_COL_CANDIDATES = ["date", "Date", "InvoiceDate"]
+REVENUE_COL_CANDIDATES = ["revenue", "Revenue", "TotalPrice", "Sales", "Amount"]
+QTY_COL_CANDIDATES = ["quantity", "Quantity", "qty", "Qty"]
+CUSTOMER_COL_CANDIDATES = ["customer_id", "CustomerID", "customer", "Customer"]
+PRODUCT_COL_CANDIDATES = ["product_id", "StockCode", "product", "ProductID"]
+
+# Rows parsed per chunk; bounds the transient DataFrame held in memory.
+CHUNK_SIZE = 100_000
+
+# int64 view of NaT; compares below every real timestamp.
+_NAT = np.iinfo("int64").min
+
+# Distinct revenue values counted exactly before the median falls back to a
+# relative-error sketch, and that sketch's relative accuracy.
+MEDIAN_EXACT_LIMIT = 65_536
+MEDIAN_RELATIVE_ACCURACY = 0.005
+
+# Sketch bucket keys: 0 for (near-)zero revenue, +/-(_BUCKET_SHIFT + log
+# bucket) for positive/negative values, so keys sort like the values.
+_BUCKET_SHIFT = 1 << 20
+_MIN_MAGNITUDE = 1e-9
+
+
+class MissingColumnsError(ValueError):
+    """Raised when an uploaded CSV does not contain the required columns."""
+
+    def __init__(self, received_columns):
+        super().__init__("CSV does not contain required columns.")
+        self.received_columns = list(received_columns)
+
+    def __reduce__(self):
+        # Keep the received columns when raised inside a worker process
+        return (type(self), (self.received_columns,))
+
+    def to_content(self):
+        return {
+            "error": str(self),
+            "required_like": {
+                "date": DATE_COL_CANDIDATES,
+                "revenue": REVENUE_COL_CANDIDATES,
+                "quantity": QTY_COL_CANDIDATES,
+                "customer": CUSTOMER_COL_CANDIDATES,
+                "product": PRODUCT_COL_CANDIDATES,
+            },
+            "received_columns": self.received_columns,
+        }
+
+
+class CSVParseError(ValueError):
+    """Raised when an uploaded file cannot be parsed as CSV."""
+
+
+def pick_col(columns, candidates):
+    """Return the first candidate present in ``columns``, or None."""
+    for c in candidates:
+        if c in columns:
+            return c
+    return None
+
+
+class _KeyCodes:
+    """
+    Incremental factorization of a key column.
+
+    Every distinct key gets a stable integer code the first time it is seen,
+    so per-key statistics can be accumulated with ``np.bincount`` across
+    chunks. Codes follow first-appearance order.
+    """
+
+    def __init__(self, dtype=object):
+        self.keys = pd.Index([], dtype=dtype)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def encode(self, values):
+        """Return global codes for ``values``; missing keys map to -1."""
+        local_codes, uniques = pd.factorize(values)
+        if len(uniques) == 0:
+            # Every key in the chunk is missing
+            return local_codes
+        if self.keys.dtype == object:
+            uniques = _as_key_strings(uniques)
+        global_codes = self.keys.get_indexer(uniques)
+        new = global_codes == -1
+        if new.any():
+            global_codes[new] = np.arange(len(self.keys), len(self.keys) + new.sum())
+            self.keys = self.keys.append(pd.Index(uniques[new], dtype=self.keys.dtype))
+        return np.where(local_codes >= 0, global_codes[local_codes], -1)
+
+
+def _as_key_strings(uniques):
+    """
+    Render the distinct keys of one chunk as strings.
+
+    Id columns are parsed with default type inference, so the same id can be
+    an int in one chunk and a float in another (when that chunk has a missing
+    value). Integral floats are rendered without the trailing ``.0`` so both
+    map to the same key. Only the uniques are converted, not every row.
+    """
+    uniques = np.asarray(uniques)
+    if uniques.dtype.kind == "f" and np.all(np.mod(uniques, 1) == 0):
+        uniques = uniques.astype("int64")
+    return uniques.astype(str).astype(object)
+
+
+def _grow(array, size, fill=0):
+    """Pad a per-key accumulator so it can be indexed by every code."""
+    if len(array) >= size:
+        return array
+    return np.concatenate([array, np.full(size - len(array), fill, dtype=array.dtype)])
+
+
+def _weighted_median(values, counts):
+    """Median of sorted ``values`` each repeated ``counts`` times."""
+    cumulative = np.cumsum(counts)
+    n = int(cumulative[-1]) if len(cumulative) else 0
+    if n == 0:
+        return float("nan")
+    upper = values[cumulative.searchsorted(n // 2, side="right")]
+    if n % 2:
+        return float(upper)
+    lower = values[cumulative.searchsorted(n // 2 - 1, side="right")]
+    return float((lower + upper) / 2)
+
+
+class _MedianSketch:
+    """
+    Median of a stream of revenue values in bounded memory.
+
+    Values are counted exactly while there are at most ``exact_limit``
+    distinct ones, so typical reports get the exact median. Past that the
+    counts are folded into logarithmic buckets (as in DDSketch): every value
+    within a factor of ``(1 + a) / (1 - a)`` shares a bucket, so the median
+    is within relative error ``a`` of the true one, and the number of buckets
+    grows with the log of the value range rather than with distinct values
+    (about 1,900 buckets for revenue between 0.01 and 1,000,000 at a=0.5%).
+    """
+
+    def __init__(self, exact_limit=MEDIAN_EXACT_LIMIT,
+                 relative_accuracy=MEDIAN_RELATIVE_ACCURACY):
+        self.exact_limit = exact_limit
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._values = _KeyCodes(dtype="float64")
+        self._counts = np.zeros(0, dtype="int64")
+        self._buckets = None
+
+    @property
+    def exact(self):
+        return self._buckets is None
+
+    def update(self, values):
+        if not self.exact:
+            self._add_to_buckets(values, None)
+            return
+        codes = self._values.encode(values)
+        self._counts = _grow(self._counts, len(self._values))
+        self._counts += np.bincount(codes, minlength=len(self._values))
+        if len(self._values) > self.exact_limit:
+            # Switch to buckets for good; the exact counts are dropped
+            self._buckets = {}
+            self._add_to_buckets(self._values.keys.to_numpy(dtype="float64"), self._counts)
+            self._values, self._counts = None, None
+
+    def _add_to_buckets(self, values, counts):
+        magnitude = np.abs(values)
+        keys = np.zeros(len(values), dtype="int64")
+        nonzero = magnitude > _MIN_MAGNITUDE
+        keys[nonzero] = np.sign(values[nonzero]).astype("int64") * (
+            _BUCKET_SHIFT
+            + np.ceil(np.log(magnitude[nonzero]) / np.log(self._gamma)).astype("int64")
+        )
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts, minlength=len(unique)).astype("int64")
+        for key, total in zip(unique.tolist(), totals.tolist()):
+            self._buckets[key] = self._buckets.get(key, 0) + total
+
+    def median(self):
+        if self.exact:
+            values = self._values.keys.to_numpy(dtype="float64")
+            order = np.argsort(values)
+            return _weighted_median(values[order], self._counts[order])
+        keys = np.array(sorted(self._buckets), dtype="int64")
+        counts = np.array([self._buckets[k] for k in keys.tolist()], dtype="int64")
+        # Bucket i covers (gamma^(i-1), gamma^i]; its representative is within
+        # the relative accuracy of every value in it
+        exponent = np.abs(keys) - _BUCKET_SHIFT
+        values = np.sign(keys) * 2 * self._gamma ** exponent / (self._gamma + 1)
+        return _weighted_median(values, counts)
+
+
+@dataclass
+class AggregationResult:
+    """
+    Compact result of the fused aggregation over one uploaded report.
+
+    Per-customer and per-product arrays are aligned with ``customer_ids`` and
+    ``product_ids``, which are sorted like a pandas ``groupby`` index.
+    """
+
+    columns: list
+    n_rows: int
+    total_revenue: float
+    total_quantity: float
+    mean_revenue: float
+    median_revenue: float
+    median_exact: bool
+    min_revenue: float
+    max_revenue: float
+    max_date: pd.Timestamp
+    customer_ids: np.ndarray
+    customer_revenue: np.ndarray
+    customer_visits: np.ndarray
+    customer_last_purchase: np.ndarray
+    customer_first_seen: np.ndarray
+    product_ids: np.ndarray
+    product_revenue: np.ndarray
+    product_quantity: np.ndarray
+    month_starts: np.ndarray
+    monthly_revenue: np.ndarray
+
+
+class StreamingAggregator:
+    """
+    Fused single-pass aggregation over the chunks of one uploaded report.
+
+    Customer and product keys are factorized once per chunk into stable
+    codes, and every per-key statistic and global KPI is then a vectorized
+    reduction over those codes. State is O(customers + products)
+    plus the bounded median sketch, independent of the number of rows read.
+    """
+
+    def __init__(self, date_col, revenue_col, qty_col, cust_col, prod_col):
+        self.date_col = date_col
+        self.revenue_col = revenue_col
+        self.qty_col = qty_col
+        self.cust_col = cust_col
+        self.prod_col = prod_col
+
+        self.n_rows = 0
+        self.total_revenue = 0.0
+        self.total_quantity = 0.0
+        self.min_revenue = np.inf
+        self.max_revenue = -np.inf
+        self.max_date = _NAT
+
+        self._customers = _KeyCodes()
+        self._products = _KeyCodes()
+        # Per-record revenue distribution, for the median
+        self._median = _MedianSketch()
+
+        self._cust_revenue = np.zeros(0, dtype="float64")
+        self._cust_visits = np.zeros(0, dtype="int64")
+        self._cust_last = np.zeros(0, dtype="int64")
+        self._prod_revenue = np.zeros(0, dtype="float64")
+        self._prod_quantity = np.zeros(0, dtype="float64")
+        # Calendar month (months since 1970-01) -> revenue, for forecasting
+        self._month_revenue = {}
+
+    def update(self, chunk):
+        """Fold one parsed chunk into the running aggregates."""
+        if len(chunk) == 0:
+            return
+
+        revenue = pd.to_numeric(chunk[self.revenue_col], errors="coerce").fillna(0).to_numpy("float64")
+        qty = pd.to_numeric(chunk[self.qty_col], errors="coerce").fillna(0).to_numpy("float64")
+        dates = (
+            pd.to_datetime(chunk[self.date_col], errors="coerce")
+            .to_numpy("datetime64[ns]")
+            .view("int64")
+        )
+        cust = self._customers.encode(chunk[self.cust_col])
+        prod = self._products.encode(chunk[self.prod_col])
+
+        # Global KPIs
+        self.n_rows += len(chunk)
+        self.total_revenue += float(revenue.sum())
+        self.total_quantity += float(qty.sum())
+        self.min_revenue = min(self.min_revenue, float(revenue.min()))
+        self.max_revenue = max(self.max_revenue, float(revenue.max()))
+        self.max_date = max(self.max_date, int(dates.max()))
+
+        self._median.update(revenue)
+
+        # Per-customer statistics
+        n_cust = len(self._customers)
+        self._cust_revenue = _grow(self._cust_revenue, n_cust)
+        self._cust_visits = _grow(self._cust_visits, n_cust)
+        self._cust_last = _grow(self._cust_last, n_cust, fill=_NAT)
+        has_cust = cust >= 0
+        cust, cust_revenue, cust_dates = cust[has_cust], revenue[has_cust], dates[has_cust]
+        self._cust_revenue += np.bincount(cust, weights=cust_revenue, minlength=n_cust)
+        self._cust_visits += np.bincount(cust, minlength=n_cust)
+        np.maximum.at(self._cust_last, cust, cust_dates)
+
+        # Per-product statistics
+        n_prod = len(self._products)
+        self._prod_revenue = _grow(self._prod_revenue, n_prod)
+        self._prod_quantity = _grow(self._prod_quantity, n_prod)
+        has_prod = prod >= 0
+        prod = prod[has_prod]
+        self._prod_revenue += np.bincount(prod, weights=revenue[has_prod], minlength=n_prod)
+        self._prod_quantity += np.bincount(prod, weights=qty[has_prod], minlength=n_prod)
+
+        # Revenue per calendar month
+        has_date = dates != _NAT
+        months = dates[has_date].view("datetime64[ns]").astype("datetime64[M]").view("int64")
+        month_keys, month_codes = np.unique(months, return_inverse=True)
+        month_sums = np.bincount(month_codes, weights=revenue[has_date], minlength=len(month_keys))
+        for month, total in zip(month_keys.tolist(), month_sums.tolist()):
+            self._month_revenue[month] = self._month_revenue.get(month, 0.0) + total
+
+    def result(self):
+        """Return the aggregates as an AggregationResult."""
+        customer_ids = self._customers.keys.to_numpy()
+        cust_order = np.argsort(customer_ids, kind="stable")
+        product_ids = self._products.keys.to_numpy()
+        prod_order = np.argsort(product_ids, kind="stable")
+
+        # Every month from the first to the last, months without sales as 0
+        if self._month_revenue:
+            first, last = min(self._month_revenue), max(self._month_revenue)
+            month_index = np.arange(first, last + 1)
+        else:
+            month_index = np.zeros(0, dtype="int64")
+        monthly_revenue = np.array(
+            [self._month_revenue.get(m, 0.0) for m in month_index.tolist()], dtype="float64"
+        )
+
+        return AggregationResult(
+            columns=[self.date_col, self.revenue_col, self.qty_col, self.cust_col, self.prod_col],
+            n_rows=self.n_rows,
+            total_revenue=self.total_revenue,
+            total_quantity=self.total_quantity,
+            mean_revenue=self.total_revenue / self.n_rows if self.n_rows else float("nan"),
+            median_revenue=self._median.median(),
+            median_exact=self._median.exact,
+            min_revenue=self.min_revenue,
+            max_revenue=self.max_revenue,
+            max_date=pd.Timestamp(self.max_date),
+            customer_ids=customer_ids[cust_order],
+            customer_revenue=self._cust_revenue[cust_order],
+            customer_visits=self._cust_visits[cust_order],
+            customer_last_purchase=self._cust_last[cust_order].view("datetime64[ns]"),
+            customer_first_seen=cust_order,
+            product_ids=product_ids[prod_order],
+            product_revenue=self._prod_revenue[prod_order],
+            product_quantity=self._prod_quantity[prod_order],
+            month_starts=month_index.astype("datetime64[M]"),
+            monthly_revenue=monthly_revenue,
+        )
+
+
+def read_header(fileobj):
+    """Return the column names of a CSV file object and rewind it."""
+    columns = list(pd.read_csv(fileobj, nrows=0).columns)
+    fileobj.seek(0)
+    return columns
+
+
+def aggregate_csv(fileobj, chunksize=CHUNK_SIZE, progress=None):
+    """
+    Stream a CSV file object through the fused aggregator.
+
+    Only the five required columns are parsed. Customer and product keys are
+    normalised to strings so that ids compare equal across chunks.
+
+    Parameters:
+    -----------
+    fileobj : file-like
+        Seekable binary file object positioned at the start of the CSV
+    chunksize : int, default=CHUNK_SIZE
+        Number of rows parsed per chunk
+    progress : callable, optional
+        Called after each chunk with the fraction of the file consumed
+
+    Returns:
+    --------
+    AggregationResult
+        Aggregates over every row in the file
+    """
+    total_bytes = fileobj.seek(0, 2)
+    fileobj.seek(0)
+
+    try:
+        columns = read_header(fileobj)
+    except Exception as e:
+        raise CSVParseError(f"Failed to parse CSV: {str(e)}") from e
+
+    date_col = pick_col(columns, DATE_COL_CANDIDATES)
+    revenue_col = pick_col(columns, REVENUE_COL_CANDIDATES)
+    qty_col = pick_col(columns, QTY_COL_CANDIDATES)
+    cust_col = pick_col(columns, CUSTOMER_COL_CANDIDATES)
+    prod_col = pick_col(columns, PRODUCT_COL_CANDIDATES)
+
+    if not (date_col and revenue_col and qty_col and cust_col and prod_col):
+        raise MissingColumnsError(columns)
+
+    aggregator = StreamingAggregator(date_col, revenue_col, qty_col, cust_col, prod_col)
+    reader = pd.read_csv(
+        fileobj,
+        usecols=[date_col, revenue_col, qty_col, cust_col, prod_col],
+        chunksize=chunksize,
+    )
+    try:
+        for chunk in reader:
+            aggregator.update(chunk)
+            if progress is not None and total_bytes:
+                progress(min(fileobj.tell() / total_bytes, 1.0))
+    except Exception as e:
+        raise CSVParseError(f"Failed to parse CSV: {str(e)}") from e
+
+    if aggregator.n_rows == 0:
+        raise CSVParseError("Failed to parse CSV: no data rows")
+
+    return aggregator.result()
@@ -0,0 +1,466 @@
+"""
+Response builder for the prediction API.
+
+Turns the compact AggregationResult produced by ``backend/ingest.py`` into
+the JSON payload consumed by the dashboard. Nothing here touches per-row
+data: every statistic is derived from the per-customer and per-product
+arrays.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+from .ingest import aggregate_csv
+from .model_registry import can_train, registry
+
+logger = logging.getLogger(__name__)
+
+
+def _rank_desc(values, tiebreak=None):
+    """Indices of ``values`` from largest to smallest, ties kept in order."""
+    if tiebreak is None:
+        return np.argsort(-values, kind="stable")
+    return np.lexsort((tiebreak, -values))
+
+
+def customer_features_frame(result):
+    """
+    Build the Recency/Frequency/TotalSpent customer feature table.
+
+    Parameters:
+    -----------
+    result : AggregationResult
+        Aggregates over one uploaded report
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per customer with features and the churn label
+    """
+    reference_date = result.max_date + pd.Timedelta(days=1)
+    recency = (reference_date - pd.DatetimeIndex(result.customer_last_purchase)).days
+
+    customer_features = pd.DataFrame(
+        {
+            "customerId": result.customer_ids.astype(str),
+            "Recency": np.asarray(recency).astype("int64"),
+            "Frequency": result.customer_visits.astype("int64"),
+            "TotalSpent": result.customer_revenue.astype("float64"),
+        }
+    )
+
+    # Define churn label: customers with Recency > 90 days are treated as churned
+    customer_features["Churned"] = (
+        customer_features["Recency"] > 90
+    ).astype(int)
+
+    return customer_features
+
+
+def random_forest_churn(result):
+    """
+    Score customers with the registered churn model and summarise it.
+
+    The active model from the registry is used for inference only. A first
+    version is trained from this file when no model exists yet. A file whose
+    features drift past the registry's PSI threshold is reported as drifted,
+    but retraining is left to ``POST /api/models/churn/train`` or the
+    registry CLI, so one unusual upload cannot replace the shared model.
+    """
+    rf_results = {
+        "modelUsed": False,
+        "description": (
+            "Random Forest is an ensemble machine learning algorithm for classification "
+            "and regression. It builds many decision trees on different subsets of the data "
+            "and averages their results (or takes a majority vote) to improve accuracy and "
+            "reduce overfitting. Here it is used to predict which customers are at higher "
+            "risk of churn based on recency, frequency and monetary value."
+        ),
+    }
+
+    try:
+        # Build customer-level features: recency, frequency, total spend
+        customer_features = customer_features_frame(result)
+
+        model = registry.latest()
+        drift = model.drift(customer_features) if model is not None else None
+        drifted = drift is not None and max(drift.values()) > registry.drift_threshold
+
+        retrained = False
+        if model is None and can_train(customer_features):
+            model, retrained = registry.bootstrap(customer_features)
+            drift = model.drift(customer_features)
+
+        # Without a registered model we need enough label variation to train one
+        if model is None:
+            rf_results.update(
+                {
+                    "reason": (
+                        "Not enough variation in churn behaviour in this file to train a "
+                        "reliable Random Forest model."
+                    )
+                }
+            )
+            return rf_results
+
+        # Inference only: score every customer with the registered model
+        all_proba = model.predict_proba(customer_features)
+        customer_features["churnProbability"] = all_proba
+
+        # Agreement with this file's churn labels; not a held-out score, since
+        # the model may have been trained on this very file
+        y = customer_features["Churned"]
+        file_accuracy = float(accuracy_score(y, (all_proba >= 0.5).astype(int)))
+        try:
+            file_roc_auc = float(roc_auc_score(y, all_proba))
+        except ValueError:
+            file_roc_auc = None
+
+        top_at_risk = (
+            customer_features.sort_values(
+                "churnProbability", ascending=False
+            )
+            .head(5)
+            .reset_index(drop=True)
+        )
+
+        top_at_risk_list = []
+        for _, row in top_at_risk.iterrows():
+            top_at_risk_list.append(
+                {
+                    "customerId": str(row["customerId"]),
+                    "recencyDays": int(row["Recency"]),
+                    "frequency": int(row["Frequency"]),
+                    "totalSpent": float(row["TotalSpent"]),
+                    "churnProbability": float(row["churnProbability"]),
+                }
+            )
+
+        rf_results.update(
+            {
+                "modelUsed": True,
+                "modelVersion": model.version,
+                "retrained": retrained,
+                "drift": drift,
+                "drifted": drifted,
+                # Held-out scores from the model's 30% test split at training time
+                "accuracy": model.metadata["accuracy"],
+                "rocAuc": model.metadata["rocAuc"],
+                "fileAccuracy": file_accuracy,
+                "fileRocAuc": file_roc_auc,
+                "featureImportances": model.metadata["featureImportances"],
+                "topAtRiskCustomers": top_at_risk_list,
+            }
+        )
+    except Exception as e:
+        rf_results.update(
+            {
+                "reason": f"Random Forest model could not be applied to this file: {str(e)}"
+            }
+        )
+
+    return rf_results
+
+
+# Periods forecast for each dashboard periodicity
+FORECAST_HORIZONS = {"monthly": 6, "yearly": 3}
+
+
+def revenue_forecast(result, periodicity="monthly"):
+    """
+    Forecast revenue for the dashboard's horizon with a fast baseline model.
+
+    Monthly forecasts use Holt-Winters with a yearly season once two years
+    of history exist and exponential smoothing before that; yearly
+    forecasts smooth the yearly totals. These run in well under a
+    millisecond, so they fit inside the request.
+
+    A trailing month or year that the data does not cover to its last day
+    is partial; fitting it as a full period would drag the forecast down,
+    so it is left out of the fit (when an earlier period exists) and
+    reported as ``partialPeriod``. The forecast then starts with that
+    period's full-length estimate.
+
+    Parameters:
+    -----------
+    result : AggregationResult
+        Aggregates over one uploaded report
+    periodicity : str, default='monthly'
+        'monthly' forecasts 6 months ahead, anything else 3 years
+
+    Returns:
+    --------
+    dict or None
+        Model used, the revenue history, the forecast points and the
+        partial trailing period (None if the last period is complete); None
+        when the report has no dated rows
+    """
+    from src.analysis.baseline_forecasts import forecast_baseline
+
+    if len(result.monthly_revenue) == 0:
+        return None
+
+    if periodicity == "monthly":
+        periods = result.month_starts
+        history = result.monthly_revenue
+        steps = FORECAST_HORIZONS["monthly"]
+        season_length = 12
+    else:
+        years = result.month_starts.astype("datetime64[Y]")
+        periods = np.unique(years)
+        history = np.bincount(np.searchsorted(periods, years),
+                              weights=result.monthly_revenue, minlength=len(periods))
+        steps = FORECAST_HORIZONS["yearly"]
+        season_length = 1
+
+    # The last period is complete only if the data reaches its final day
+    last_date = np.datetime64(result.max_date.date(), "D")
+    period_end = (periods[-1] + 1).astype("datetime64[D]") - np.timedelta64(1, "D")
+    partial = None
+    if last_date < period_end:
+        partial = {"period": str(periods[-1]), "revenue": float(history[-1]),
+                   "through": str(last_date), "excludedFromFit": len(history) > 1}
+        if len(history) > 1:
+            periods, history = periods[:-1], history[:-1]
+    labels = [str(p) for p in periods]
+    future = periods[-1] + np.arange(1, steps + 1)
+
+    if len(history) >= 2 * season_length and season_length > 1:
+        model_type = "holt_winters"
+    elif len(history) >= 2:
+        model_type = "ses"
+    else:
+        model_type = "seasonal_naive"
+    forecasts, _ = forecast_baseline(history, steps, model_type, season_length=1
+                                     if model_type == "seasonal_naive" else season_length)
+
+    return {
+        "periodicity": "monthly" if periodicity == "monthly" else "yearly",
+        "model": model_type,
+        "history": [{"period": label, "revenue": float(value)}
+                    for label, value in zip(labels, history)],
+        "points": [{"period": str(period), "revenue": max(float(value), 0.0)}
+                   for period, value in zip(future, forecasts[0])],
+        "partialPeriod": partial,
+    }
+
+
+def build_response(result, periodicity="monthly"):
+    """
+    Build the /api/predict JSON payload from aggregated report data.
+
+    Parameters:
+    -----------
+    result : AggregationResult
+        Aggregates over one uploaded report
+    periodicity : str, default='monthly'
+        Forecast periodicity requested by the dashboard
+
+    Returns:
+    --------
+    dict
+        JSON-serialisable response payload
+    """
+    total_revenue = float(result.total_revenue)
+    total_quantity = int(result.total_quantity)
+    unique_customers = int(len(result.customer_ids))
+    unique_products = int(len(result.product_ids))
+
+    prod_ids, prod_revenue, prod_quantity = (
+        result.product_ids, result.product_revenue, result.product_quantity
+    )
+    cust_ids, cust_revenue, cust_visits = (
+        result.customer_ids, result.customer_revenue, result.customer_visits
+    )
+
+    # Top product by revenue
+    prod_rev_rank = _rank_desc(prod_revenue)
+    top_product_id = str(prod_ids[prod_rev_rank[0]])
+    top_product_revenue = float(prod_revenue[prod_rev_rank[0]])
+
+    logger.debug("Top product: %s (revenue %s); top 5: %s", top_product_id,
+                 top_product_revenue, [str(x) for x in prod_ids[prod_rev_rank[:5]]])
+
+    # Top product by quantity
+    prod_qty_rank = _rank_desc(prod_quantity)
+    top_qty_product_id = str(prod_ids[prod_qty_rank[0]])
+    top_qty = int(prod_quantity[prod_qty_rank[0]])
+
+    # Highest earning customer
+    cust_rev_rank = _rank_desc(cust_revenue)
+    top_customer_id = str(cust_ids[cust_rev_rank[0]])
+    top_customer_revenue = float(cust_revenue[cust_rev_rank[0]])
+
+    logger.debug("Top customer: %s (revenue %s); top 5: %s", top_customer_id,
+                 top_customer_revenue, [str(x) for x in cust_ids[cust_rev_rank[:5]]])
+
+    # Most frequent customer (by transactions); ties go to the customer that
+    # appears first in the file. The pre-streaming code took whichever tied
+    # customer pandas' unstable value_counts sort put first, so on ties the
+    # reported customer can differ from older responses.
+    cust_freq_rank = _rank_desc(cust_visits, tiebreak=result.customer_first_seen)
+    most_freq_customer_id = str(cust_ids[cust_freq_rank[0]])
+    most_freq_visits = int(cust_visits[cust_freq_rank[0]])
+
+    # Top 5 customers by revenue
+    top_5_customers = []
+    for idx, i in enumerate(cust_rev_rank[:5]):
+        rev = float(cust_revenue[i])
+        visit_count = int(cust_visits[i])
+        top_5_customers.append({
+            "rank": idx + 1,
+            "customerId": str(cust_ids[i]),
+            "revenue": rev,
+            "visits": visit_count,
+            "avgSpendPerVisit": float(rev / visit_count) if visit_count > 0 else 0.0
+        })
+
+    # Top 5 products by revenue
+    top_5_products_rev = []
+    for idx, i in enumerate(prod_rev_rank[:5]):
+        rev = float(prod_revenue[i])
+        qty = int(prod_quantity[i])
+        top_5_products_rev.append({
+            "rank": idx + 1,
+            "productId": str(prod_ids[i]),
+            "revenue": rev,
+            "quantity": qty,
+            "avgPrice": float(rev / qty) if qty > 0 else 0.0
+        })
+
+    # Customer segmentation (high/medium/low spenders)
+    high_threshold = np.quantile(cust_revenue, 0.8)
+    medium_threshold = np.quantile(cust_revenue, 0.5)
+
+    high_spenders = int((cust_revenue >= high_threshold).sum())
+    medium_spenders = int(((cust_revenue >= medium_threshold) & (cust_revenue < high_threshold)).sum())
+    low_spenders = int((cust_revenue < medium_threshold).sum())
+
+    # Average transaction value
+    avg_transaction_value = float(result.mean_revenue)
+    median_transaction_value = float(result.median_revenue)
+
+    # Customer purchase frequency stats
+    avg_visits_per_customer = float(cust_visits.mean())
+    median_visits_per_customer = float(np.median(cust_visits))
+
+    # Simple data-driven text summary
+    avg_record_revenue = float(result.mean_revenue)
+    max_record_revenue = float(result.max_revenue)
+    min_record_revenue = float(result.min_revenue)
+
+    forecast_summary = (
+        f"Across the uploaded report, total revenue is Rs{total_revenue:,.0f} "
+        f"over {result.n_rows:,} records, with an average of Rs{avg_record_revenue:,.0f} "
+        f"per record. The highest single-record revenue is Rs{max_record_revenue:,.0f} "
+        f"and the lowest is Rs{min_record_revenue:,.0f}. Use these patterns to plan "
+        "stock levels and staffing for similar periods."
+    )
+
+    forecast = revenue_forecast(result, periodicity)
+    if forecast is not None:
+        projected = sum(point["revenue"] for point in forecast["points"])
+        forecast_summary += (
+            f" Projected revenue for the next {len(forecast['points'])} "
+            f"{'months' if forecast['periodicity'] == 'monthly' else 'years'} is "
+            f"Rs{projected:,.0f}."
+        )
+
+    churn_summary = (
+        f"Based on this report, focus retention on customers whose spend or visit "
+        f"frequency is dropping between periods, especially compared to your top "
+        f"earners like customer {top_customer_id} (who spent Rs{top_customer_revenue:,.0f}). "
+        f"Product {top_product_id} generated the highest revenue (Rs{top_product_revenue:,.0f}), "
+        f"while product {top_qty_product_id} sold the most units ({top_qty:,})."
+    )
+
+    # ------------------------------------------------------------------
+    # Random Forest customer churn modeling (classification)
+    # ------------------------------------------------------------------
+    rf_results = random_forest_churn(result)
+
+    return {
+        "horizon": "Next 6 months" if periodicity == "monthly" else "Next 3 years",
+        "forecastSummary": forecast_summary,
+        "forecast": forecast,
+        "churnSummary": churn_summary,
+        "kpis": {
+            "totalRevenue": total_revenue,
+            "totalQuantity": total_quantity,
+            "uniqueCustomers": unique_customers,
+            "uniqueProducts": unique_products,
+            "avgTransactionValue": avg_transaction_value,
+            "medianTransactionValue": median_transaction_value,
+            "medianTransactionValueExact": bool(result.median_exact),
+        },
+        "topInsights": {
+            "topProductByRevenue": {
+                "productId": top_product_id,
+                "revenue": top_product_revenue,
+            },
+            "topProductByQuantity": {
+                "productId": top_qty_product_id,
+                "quantity": top_qty,
+            },
+            "highestEarningCustomer": {
+                "customerId": top_customer_id,
+                "revenue": top_customer_revenue,
+            },
+            "mostFrequentCustomer": {
+                "customerId": most_freq_customer_id,
+                "visits": most_freq_visits,
+            },
+        },
+        "detailedInsights": {
+            "top5Customers": top_5_customers,
+            "top5Products": top_5_products_rev,
+            "customerSegmentation": {
+                "highSpenders": high_spenders,
+                "mediumSpenders": medium_spenders,
+                "lowSpenders": low_spenders,
+                "highSpenderThreshold": float(high_threshold),
+                "mediumSpenderThreshold": float(medium_threshold),
+            },
+            "purchaseFrequency": {
+                "avgVisitsPerCustomer": avg_visits_per_customer,
+                "medianVisitsPerCustomer": median_visits_per_customer,
+            },
+        },
+        "randomForestModel": rf_results,
+    }
+
+
+def analyze_report(path, periodicity="monthly", progress=None):
+    """
+    Run the full analysis pipeline on a CSV report stored on disk.
+
+    This is the unit of work executed in the backend's worker processes.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the uploaded CSV
+    periodicity : str, default='monthly'
+        Forecast periodicity requested by the dashboard
+    progress : callable, optional
+        Called with the fraction of work done, between 0 and 1
+
+    Returns:
+    --------
+    dict
+        JSON-serialisable response payload
+    """
+    # Parsing dominates the runtime; model training takes the last stretch
+    ingest_progress = (lambda fraction: progress(0.8 * fraction)) if progress else None
+
+    with open(path, "rb") as f:
+        result = aggregate_csv(f, progress=ingest_progress)
+    logger.debug("Aggregated %d rows of columns %s", result.n_rows, result.columns)
+
+    response = build_response(result, periodicity)
+    if progress is not None:
+        progress(1.0)
+    return response
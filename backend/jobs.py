@@ -0,0 +1,206 @@
+"""
+Asynchronous analysis jobs for large uploads.
+
+``POST /api/jobs`` submits a report to the shared analysis worker pool and
+returns a job id straight away; clients poll the job for status and
+progress and fetch the result once it has succeeded. Finished jobs are kept
+for a configurable TTL and then forgotten; at most ``max_finished`` of them
+(with their result payloads) are kept at once, the oldest going first.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from .ingest import CSVParseError, MissingColumnsError
+from .insights import analyze_report
+
+
+class _ProgressReporter:
+    """Picklable callback that publishes a job's progress to the parent."""
+
+    def __init__(self, shared, job_id):
+        self.shared = shared
+        self.job_id = job_id
+
+    def __call__(self, fraction):
+        self.shared[self.job_id] = float(fraction)
+
+
+class Job:
+    """State of one submitted analysis."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.payload = None
+        self.status_code = None
+        self.error = None
+        self.future = None
+
+    def to_dict(self, progress):
+        info = {
+            "jobId": self.id,
+            "status": self.status,
+            "progress": progress,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+            "statusUrl": f"/api/jobs/{self.id}",
+            "resultUrl": f"/api/jobs/{self.id}/result",
+        }
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobManager:
+    """
+    Tracks analysis jobs running on an AnalysisExecutor.
+
+    Parameters:
+    -----------
+    executor : AnalysisExecutor
+        Worker pool shared with /api/predict; its queue bound applies here
+    cache : ResultCache
+        Successful results are stored here as well, keyed like /api/predict
+    ttl : float
+        Seconds a finished job (and its result) stays available
+    max_finished : int, default=256
+        Finished jobs kept at once; beyond this the oldest are forgotten
+        early, so a burst of uploads cannot hold unbounded payloads
+    """
+
+    def __init__(self, executor, cache, ttl, max_finished=256):
+        self.executor = executor
+        self.cache = cache
+        self.ttl = ttl
+        self.max_finished = max_finished
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._manager = None
+        self._progress = None
+
+    def _progress_dict(self):
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+            self._progress = self._manager.dict()
+        return self._progress
+
+    def _register(self):
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        return job
+
+    def create_completed(self, payload):
+        """Record a job whose result was already available (cache hit)."""
+        job = self._register()
+        job.status = "succeeded"
+        job.finished_at = time.time()
+        job.payload = payload
+        job.status_code = 200
+        with self._lock:
+            self._purge_expired()
+        return job
+
+    def submit(self, key, path, periodicity):
+        """
+        Submit ``path`` for analysis and return the new Job.
+
+        Raises QueueFullError when the worker pool is at capacity; the temp
+        file at ``path`` is removed once the job finishes either way.
+        """
+        progress = self._progress_dict()
+        job = self._register()
+        progress[job.id] = 0.0
+        try:
+            job.future = self.executor.submit(
+                analyze_report, path, periodicity, _ProgressReporter(progress, job.id)
+            )
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            progress.pop(job.id, None)
+            raise
+        job.future.add_done_callback(
+            lambda future: self._on_done(job, key, path, future)
+        )
+        return job
+
+    def _on_done(self, job, key, path, future):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+        if future.cancelled():
+            job.status, job.status_code = "failed", 500
+            job.error = {"error": "Job was cancelled"}
+        else:
+            exc = future.exception()
+            if exc is None:
+                job.payload = json.dumps(future.result()).encode("utf-8")
+                job.status, job.status_code = "succeeded", 200
+                self.cache.put(key, job.payload)
+            elif isinstance(exc, MissingColumnsError):
+                job.status, job.status_code = "failed", 400
+                job.error = exc.to_content()
+            elif isinstance(exc, CSVParseError):
+                job.status, job.status_code = "failed", 400
+                job.error = {"error": str(exc)}
+            else:
+                job.status, job.status_code = "failed", 500
+                job.error = {"error": f"Analysis failed: {str(exc)}"}
+
+        job.finished_at = time.time()
+        if self._progress is not None:
+            self._progress.pop(job.id, None)
+        with self._lock:
+            self._purge_expired()
+
+    def get(self, job_id):
+        """Return the Job with ``job_id``, or None if unknown or expired."""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+        if job is not None and job.status == "queued" and job.future is not None:
+            if job.future.running():
+                job.status = "running"
+        return job
+
+    def progress(self, job):
+        """Fraction of the job completed, between 0 and 1."""
+        if job.finished_at is not None:
+            return 1.0
+        if self._progress is None:
+            return 0.0
+        return float(self._progress.get(job.id, 0.0))
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": counts, "ttlSeconds": self.ttl, "maxFinished": self.max_finished}
+
+    def shutdown(self):
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress = None
+
+    def _purge_expired(self):
+        now = time.time()
+        finished = sorted((job.finished_at, job_id) for job_id, job in self._jobs.items()
+                          if job.finished_at is not None)
+        excess = len(finished) - self.max_finished
+        for i, (finished_at, job_id) in enumerate(finished):
+            if i < excess or now - finished_at > self.ttl:
+                del self._jobs[job_id]
@@ -0,0 +1,324 @@
+"""
+Versioned registry of Random Forest churn models.
+
+The churn model's Recency/Frequency/TotalSpent feature schema never changes,
+so instead of training a new forest on every /api/predict call, models are
+trained once (through ``POST /api/models/churn/train`` or the CLI below),
+saved as versioned artifacts on local disk and loaded for inference-only
+scoring. Only the first version may be trained inside a request, when no
+model exists yet; uploads whose feature distribution drifts past a
+threshold are flagged for an explicit retrain.
+
+Usage:
+------
+    python -m backend.model_registry train path/to/report.csv
+    python -m backend.model_registry list
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: bootstrap is serialized within a process only
+    fcntl = None
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+FEATURE_COLS = ["Recency", "Frequency", "TotalSpent"]
+
+# Minimum customers needed to train a model
+MIN_TRAINING_CUSTOMERS = 20
+
+# Population Stability Index above which an upload is flagged as drifted
+DEFAULT_DRIFT_THRESHOLD = 0.25
+
+_DRIFT_BINS = 10
+_PSI_EPS = 1e-4
+
+
+class NotEnoughDataError(ValueError):
+    """Raised when a feature table cannot support training a model."""
+
+
+def can_train(customer_features):
+    """Whether the churn label varies enough to train a reliable model."""
+    return (customer_features["Churned"].nunique() > 1
+            and len(customer_features) >= MIN_TRAINING_CUSTOMERS)
+
+
+def _reference_bins(values):
+    """Quantile bin edges and expected bin fractions for one feature."""
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, _DRIFT_BINS + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side="right"),
+                         minlength=len(edges) + 1)
+    return edges.tolist(), (counts / counts.sum()).tolist()
+
+
+def population_stability(edges, expected, values):
+    """Population Stability Index of ``values`` against reference bins."""
+    counts = np.bincount(np.searchsorted(edges, values, side="right"),
+                         minlength=len(edges) + 1)
+    actual = np.maximum(counts / max(counts.sum(), 1), _PSI_EPS)
+    expected = np.maximum(np.asarray(expected), _PSI_EPS)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class ChurnModel:
+    """A loaded model version together with its metadata."""
+
+    def __init__(self, version, estimator, metadata):
+        self.version = version
+        self.estimator = estimator
+        self.metadata = metadata
+
+    def predict_proba(self, customer_features):
+        return self.estimator.predict_proba(customer_features[FEATURE_COLS])[:, 1]
+
+    def drift(self, customer_features):
+        """Per-feature PSI of ``customer_features`` against the training data."""
+        reference = self.metadata["reference"]
+        return {
+            col: population_stability(
+                reference[col]["edges"], reference[col]["expected"],
+                customer_features[col].to_numpy(dtype="float64"),
+            )
+            for col in FEATURE_COLS
+        }
+
+
+class ChurnModelRegistry:
+    """
+    Local-disk registry of versioned churn models.
+
+    Each version ``N`` is stored as ``churn-vNNNN.joblib`` plus a
+    ``churn-vNNNN.json`` metadata file; ``LATEST`` names the active version.
+    Loaded models are cached per process and reloaded when ``LATEST`` moves,
+    so every API worker picks up a newly trained version.
+
+    Parameters:
+    -----------
+    model_dir : str or Path
+        Directory holding the artifacts
+    drift_threshold : float, default=DEFAULT_DRIFT_THRESHOLD
+        PSI above which an upload is flagged as drifted
+    """
+
+    def __init__(self, model_dir, drift_threshold=DEFAULT_DRIFT_THRESHOLD):
+        self.model_dir = Path(model_dir)
+        self.drift_threshold = drift_threshold
+        self._loaded = None
+        self._lock = threading.Lock()
+        self._bootstrap_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            model_dir=os.environ.get(
+                "RETAIL_MODEL_DIR", str(Path(__file__).resolve().parent / "models")
+            ),
+            drift_threshold=float(
+                os.environ.get("RETAIL_DRIFT_THRESHOLD", str(DEFAULT_DRIFT_THRESHOLD))
+            ),
+        )
+
+    def _artifact(self, version, suffix):
+        return self.model_dir / f"churn-v{version:04d}{suffix}"
+
+    def latest_version(self):
+        """Active version number, or None if nothing has been trained yet."""
+        try:
+            return int((self.model_dir / "LATEST").read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def versions(self):
+        """Metadata of every stored version, oldest first."""
+        found = []
+        for path in sorted(self.model_dir.glob("churn-v*.json")):
+            try:
+                found.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def latest(self):
+        """Return the active ChurnModel, loading it if needed, or None."""
+        version = self.latest_version()
+        if version is None:
+            return None
+        with self._lock:
+            if self._loaded is None or self._loaded.version != version:
+                estimator = joblib.load(self._artifact(version, ".joblib"))
+                metadata = json.loads(self._artifact(version, ".json").read_text())
+                self._loaded = ChurnModel(version, estimator, metadata)
+            return self._loaded
+
+    def train(self, customer_features, reason="explicit"):
+        """
+        Train, evaluate and register a new model version.
+
+        Parameters:
+        -----------
+        customer_features : pd.DataFrame
+            Output of ``insights.customer_features_frame``
+        reason : str, default='explicit'
+            Why the model was trained, recorded in its metadata
+
+        Returns:
+        --------
+        ChurnModel
+            The newly registered (and now active) version
+        """
+        if not can_train(customer_features):
+            raise NotEnoughDataError(
+                "Not enough variation in churn behaviour to train a reliable "
+                "Random Forest model."
+            )
+
+        X = customer_features[FEATURE_COLS]
+        y = customer_features["Churned"]
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, random_state=42, stratify=y
+        )
+
+        rf = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=None,
+            random_state=42,
+            class_weight="balanced_subsample",
+        )
+        rf.fit(X_train, y_train)
+
+        y_proba = rf.predict_proba(X_test)[:, 1]
+        try:
+            roc_auc = float(roc_auc_score(y_test, y_proba))
+        except ValueError:
+            roc_auc = None
+
+        metadata = {
+            "trainedAt": time.time(),
+            "reason": reason,
+            "nCustomers": int(len(customer_features)),
+            "accuracy": float(accuracy_score(y_test, rf.predict(X_test))),
+            "rocAuc": roc_auc,
+            "featureImportances": {
+                col: float(imp) for col, imp in zip(FEATURE_COLS, rf.feature_importances_)
+            },
+            "reference": {},
+        }
+        for col in FEATURE_COLS:
+            edges, expected = _reference_bins(X_train[col].to_numpy(dtype="float64"))
+            metadata["reference"][col] = {"edges": edges, "expected": expected}
+
+        return self._register(rf, metadata)
+
+    def bootstrap(self, customer_features):
+        """
+        Train the first version, unless another worker already has.
+
+        Requests run in several worker processes, so the check and the
+        training happen under an exclusive lock on the model directory;
+        concurrent first uploads then register one version 1 between them.
+
+        Returns:
+        --------
+        tuple
+            (model, trained): the active ChurnModel and whether this call
+            trained it
+        """
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        with self._bootstrap_lock, open(self.model_dir / ".bootstrap.lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            model = self.latest()
+            if model is not None:
+                return model, False
+            return self.train(customer_features, reason="bootstrap"), True
+
+    def _register(self, estimator, metadata):
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+        # Claim the next free version atomically; concurrent workers may train too
+        version = (self.latest_version() or 0) + 1
+        while True:
+            try:
+                fd = os.open(self._artifact(version, ".json"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                version += 1
+        metadata = {"version": version, **metadata}
+
+        tmp_model = self._artifact(version, ".joblib.tmp")
+        joblib.dump(estimator, tmp_model)
+        os.replace(tmp_model, self._artifact(version, ".joblib"))
+        with os.fdopen(fd, "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        tmp_latest = self.model_dir / f"LATEST.{version}.tmp"
+        tmp_latest.write_text(str(version))
+        os.replace(tmp_latest, self.model_dir / "LATEST")
+
+        model = ChurnModel(version, estimator, metadata)
+        with self._lock:
+            self._loaded = model
+        return model
+
+
+registry = ChurnModelRegistry.from_env()
+
+
+def train_report(path):
+    """
+    Train and register a churn model from a CSV report on disk.
+
+    Runs in the backend's worker processes for the training endpoint.
+
+    Returns:
+    --------
+    dict
+        Metadata of the new version (without the drift reference bins)
+    """
+    from .ingest import aggregate_csv
+    from .insights import customer_features_frame
+
+    with open(path, "rb") as f:
+        result = aggregate_csv(f)
+    model = registry.train(customer_features_frame(result))
+    return summarize(model.metadata)
+
+
+def summarize(metadata):
+    """Model metadata without the bulky drift reference."""
+    return {k: v for k, v in metadata.items() if k != "reference"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the churn model registry.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_cmd = sub.add_parser("train", help="Train a new model version from a CSV report")
+    train_cmd.add_argument("csv_path")
+    sub.add_parser("list", help="List stored model versions")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        print(json.dumps(train_report(args.csv_path), indent=2))
+    else:
+        latest = registry.latest_version()
+        for metadata in registry.versions():
+            marker = "*" if metadata["version"] == latest else " "
+            print(f"{marker} v{metadata['version']:04d}  accuracy={metadata['accuracy']:.3f}  "
+                  f"customers={metadata['nCustomers']}  reason={metadata['reason']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Compact, queryable index of association rules.
+
+Rules from ``generate_rules`` (or the exported
+``data/processed/top_association_rules.csv``, whose itemsets are
+``frozenset({...})`` strings) are compiled once into flat NumPy arrays:
+
+- item names are interned to integer ids,
+- rules are sorted by lift (descending), so rule ids are lift ranks,
+- antecedents and consequents are CSR-style ``indptr``/``items`` arrays,
+- each item has a posting list of the rules whose antecedent contains it.
+
+A basket query only touches the posting lists of its own items, so it runs
+in microseconds regardless of how many rules are indexed. Indexes are saved
+in a small binary format (a JSON header followed by the raw arrays) and
+loaded without any parsing. Indexes compiled from a CSV record its size,
+mtime and SHA-256 (``source``), so a server can tell when the CSV has been
+regenerated since (``is_current``).
+
+Usage:
+------
+    python -m backend.rule_index build data/processed/top_association_rules.csv backend/models/rules.idx
+    python -m backend.rule_index query backend/models/rules.idx "ALARM CLOCK BAKELIKE PINK"
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+_MAGIC = b"RULEIDX1"
+_ALIGN = 8
+
+# Array name -> dtype of every array stored in an index file
+_ARRAYS = {
+    "lift": np.float64,
+    "confidence": np.float64,
+    "support": np.float64,
+    "antecedent_len": np.int32,
+    "antecedent_indptr": np.int64,
+    "antecedent_items": np.int32,
+    "consequent_indptr": np.int64,
+    "consequent_items": np.int32,
+    "posting_indptr": np.int64,
+    "posting_rules": np.int32,
+}
+
+
+def _parse_itemset(value):
+    """Items of a rule side: a frozenset, or its ``frozenset({...})`` string."""
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("frozenset(") and text.endswith(")"):
+            text = text[len("frozenset("):-1]
+        if not text:
+            return []
+        return sorted(str(item) for item in ast.literal_eval(text))
+    return sorted(str(item) for item in value)
+
+
+def _source_state(path, with_hash=True):
+    """Size, mtime and (optionally) SHA-256 of a rules CSV."""
+    stat = os.stat(path)
+    state = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        state["sha256"] = digest.hexdigest()
+    return state
+
+
+def _csr(rows, dtype=np.int32):
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    items = np.fromiter((i for row in rows for i in row), dtype=dtype, count=indptr[-1])
+    return indptr, items
+
+
+class RuleIndex:
+    """
+    Association rules compiled for fast basket lookups.
+
+    Build one with ``RuleIndex.from_rules`` or ``RuleIndex.from_csv``; save
+    and load it with ``save``/``load``.
+    """
+
+    def __init__(self, items, arrays, source=None):
+        self.items = list(items)
+        self.item_ids = {item: i for i, item in enumerate(self.items)}
+        # Size, mtime and SHA-256 of the CSV compiled, if built from one
+        self.source = source
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.lift)
+
+    @classmethod
+    def from_rules(cls, rules):
+        """
+        Compile a rules DataFrame with 'antecedents', 'consequents',
+        'support', 'confidence' and 'lift' columns.
+        """
+        antecedents = [_parse_itemset(v) for v in rules["antecedents"]]
+        consequents = [_parse_itemset(v) for v in rules["consequents"]]
+        lift = rules["lift"].to_numpy(dtype=np.float64)
+
+        # Rule ids are lift ranks; ties keep their original order
+        order = np.argsort(-lift, kind="mergesort")
+        antecedents = [antecedents[i] for i in order]
+        consequents = [consequents[i] for i in order]
+
+        items = sorted({item for side in (antecedents, consequents) for s in side for item in s})
+        item_ids = {item: i for i, item in enumerate(items)}
+        antecedent_ids = [[item_ids[item] for item in s] for s in antecedents]
+        consequent_ids = [[item_ids[item] for item in s] for s in consequents]
+
+        arrays = {
+            "lift": lift[order],
+            "confidence": rules["confidence"].to_numpy(dtype=np.float64)[order],
+            "support": rules["support"].to_numpy(dtype=np.float64)[order],
+            "antecedent_len": np.array([len(s) for s in antecedent_ids], dtype=np.int32),
+        }
+        arrays["antecedent_indptr"], arrays["antecedent_items"] = _csr(antecedent_ids)
+        arrays["consequent_indptr"], arrays["consequent_items"] = _csr(consequent_ids)
+
+        # Posting lists: rules (in lift order) whose antecedent holds each item
+        rule_of_entry = np.repeat(np.arange(len(order), dtype=np.int32),
+                                  arrays["antecedent_len"])
+        by_item = np.argsort(arrays["antecedent_items"], kind="mergesort")
+        arrays["posting_rules"] = rule_of_entry[by_item]
+        arrays["posting_indptr"] = np.zeros(len(items) + 1, dtype=np.int64)
+        arrays["posting_indptr"][1:] = np.cumsum(
+            np.bincount(arrays["antecedent_items"], minlength=len(items))
+        )
+        return cls(items, arrays)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Compile the rules exported by the association analysis notebook."""
+        import pandas as pd
+
+        source = _source_state(path)
+        index = cls.from_rules(pd.read_csv(path))
+        index.source = source
+        return index
+
+    def is_current(self, csv_path):
+        """
+        Whether this index was compiled from the current contents of a CSV.
+
+        Size and mtime are compared first; the CSV is only hashed when they
+        differ, so a touched but unchanged file still counts as current.
+        """
+        if self.source is None:
+            return False
+        state = _source_state(csv_path, with_hash=False)
+        if all(self.source.get(k) == v for k, v in state.items()):
+            return True
+        return _source_state(csv_path)["sha256"] == self.source.get("sha256")
+
+    def save(self, path):
+        """Write the index in its binary format."""
+        header = {"items": self.items, "source": self.source, "arrays": {}}
+        blobs, offset = [], 0
+        for name, dtype in _ARRAYS.items():
+            data = np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+            padding = -len(data) % _ALIGN
+            header["arrays"][name] = [offset, len(data) // np.dtype(dtype).itemsize]
+            blobs.append(data + b"\0" * padding)
+            offset += len(data) + padding
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_bytes += b" " * (-(len(_MAGIC) + 8 + len(header_bytes)) % _ALIGN)
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for blob in blobs:
+                f.write(blob)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by ``save``."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a rule index file: {path}")
+        (header_len,) = struct.unpack_from("<Q", data, len(_MAGIC))
+        start = len(_MAGIC) + 8
+        header = json.loads(data[start:start + header_len])
+        body = start + header_len
+
+        arrays = {
+            name: np.frombuffer(data, dtype=dtype, count=header["arrays"][name][1],
+                                offset=body + header["arrays"][name][0])
+            for name, dtype in _ARRAYS.items()
+        }
+        return cls(header["items"], arrays, source=header.get("source"))
+
+    def matching_rules(self, basket_ids):
+        """Ids (lift order) of the rules whose whole antecedent is in the basket."""
+        postings = [self.posting_rules[self.posting_indptr[i]:self.posting_indptr[i + 1]]
+                    for i in basket_ids]
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+        hits = np.sort(np.concatenate(postings))
+        if len(hits) == 0:
+            return hits
+
+        # A rule matches once it has been hit by every item of its antecedent
+        starts = np.flatnonzero(np.r_[True, hits[1:] != hits[:-1]])
+        counts = np.diff(np.r_[starts, len(hits)])
+        rule_ids = hits[starts]
+        return rule_ids[counts == self.antecedent_len[rule_ids]]
+
+    def recommend(self, basket, k=5):
+        """
+        Top-``k`` consequent items for a basket, ranked by rule lift.
+
+        Each item is scored by the highest-lift rule that recommends it;
+        items already in the basket and unknown basket items are skipped.
+
+        Parameters:
+        -----------
+        basket : iterable of str
+            Item descriptions currently in the basket
+        k : int, default=5
+            Number of recommendations
+
+        Returns:
+        --------
+        list of dict
+            ``item``, ``lift``, ``confidence``, ``support`` and the
+            ``antecedents`` of the rule that produced each recommendation
+        """
+        basket_ids = {self.item_ids[item] for item in basket if item in self.item_ids}
+        recommendations, seen = [], set(basket_ids)
+        for rule in self.matching_rules(sorted(basket_ids)):
+            for item in self.consequent_items[self.consequent_indptr[rule]:
+                                              self.consequent_indptr[rule + 1]]:
+                if item in seen:
+                    continue
+                seen.add(item)
+                recommendations.append({
+                    "item": self.items[item],
+                    "lift": float(self.lift[rule]),
+                    "confidence": float(self.confidence[rule]),
+                    "support": float(self.support[rule]),
+                    "antecedents": [
+                        self.items[i] for i in self.antecedent_items[
+                            self.antecedent_indptr[rule]:self.antecedent_indptr[rule + 1]]
+                    ],
+                })
+                if len(recommendations) >= k:
+                    return recommendations
+        return recommendations
+
+    def stats(self):
+        return {"rules": len(self), "items": len(self.items)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query association rule indexes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Compile a rules CSV into an index file")
+    build_cmd.add_argument("csv_path")
+    build_cmd.add_argument("index_path")
+    query_cmd = sub.add_parser("query", help="Recommend items for a basket")
+    query_cmd.add_argument("index_path")
+    query_cmd.add_argument("items", nargs="+")
+    query_cmd.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = RuleIndex.from_csv(args.csv_path)
+        index.save(args.index_path)
+        print(f"Indexed {len(index)} rules over {len(index.items)} items -> {args.index_path}")
+    else:
+        index = RuleIndex.load(args.index_path)
+        print(json.dumps(index.recommend(args.items, k=args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
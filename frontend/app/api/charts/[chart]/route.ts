@@ -0,0 +1,24 @@
+import { NextRequest, NextResponse } from "next/server";
+
+const BACKEND_URL = "http://localhost:8000";
+
+export async function GET(req: NextRequest, { params }: { params: { chart: string } }) {
+  try {
+    // The backend reduces the data to the requested point budget
+    const query = req.nextUrl.searchParams.toString();
+    const res = await fetch(
+      `${BACKEND_URL}/api/charts/${encodeURIComponent(params.chart)}${query ? `?${query}` : ""}`
+    );
+
+    if (!res.ok) {
+      const text = await res.text();
+      console.error("Backend error:", text);
+      return new NextResponse(text || "Backend chart data failed", { status: res.status });
+    }
+
+    return NextResponse.json(await res.json());
+  } catch (err) {
+    console.error(err);
+    return new NextResponse("Failed to load chart data", { status: 500 });
+  }
+}
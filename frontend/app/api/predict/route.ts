@@ -1,5 +1,11 @@
 import { NextRequest, NextResponse } from "next/server";
 
+const BACKEND_URL = "http://localhost:8000";
+const POLL_INTERVAL_MS = 1000;
+const MAX_WAIT_MS = 15 * 60 * 1000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export async function POST(req: NextRequest) {
   try {
     const formData = await req.formData();
@@ -10,24 +16,45 @@ export async function POST(req: NextRequest) {
       return new NextResponse("CSV file is required", { status: 400 });
     }
 
-    // Forward the request to the Python FastAPI backend
-    const backendRes = await fetch("http://localhost:8000/api/predict", {
+    // Submit the analysis as a background job on the Python FastAPI backend
+    const submitRes = await fetch(`${BACKEND_URL}/api/jobs`, {
       method: "POST",
       body: formData
     });
 
-    if (!backendRes.ok) {
-      const text = await backendRes.text();
+    if (!submitRes.ok) {
+      const text = await submitRes.text();
       console.error("Backend error:", text);
-      return new NextResponse("Backend prediction failed", { status: 502 });
+      return new NextResponse("Backend prediction failed", {
+        status: submitRes.status === 503 ? 503 : 502
+      });
+    }
+
+    const { jobId } = await submitRes.json();
+
+    // Poll with short requests instead of holding one long backend request
+    const deadline = Date.now() + MAX_WAIT_MS;
+    while (Date.now() < deadline) {
+      const resultRes = await fetch(`${BACKEND_URL}/api/jobs/${jobId}/result`);
+
+      if (resultRes.status === 202) {
+        await sleep(POLL_INTERVAL_MS);
+        continue;
+      }
+
+      if (!resultRes.ok) {
+        const text = await resultRes.text();
+        console.error(`Backend error (periodicity=${periodicity}):`, text);
+        return new NextResponse("Backend prediction failed", { status: 502 });
+      }
+
+      const data = await resultRes.json();
+      return NextResponse.json(data);
     }
 
-    const data = await backendRes.json();
-    return NextResponse.json(data);
+    return new NextResponse("Backend prediction timed out", { status: 504 });
   } catch (err) {
     console.error(err);
     return new NextResponse("Failed to generate prediction", { status: 500 });
   }
 }
-
-
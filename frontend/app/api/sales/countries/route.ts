@@ -0,0 +1,22 @@
+import { NextRequest, NextResponse } from "next/server";
+
+const BACKEND_URL = "http://localhost:8000";
+
+export async function GET(req: NextRequest) {
+  try {
+    // Pass period/country straight through; the backend serves a cached rollup
+    const params = req.nextUrl.searchParams.toString();
+    const res = await fetch(`${BACKEND_URL}/api/sales/countries${params ? `?${params}` : ""}`);
+
+    if (!res.ok) {
+      const text = await res.text();
+      console.error("Backend error:", text);
+      return new NextResponse(text || "Backend country sales failed", { status: res.status });
+    }
+
+    return NextResponse.json(await res.json());
+  } catch (err) {
+    console.error(err);
+    return new NextResponse("Failed to load country sales", { status: 500 });
+  }
+}
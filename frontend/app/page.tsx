@@ -21,6 +21,12 @@ import {
 type PredictionResponse = {
   horizon: string;
   forecastSummary: string;
+  forecast?: {
+    periodicity: "monthly" | "yearly";
+    model: string;
+    history: Array<{ period: string; revenue: number }>;
+    points: Array<{ period: string; revenue: number }>;
+  } | null;
   churnSummary: string;
   kpis?: {
     totalRevenue: number;
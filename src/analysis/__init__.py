@@ -3,14 +3,30 @@ Analysis modules for retail data mining.
 """
 
 from .association_rules import generate_rules, visualize_rules
-from .temporal_analysis import analyze_hourly, analyze_daily, analyze_monthly
-from .customer_segmentation import calculate_rfm, perform_clustering
+from .temporal_analysis import (
+    analyze_hourly, analyze_daily, analyze_monthly, analyze_quarterly, analyze_seasonal
+)
+from .temporal_cube import TemporalCube
+from .temporal_store import TemporalStore
+from .sales_rollup import country_sales, load_country_sales
+from .customer_segmentation import (
+    calculate_rfm, perform_clustering, fit_minibatch_stream, select_n_clusters,
+    load_customer_segments, ClusteringModel
+)
+from .rfm_store import RFMStore
 from .predictive_models import train_sales_forecast, predict_customer_churn
+from .batch_forecasting import forecast_series_batch
+from .backtesting import backtest
 
 __all__ = [
     'generate_rules', 'visualize_rules',
-    'analyze_hourly', 'analyze_daily', 'analyze_monthly',
-    'calculate_rfm', 'perform_clustering',
-    'train_sales_forecast', 'predict_customer_churn'
+    'analyze_hourly', 'analyze_daily', 'analyze_monthly', 'analyze_quarterly',
+    'analyze_seasonal', 'TemporalCube', 'TemporalStore',
+    'country_sales', 'load_country_sales',
+    'calculate_rfm', 'perform_clustering', 'fit_minibatch_stream', 'select_n_clusters',
+    'load_customer_segments', 'ClusteringModel',
+    'RFMStore',
+    'train_sales_forecast', 'predict_customer_churn', 'forecast_series_batch',
+    'backtest'
 ]
 
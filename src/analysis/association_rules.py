@@ -4,13 +4,59 @@ Module for association rule mining and market basket analysis.
 
 import pandas as pd
 import numpy as np
-from mlxtend.frequent_patterns import apriori, association_rules
+from scipy import sparse
+from mlxtend.frequent_patterns import association_rules
 from mlxtend.preprocessing import TransactionEncoder
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from .frequent_itemsets import mine_frequent_itemsets, son_mine
 
-def generate_rules(df, min_support=0.01, min_confidence=0.3):
+
+def encode_baskets(df):
+    """
+    One-hot encode invoices into a sparse boolean basket matrix.
+
+    Invoice and description keys are factorized once and quantities are
+    summed per (invoice, description) pair directly in a scipy sparse
+    matrix, so no dense invoice x description table is ever materialised.
+    An item is in a basket when its summed quantity is positive, matching
+    the dense ``groupby(...).unstack()`` encoding.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Transaction dataset with InvoiceNo, Description and Quantity columns
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Sparse boolean DataFrame (invoices x descriptions), both axes sorted
+    """
+    valid = df['InvoiceNo'].notna() & df['Description'].notna()
+    invoice_codes, invoices = pd.factorize(df.loc[valid, 'InvoiceNo'], sort=True)
+    item_codes, items = pd.factorize(df.loc[valid, 'Description'], sort=True)
+    quantity = np.nan_to_num(df.loc[valid, 'Quantity'].to_numpy(dtype='float64'))
+    
+    # Duplicate (invoice, item) pairs are summed when converting to CSR
+    totals = sparse.coo_matrix(
+        (quantity, (invoice_codes, item_codes)),
+        shape=(len(invoices), len(items))
+    ).tocsr()
+    baskets = sparse.csr_matrix(
+        (totals.data > 0, totals.indices, totals.indptr), shape=totals.shape
+    )
+    baskets.eliminate_zeros()
+    
+    return pd.DataFrame.sparse.from_spmatrix(
+        baskets,
+        index=pd.Index(invoices, name='InvoiceNo'),
+        columns=pd.Index(items, name='Description')
+    )
+
+
+def generate_rules(df, min_support=0.01, min_confidence=0.3, engine='apriori',
+                   max_len=None, memory_budget=None, n_jobs=None):
     """
     Generate association rules from transaction data.
     
@@ -22,31 +68,52 @@ def generate_rules(df, min_support=0.01, min_confidence=0.3):
         Minimum support threshold
     min_confidence : float, default=0.3
         Minimum confidence threshold
+    engine : str, default='apriori'
+        Frequent itemset engine ('apriori', 'fpgrowth' or 'eclat'). All
+        engines produce identical rules; 'eclat' and 'fpgrowth' scale to
+        much lower supports.
+    max_len : int, optional
+        Maximum itemset length
+    memory_budget : int, optional
+        Memory budget in bytes for the mining engine
+    n_jobs : int, optional
+        Mine invoice partitions in this many processes (SON algorithm),
+        -1 for all cores. None or 1 mines serially; results are identical.
         
     Returns:
     --------
     pd.DataFrame
         Association rules with metrics
     """
-    # Prepare basket data
-    basket = df.groupby(['InvoiceNo', 'Description'])['Quantity'].sum().unstack().reset_index().fillna(0).set_index('InvoiceNo')
-    
-    # Convert to binary
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
+    # Prepare sparse binary basket data
+    basket_sets = encode_baskets(df)
     
     # Generate frequent itemsets
-    frequent_itemsets = apriori(basket_sets, min_support=min_support, use_colnames=True)
+    if n_jobs is None or n_jobs == 1:
+        frequent_itemsets = mine_frequent_itemsets(
+            basket_sets, min_support=min_support, engine=engine,
+            max_len=max_len, memory_budget=memory_budget
+        )
+    else:
+        frequent_itemsets = son_mine(
+            basket_sets, min_support=min_support, engine=engine,
+            max_len=max_len, memory_budget=memory_budget, n_jobs=n_jobs
+        )
     
     # Generate rules
     rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
     
-    # Sort by lift
-    rules = rules.sort_values('lift', ascending=False)
+    # Sort by lift; ties by antecedent then consequent items, so the order
+    # (and rules.head(top_n)) is the same for every engine
+    antecedents = rules['antecedents'].map(lambda items: ', '.join(sorted(map(str, items))))
+    consequents = rules['consequents'].map(lambda items: ', '.join(sorted(map(str, items))))
+    order = np.lexsort((consequents.to_numpy(), antecedents.to_numpy(), -rules['lift'].to_numpy()))
+    rules = rules.iloc[order]
     
     return rules
 
 
-def visualize_rules(rules, top_n=10):
+def visualize_rules(rules, top_n=10, fig=None):
     """
     Visualize association rules.
     
@@ -56,10 +123,20 @@ def visualize_rules(rules, top_n=10):
         Association rules
     top_n : int, default=10
         Number of top rules to visualize
+    fig : matplotlib.figure.Figure, optional
+        Empty figure to draw into, e.g. a ``Figure()`` outside pyplot for
+        headless rendering; a new pyplot figure if None
+        
+    Returns:
+    --------
+    matplotlib.figure.Figure
+        Plot figure
     """
     top_rules = rules.head(top_n)
     
-    fig, axes = plt.subplots(1, 2, figsize=(15, 5))
+    if fig is None:
+        fig = plt.figure(figsize=(15, 5))
+    axes = fig.subplots(1, 2)
     
     # Scatter plot: Support vs Confidence
     axes[0].scatter(top_rules['support'], top_rules['confidence'], 
@@ -76,6 +153,6 @@ def visualize_rules(rules, top_n=10):
     axes[1].set_xlabel('Lift')
     axes[1].set_title('Top Rules by Lift')
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
@@ -0,0 +1,265 @@
+"""
+Module for forecasting many sales series at once.
+
+``forecast_series_batch`` takes a long-format frame (one row per series key
+and date) and fits one model per series -- e.g. every country x product
+category -- in a process pool. Each fit has its own timeout and a failing
+series is recorded instead of aborting the batch. Finished series are
+appended to a checkpoint file so an interrupted run resumes where it
+stopped.
+"""
+
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from .predictive_models import _fit_and_forecast, _forecast_metrics
+
+
+class SeriesTimeoutError(TimeoutError):
+    """Raised inside a worker when one series takes longer than its timeout."""
+
+
+def _raise_timeout(signum, frame):
+    raise SeriesTimeoutError("Series fit timed out")
+
+
+def _series_frequency(dates):
+    """Pandas frequency of a date index, falling back to its median spacing."""
+    freq = pd.infer_freq(dates) if len(dates) >= 3 else None
+    if freq is None:
+        freq = pd.to_timedelta(np.median(np.diff(dates.values))) if len(dates) > 1 else 'D'
+    return freq
+
+
+def _forecast_one(key, dates, values, model_type, test_size, horizon, timeout):
+    """
+    Evaluate and forecast one series; runs in a worker process.
+
+    Never raises: failures and timeouts are returned as a record so the
+    rest of the batch is unaffected.
+    """
+    start = time.perf_counter()
+    record = {'key': list(key), 'status': 'ok', 'error': None, 'metrics': {}, 'forecast': []}
+
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        dates = pd.DatetimeIndex(dates)
+        series = pd.DataFrame({'TotalValue': values}, index=dates)
+
+        # Hold-out evaluation, exactly as train_sales_forecast does it
+        train_size = int(len(series) * (1 - test_size))
+        train, test = series[:train_size], series[train_size:]
+        if len(train) == 0 or len(test) == 0:
+            raise ValueError(f"Series with {len(series)} observations is too short to evaluate")
+        _, predictions = _fit_and_forecast(train, model_type, steps=len(test))
+        predictions = np.asarray(predictions, dtype=np.float64)
+        record['metrics'] = {k: float(v) for k, v in
+                             _forecast_metrics(test['TotalValue'], predictions).items()}
+        record['forecast'] = [
+            {'date': d.isoformat(), 'split': 'test', 'actual': float(a), 'forecast': float(p)}
+            for d, a, p in zip(test.index, test['TotalValue'], predictions)
+        ]
+
+        # Forecast beyond the data with a model refitted on the full series
+        if horizon:
+            _, future = _fit_and_forecast(series, model_type, steps=horizon)
+            future_dates = pd.date_range(dates[-1], periods=horizon + 1,
+                                         freq=_series_frequency(dates))[1:]
+            record['forecast'] += [
+                {'date': d.isoformat(), 'split': 'future', 'actual': None, 'forecast': float(p)}
+                for d, p in zip(future_dates, np.asarray(future, dtype=np.float64))
+            ]
+    except SeriesTimeoutError:
+        record.update(status='timeout', error=f"No result within {timeout:g}s",
+                      metrics={}, forecast=[])
+    except Exception as e:
+        record.update(status='failed', error=f"{type(e).__name__}: {e}", metrics={}, forecast=[])
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    record['n_obs'] = int(len(values))
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def _key_tuple(key):
+    """Series key as a tuple of plain Python values, as stored in checkpoints."""
+    key = key if isinstance(key, tuple) else (key,)
+    return tuple(k.item() if isinstance(k, np.generic) else k for k in key)
+
+
+def _load_checkpoint(path, config):
+    """
+    Records of the series a previous run completed successfully.
+
+    Every record carries the configuration of the run that wrote it; a
+    checkpoint from a different configuration raises ValueError rather than
+    being resumed, since its results would be reported under the wrong model.
+    """
+    done = {}
+    if path is None or not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if record.get('config') != config:
+                raise ValueError(
+                    f"Checkpoint {path} was written with {record.get('config')}, "
+                    f"not {config}; use another checkpoint_path for this run"
+                )
+            if record.get('status') == 'ok':
+                done[tuple(record['key'])] = record
+    return done
+
+
+def _print_progress(done, total, record):
+    print(f"\r[{done}/{total}] {record['status']:<7} {tuple(record['key'])}", end='',
+          flush=True)
+    if done == total:
+        print()
+
+
+def _to_frames(records, key_cols):
+    """Tidy forecast table and per-series metrics table from worker records."""
+    forecast_rows, metric_rows = [], []
+    for record in records:
+        key = dict(zip(key_cols, record['key']))
+        for row in record['forecast']:
+            forecast_rows.append({**key, **row})
+        metric_rows.append({**key, 'status': record['status'], 'error': record['error'],
+                            'n_obs': record['n_obs'], 'seconds': record['seconds'],
+                            **record['metrics']})
+
+    forecasts = pd.DataFrame(forecast_rows,
+                             columns=key_cols + ['date', 'split', 'actual', 'forecast'])
+    forecasts['date'] = pd.to_datetime(forecasts['date'])
+    metrics = pd.DataFrame(metric_rows)
+    for col in ['RMSE', 'MAE', 'R2']:
+        if col not in metrics:
+            metrics[col] = np.nan
+    return forecasts, metrics
+
+
+def forecast_series_batch(df, series_key, date_col='Date', value_col='TotalValue',
+                          model_type='arima', test_size=0.2, horizon=0,
+                          n_jobs=None, timeout=60, checkpoint_path=None, progress=True):
+    """
+    Fit and evaluate one forecasting model per series, in parallel.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Long-format data: series key column(s), a date column and a value
+        column. Multiple rows per series and date are summed.
+    series_key : str or list of str
+        Column(s) identifying a series, e.g. ['Country', 'Category']
+    date_col : str, default='Date'
+        Date column
+    value_col : str, default='TotalValue'
+        Value to forecast
+    model_type : str, default='arima'
+        Model type, as in train_sales_forecast
+    test_size : float, default=0.2
+        Proportion of each series held out for the metrics
+    horizon : int, default=0
+        Periods to forecast past the end of each series (refitting on the
+        full series); 0 only evaluates the hold-out
+    n_jobs : int, optional
+        Worker processes; defaults to the number of CPUs
+    timeout : float, default=60
+        Seconds allowed per series (enforced with SIGALRM where available);
+        None disables it
+    checkpoint_path : str, optional
+        JSON-lines file that completed series are appended to. Series
+        already completed there are skipped, so re-running after a crash
+        resumes the batch. A checkpoint written with a different series key,
+        columns, model_type, test_size or horizon raises ValueError.
+    progress : bool or callable, default=True
+        Print progress, or call ``progress(done, total, record)``
+
+    Returns:
+    --------
+    tuple
+        (forecasts, metrics): a tidy table with one row per series and date
+        (split 'test' or 'future', actual, forecast), and one row per series
+        with status, error, RMSE, MAE, R2, n_obs and seconds
+    """
+    key_cols = [series_key] if isinstance(series_key, str) else list(series_key)
+    if progress is True:
+        progress = _print_progress
+
+    daily = (df.groupby(key_cols + [date_col], observed=True)[value_col].sum()
+               .reset_index().sort_values(key_cols + [date_col], kind='mergesort'))
+    groups = {_key_tuple(key): group
+              for key, group in daily.groupby(key_cols, sort=True, observed=True)}
+
+    # Everything that changes a series' result; stored in each checkpoint record
+    config = {'series_key': key_cols, 'date_col': date_col, 'value_col': value_col,
+              'model_type': model_type, 'test_size': test_size, 'horizon': horizon}
+    done = _load_checkpoint(checkpoint_path, config)
+    records = [done[key] for key in groups if key in done]
+    pending = [key for key in groups if key not in done]
+    total, finished = len(groups), len(records)
+
+    def submit(pool, key):
+        return pool.submit(_forecast_one, key,
+                           pd.to_datetime(groups[key][date_col]).to_numpy(),
+                           groups[key][value_col].to_numpy(dtype=np.float64),
+                           model_type, test_size, horizon, timeout)
+
+    def finish(record):
+        nonlocal finished
+        records.append(record)
+        finished += 1
+        if checkpoint is not None:
+            checkpoint.write(json.dumps({**record, 'config': config}) + '\n')
+            checkpoint.flush()
+        if progress:
+            progress(finished, total, record)
+
+    checkpoint = open(checkpoint_path, 'a') if checkpoint_path else None
+    try:
+        crashed = []
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = {submit(pool, key): key for key in pending}
+            for future in as_completed(futures):
+                try:
+                    finish(future.result())
+                except BrokenProcessPool:
+                    crashed.append(futures[future])
+
+        # A dead worker (e.g. out of memory) breaks the pool and fails every
+        # series still in it. Retry those one at a time in a fresh worker, so
+        # only a series that itself kills its worker is recorded as failed;
+        # like any failure it is checkpointed and retried on resume.
+        for key in sorted(crashed, key=list(groups).index):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    record = submit(pool, key).result()
+                except BrokenProcessPool as e:
+                    record = {'key': list(key), 'status': 'failed',
+                              'error': f"Worker crashed: {e}", 'metrics': {},
+                              'forecast': [], 'n_obs': len(groups[key]), 'seconds': 0.0}
+            finish(record)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    order = {key: i for i, key in enumerate(groups)}
+    records.sort(key=lambda record: order[tuple(record['key'])])
+    return _to_frames(records, key_cols)
@@ -5,15 +5,38 @@ Module for customer segmentation and RFM analysis.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed
+from sklearn.cluster import AgglomerativeClustering, KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
+from sklearn.metrics import calinski_harabasz_score, pairwise_distances_argmin_min, silhouette_score
+
+from ..data.data_cache import load_cached
+from ..data.load_data import load_retail_data
+from ..data.preprocess_data import clean_data
+
+_NS_PER_DAY = 86_400 * 10**9
+_NAT = np.iinfo(np.int64).min
+
+RFM_FEATURES = ['Recency', 'Frequency', 'Monetary']
+
+CLUSTERING_METHODS = ('kmeans', 'minibatch', 'hierarchical')
+
+# Default number of initialisations per method
+_DEFAULT_N_INIT = {'kmeans': 10, 'minibatch': 3, 'hierarchical': 3}
+
+# Rows assigned to centroids at once, bounding distance-matrix memory
+_ASSIGN_CHUNK = 100_000
 
 
 def calculate_rfm(df, reference_date=None):
     """
     Calculate RFM (Recency, Frequency, Monetary) metrics for each customer.
     
+    Customers are factorized to integer codes once; Recency comes from a
+    max over int64 timestamps, Frequency from hashing (customer, invoice)
+    code pairs and Monetary from a weighted bincount, so no per-group
+    Python code runs.
+    
     Parameters:
     -----------
     df : pd.DataFrame
@@ -29,13 +52,40 @@ def calculate_rfm(df, reference_date=None):
     if reference_date is None:
         reference_date = df['InvoiceDate'].max()
     
-    rfm = df.groupby('CustomerID').agg({
-        'InvoiceDate': lambda x: (reference_date - x.max()).days,  # Recency
-        'InvoiceNo': 'nunique',  # Frequency
-        'TotalValue': 'sum'  # Monetary
-    }).reset_index()
+    # Customers as sorted integer codes; rows without a customer are dropped
+    customer_codes, customers = pd.factorize(df['CustomerID'], sort=True)
+    has_customer = customer_codes >= 0
+    customer_codes = customer_codes[has_customer]
+    n_customers = len(customers)
+    
+    # Recency: latest purchase per customer on int64 nanosecond timestamps
+    timestamps = pd.to_datetime(df['InvoiceDate']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    last_purchase = np.full(n_customers, _NAT, dtype=np.int64)
+    np.maximum.at(last_purchase, customer_codes, timestamps[has_customer])
+    recency = pd.Series((pd.Timestamp(reference_date).value - last_purchase) // _NS_PER_DAY)
+    if (last_purchase == _NAT).any():
+        recency = recency.where(last_purchase != _NAT)
     
-    rfm.columns = ['CustomerID', 'Recency', 'Frequency', 'Monetary']
+    # Frequency: distinct (customer, invoice) pairs, counted per customer
+    invoice_codes, invoices = pd.factorize(df['InvoiceNo'].to_numpy()[has_customer])
+    has_invoice = invoice_codes >= 0
+    pairs = pd.unique(customer_codes[has_invoice].astype(np.int64) * max(len(invoices), 1)
+                      + invoice_codes[has_invoice])
+    frequency = np.bincount(pairs // max(len(invoices), 1), minlength=n_customers)
+    
+    # Monetary: total spend per customer
+    monetary = np.bincount(
+        customer_codes,
+        weights=df['TotalValue'].fillna(0).to_numpy(dtype=np.float64)[has_customer],
+        minlength=n_customers
+    )
+    
+    rfm = pd.DataFrame({
+        'CustomerID': customers,
+        'Recency': recency,
+        'Frequency': frequency.astype(np.int64),
+        'Monetary': monetary
+    })
     
     # Handle any negative recency (future dates)
     rfm['Recency'] = rfm['Recency'].clip(lower=0)
@@ -43,7 +93,152 @@ def calculate_rfm(df, reference_date=None):
     return rfm
 
 
-def perform_clustering(rfm_df, n_clusters=4, method='kmeans'):
+class ClusteringModel:
+    """
+    A fitted customer segmentation: feature scaling plus cluster centroids.
+    
+    Returned by ``perform_clustering(..., return_model=True)`` and
+    ``fit_minibatch_stream``. ``predict`` assigns new customers to the
+    nearest centroid without refitting.
+    
+    Attributes:
+    -----------
+    method : str
+        Clustering method the model was fitted with
+    scaler : StandardScaler
+        Scaler fitted on the training RFM features
+    fill_values : pd.Series
+        Per-feature values substituted for missing or infinite entries
+    cluster_centers_ : np.ndarray
+        Centroids in scaled feature space, shape (n_clusters, 3)
+    inertia_ : float
+        Sum of squared distances of the training customers to their centroid
+    """
+    
+    def __init__(self, method, scaler, fill_values, cluster_centers, inertia):
+        self.method = method
+        self.scaler = scaler
+        self.fill_values = fill_values
+        self.cluster_centers_ = cluster_centers
+        self.inertia_ = inertia
+    
+    @property
+    def n_clusters(self):
+        return len(self.cluster_centers_)
+    
+    def transform(self, rfm_df):
+        """Scaled RFM feature matrix, with the training fill values applied."""
+        features = rfm_df[RFM_FEATURES].replace([np.inf, -np.inf], np.nan)
+        return self.scaler.transform(features.fillna(self.fill_values))
+    
+    def predict(self, rfm_df):
+        """
+        Assign customers to the nearest cluster centroid.
+        
+        Parameters:
+        -----------
+        rfm_df : pd.DataFrame
+            RFM metrics dataframe, e.g. for newly acquired customers
+            
+        Returns:
+        --------
+        np.ndarray
+            Cluster label per customer
+        """
+        labels, _ = _assign(self.transform(rfm_df), self.cluster_centers_)
+        return labels
+
+
+def _scale_features(rfm_df):
+    """Standardised RFM matrix, with the fitted scaler and fill values."""
+    # Prepare data for clustering
+    rfm_scaled = rfm_df[RFM_FEATURES].copy()
+    
+    # Handle any infinite or null values
+    rfm_scaled = rfm_scaled.replace([np.inf, -np.inf], np.nan)
+    fill_values = rfm_scaled.median()
+    rfm_scaled = rfm_scaled.fillna(fill_values)
+    
+    # Scale the features
+    scaler = StandardScaler()
+    return scaler.fit_transform(rfm_scaled), scaler, fill_values
+
+
+def _assign(X, centers):
+    """Nearest-centroid labels and squared distances, in bounded chunks."""
+    labels = np.empty(len(X), dtype=np.int32)
+    sq_dist = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), _ASSIGN_CHUNK):
+        chunk = X[start:start + _ASSIGN_CHUNK]
+        labels[start:start + len(chunk)], dist = pairwise_distances_argmin_min(chunk, centers)
+        sq_dist[start:start + len(chunk)] = dist ** 2
+    return labels, sq_dist
+
+
+def _iter_batches(X, batch_size):
+    for start in range(0, len(X), batch_size):
+        yield X[start:start + batch_size]
+
+
+class _ArrayBatches:
+    """Picklable re-iterable over row batches of an in-memory array."""
+    
+    def __init__(self, X, batch_size):
+        self.X = X
+        self.batch_size = batch_size
+    
+    def __call__(self):
+        return _iter_batches(self.X, self.batch_size)
+
+
+class _ScaledChunks:
+    """Picklable re-iterable over scaled, filled RFM chunks from a source."""
+    
+    def __init__(self, chunks, model):
+        self.chunks = chunks
+        self.model = model
+    
+    def __call__(self):
+        for chunk in self.chunks():
+            yield self.model.transform(chunk)
+
+
+def _minibatch_run(batches, n_clusters, seed, n_epochs):
+    """One MiniBatchKMeans initialisation, fitted with partial_fit."""
+    model = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=1)
+    for _ in range(n_epochs):
+        for batch in batches():
+            model.partial_fit(batch)
+    return model.cluster_centers_
+
+
+def _hierarchical_run(X, n_clusters, seed, sample_size):
+    """Ward clustering of a random sample; returns the sample cluster means."""
+    rng = np.random.RandomState(seed)
+    sample = X[rng.choice(len(X), size=min(sample_size, len(X)), replace=False)]
+    labels = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward').fit_predict(sample)
+    return np.vstack([sample[labels == k].mean(axis=0) for k in range(n_clusters)])
+
+
+def _batch_inertia(batches, centers):
+    return float(sum(_assign(batch, centers)[1].sum() for batch in batches()))
+
+
+def _best_of_runs(runs, inertia, n_jobs):
+    """Run initialisations in parallel processes and keep the lowest inertia."""
+    candidates = Parallel(n_jobs=n_jobs)(runs)
+    scores = [inertia(centers) for centers in candidates]
+    best = int(np.argmin(scores))
+    return candidates[best], scores[best]
+
+
+def _seeds(random_state, n_init):
+    return np.random.RandomState(random_state).randint(np.iinfo(np.int32).max, size=n_init)
+
+
+def perform_clustering(rfm_df, n_clusters=4, method='kmeans', n_init=None, n_jobs=-1,
+                       batch_size=4096, n_epochs=3, sample_size=5_000,
+                       random_state=42, return_model=False):
     """
     Perform customer clustering based on RFM metrics.
     
@@ -54,34 +249,245 @@ def perform_clustering(rfm_df, n_clusters=4, method='kmeans'):
     n_clusters : int, default=4
         Number of clusters
     method : str, default='kmeans'
-        Clustering method ('kmeans' or 'hierarchical')
+        Clustering method:
+        - 'kmeans': full KMeans over all customers
+        - 'minibatch': MiniBatchKMeans fitted with partial_fit over batches
+          of ``batch_size`` customers, for large customer bases
+        - 'hierarchical': Ward clustering of a ``sample_size`` sample, with
+          every customer then assigned to the nearest sample centroid
+    n_init : int, optional
+        Number of initialisations; the one with the lowest inertia is kept.
+        Defaults to 10 for 'kmeans' and 3 otherwise.
+    n_jobs : int, default=-1
+        Processes running the 'minibatch' and 'hierarchical' initialisations
+        in parallel (-1 uses all cores)
+    batch_size : int, default=4096
+        Customers per partial_fit call for 'minibatch'
+    n_epochs : int, default=3
+        Passes over the data for 'minibatch'
+    sample_size : int, default=5000
+        Customers clustered directly by 'hierarchical'
+    random_state : int, default=42
+        Seed for reproducible clusterings
+    return_model : bool, default=False
+        Also return the fitted ClusteringModel, whose ``predict`` assigns
+        new customers without refitting
         
     Returns:
     --------
-    pd.DataFrame
-        RFM dataframe with cluster labels
+    pd.DataFrame or (pd.DataFrame, ClusteringModel)
+        RFM dataframe with cluster labels, and the model if requested
     """
-    # Prepare data for clustering
-    rfm_scaled = rfm_df[['Recency', 'Frequency', 'Monetary']].copy()
-    
-    # Handle any infinite or null values
-    rfm_scaled = rfm_scaled.replace([np.inf, -np.inf], np.nan)
-    rfm_scaled = rfm_scaled.fillna(rfm_scaled.median())
+    if method not in CLUSTERING_METHODS:
+        raise ValueError(f"Unknown clustering method: {method}")
+    if n_init is None:
+        n_init = _DEFAULT_N_INIT[method]
     
-    # Scale the features
-    scaler = StandardScaler()
-    rfm_scaled_values = scaler.fit_transform(rfm_scaled)
+    rfm_scaled_values, scaler, fill_values = _scale_features(rfm_df)
     
     # Perform clustering
     if method == 'kmeans':
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init)
         clusters = kmeans.fit_predict(rfm_scaled_values)
+        centers, inertia = kmeans.cluster_centers_, float(kmeans.inertia_)
     else:
-        raise ValueError(f"Unknown clustering method: {method}")
+        seeds = _seeds(random_state, n_init)
+        if method == 'minibatch':
+            # Shuffle once so every batch is representative of the whole
+            order = np.random.RandomState(random_state).permutation(len(rfm_scaled_values))
+            shuffled = rfm_scaled_values[order]
+            runs = (delayed(_minibatch_run)(_ArrayBatches(shuffled, batch_size), n_clusters,
+                                            seed, n_epochs) for seed in seeds)
+        else:
+            runs = (delayed(_hierarchical_run)(rfm_scaled_values, n_clusters, seed, sample_size)
+                    for seed in seeds)
+        centers, inertia = _best_of_runs(
+            runs, lambda c: float(_assign(rfm_scaled_values, c)[1].sum()), n_jobs
+        )
+        clusters, _ = _assign(rfm_scaled_values, centers)
     
     # Add cluster labels
     rfm_df = rfm_df.copy()
     rfm_df['Cluster'] = clusters
     
+    if return_model:
+        return rfm_df, ClusteringModel(method, scaler, fill_values, centers, inertia)
     return rfm_df
 
+
+def load_customer_segments(file_path, n_clusters=4, method='kmeans', cache_dir=None):
+    """
+    Cached RFM table with cluster labels for a UCI Online Retail CSV.
+
+    The first call cleans the transactions, computes RFM and clusters the
+    customers; the result is cached next to the CSV (see
+    ``src.data.data_cache``) and reused until the CSV changes.
+
+    Parameters:
+    -----------
+    file_path : str
+        Path to the UCI Online Retail CSV
+    n_clusters : int, default=4
+        Number of clusters
+    method : str, default='kmeans'
+        Clustering method, as in perform_clustering
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the CSV
+
+    Returns:
+    --------
+    pd.DataFrame
+        CustomerID, Recency, Frequency, Monetary and Cluster
+    """
+    if method not in CLUSTERING_METHODS:
+        raise ValueError(f"Unknown clustering method: {method}")
+
+    def build(path):
+        transactions = clean_data(load_retail_data(
+            path, columns=['InvoiceNo', 'StockCode', 'Description', 'Quantity',
+                           'InvoiceDate', 'UnitPrice', 'CustomerID'],
+            cache_dir=cache_dir
+        ))
+        transactions['TotalValue'] = transactions['Quantity'] * transactions['UnitPrice']
+        return perform_clustering(calculate_rfm(transactions), n_clusters=n_clusters,
+                                  method=method, n_jobs=1)
+
+    return load_cached(file_path, build, f"segments_{method}_{n_clusters}",
+                       cache_dir=cache_dir, options={'n_clusters': n_clusters, 'method': method})
+
+
+def fit_minibatch_stream(chunks, n_clusters=4, n_init=3, n_jobs=-1,
+                         n_epochs=3, random_state=42):
+    """
+    Fit a 'minibatch' segmentation over RFM data too large to hold at once.
+    
+    Only one chunk is in memory per worker at a time: a first pass fits the
+    scaler incrementally, each initialisation then streams the chunks
+    through MiniBatchKMeans.partial_fit, and a final pass scores inertia.
+    Missing values are filled with the streamed feature means.
+    
+    Parameters:
+    -----------
+    chunks : callable
+        Picklable callable returning a fresh iterator of RFM DataFrame
+        chunks each time it is called (e.g. reading Parquet row groups)
+    n_clusters : int, default=4
+        Number of clusters
+    n_init : int, default=3
+        Number of initialisations run in parallel processes
+    n_jobs : int, default=-1
+        Number of processes (-1 uses all cores)
+    n_epochs : int, default=3
+        Passes over the chunks per initialisation
+    random_state : int, default=42
+        Seed for reproducible clusterings
+        
+    Returns:
+    --------
+    ClusteringModel
+        Fitted model; label customers with ``model.predict(chunk)``
+    """
+    scaler = StandardScaler()
+    for chunk in chunks():
+        features = chunk[RFM_FEATURES].replace([np.inf, -np.inf], np.nan).dropna()
+        if len(features):
+            scaler.partial_fit(features)
+    fill_values = pd.Series(scaler.mean_, index=RFM_FEATURES)
+    model = ClusteringModel('minibatch', scaler, fill_values, None, None)
+    
+    batches = _ScaledChunks(chunks, model)
+    runs = (delayed(_minibatch_run)(batches, n_clusters, seed, n_epochs)
+            for seed in _seeds(random_state, n_init))
+    model.cluster_centers_, model.inertia_ = _best_of_runs(
+        runs, lambda c: _batch_inertia(batches, c), n_jobs
+    )
+    return model
+
+
+SELECTION_CRITERIA = ('silhouette', 'calinski_harabasz', 'elbow')
+
+
+def _evaluate_k(X, k, random_state, silhouette_sample, batch_size):
+    """Fit one candidate k and score it with linear-time or sampled metrics."""
+    model = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3,
+                            batch_size=batch_size, max_no_improvement=5).fit(X)
+    labels = model.labels_
+    return {
+        'k': k,
+        'inertia': float(model.inertia_),
+        # Same random_state for every k, so all are scored on one sample
+        'silhouette': float(silhouette_score(
+            X, labels, sample_size=min(silhouette_sample, len(X)), random_state=random_state
+        )),
+        'calinski_harabasz': float(calinski_harabasz_score(X, labels)),
+    }
+
+
+def _elbow(ks, inertia):
+    """k furthest from the chord joining the ends of the normalised inertia curve."""
+    ks = np.asarray(ks, dtype=np.float64)
+    inertia = np.asarray(inertia, dtype=np.float64)
+    if len(ks) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    span = inertia[0] - inertia[-1]
+    y = (inertia - inertia[-1]) / span if span > 0 else np.zeros_like(inertia)
+    # The chord runs from (0, 1) to (1, 0); distance is proportional to 1 - x - y
+    return int(ks[np.argmax(1 - x - y)])
+
+
+def select_n_clusters(rfm_df, k_range=range(2, 11), criterion='silhouette',
+                      silhouette_sample=5_000, batch_size=4096, n_jobs=-1,
+                      random_state=42):
+    """
+    Choose the number of customer segments.
+    
+    Every candidate k is fitted with MiniBatchKMeans in its own process and
+    scored with inertia (for the elbow), the Calinski-Harabasz index (both
+    linear in the number of customers) and a silhouette score computed on a
+    fixed random sample, so the sweep stays fast on large customer bases.
+    
+    Parameters:
+    -----------
+    rfm_df : pd.DataFrame
+        RFM metrics dataframe
+    k_range : iterable of int, default=range(2, 11)
+        Candidate numbers of clusters (each at least 2)
+    criterion : str, default='silhouette'
+        How k is chosen ('silhouette', 'calinski_harabasz' or 'elbow')
+    silhouette_sample : int, default=5000
+        Customers sampled for the silhouette score
+    batch_size : int, default=4096
+        MiniBatchKMeans batch size
+    n_jobs : int, default=-1
+        Processes evaluating candidates in parallel (-1 uses all cores)
+    random_state : int, default=42
+        Seed for reproducible selection
+        
+    Returns:
+    --------
+    tuple
+        (n_clusters, diagnostics) where diagnostics has one row per k with
+        inertia, silhouette and calinski_harabasz scores and an is_elbow flag
+    """
+    if criterion not in SELECTION_CRITERIA:
+        raise ValueError(f"Unknown selection criterion: {criterion}")
+    ks = sorted(set(int(k) for k in k_range))
+    if not ks or ks[0] < 2:
+        raise ValueError("k_range must contain numbers of clusters of at least 2")
+    
+    X, _, _ = _scale_features(rfm_df)
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_k)(X, k, random_state, silhouette_sample, batch_size) for k in ks
+    )
+    diagnostics = pd.DataFrame(scores).set_index('k')
+    
+    elbow = _elbow(ks, diagnostics['inertia'])
+    diagnostics['is_elbow'] = diagnostics.index == elbow
+    
+    if criterion == 'elbow':
+        n_clusters = elbow
+    else:
+        n_clusters = int(diagnostics[criterion].idxmax())
+    
+    return n_clusters, diagnostics
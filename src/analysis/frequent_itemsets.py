@@ -0,0 +1,315 @@
+"""
+Module for frequent itemset mining engines.
+
+Provides a common entry point over mlxtend's apriori and fpgrowth and a
+native Eclat engine that intersects NumPy-packed tid-bitsets (one bit per
+invoice), which stays fast at the low supports needed for long-tail
+products. Every engine returns the same itemsets, in the same order, with
+the same support values.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from mlxtend.frequent_patterns import apriori, fpgrowth
+
+ENGINES = ('apriori', 'fpgrowth', 'eclat')
+
+# Bits set in each byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(bitsets):
+    """Number of set bits in each row of a packed uint8 bitset matrix."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bitsets).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT_TABLE[bitsets].sum(axis=1, dtype=np.int64)
+
+
+def _to_csc(basket_sets):
+    """Boolean scipy CSC matrix of a (sparse or dense) basket DataFrame."""
+    if hasattr(basket_sets, 'sparse'):
+        matrix = basket_sets.sparse.to_coo()
+    else:
+        matrix = sparse.coo_matrix(basket_sets.to_numpy(dtype=bool))
+    return sparse.csc_matrix(matrix, dtype=bool)
+
+
+def pack_tidsets(matrix, columns):
+    """
+    Pack selected columns of a CSC basket matrix into tid-bitsets.
+
+    Parameters:
+    -----------
+    matrix : scipy.sparse.csc_matrix
+        Boolean basket matrix (invoices x items)
+    columns : np.ndarray
+        Column positions to pack
+
+    Returns:
+    --------
+    np.ndarray
+        uint8 array of shape (len(columns), ceil(n_invoices / 8))
+    """
+    n_rows = matrix.shape[0]
+    n_bytes = (n_rows + 7) // 8
+    sub = matrix[:, columns]
+
+    bitsets = np.zeros((len(columns), n_bytes), dtype=np.uint8)
+    item_of_entry = np.repeat(np.arange(len(columns)), np.diff(sub.indptr))
+    rows = sub.indices
+    np.bitwise_or.at(
+        bitsets.ravel(),
+        item_of_entry * n_bytes + (rows >> 3),
+        (0x80 >> (rows & 7)).astype(np.uint8)
+    )
+    return bitsets
+
+
+def eclat(basket_sets, min_support=0.01, max_len=None, memory_budget=None):
+    """
+    Mine frequent itemsets with Eclat over packed tid-bitsets.
+
+    Itemsets are grown depth-first: the tid-bitsets of a prefix's extensions
+    are intersected with one vectorised ``&`` and counted with a popcount.
+
+    Parameters:
+    -----------
+    basket_sets : pd.DataFrame
+        Boolean (optionally sparse) basket matrix, invoices x items
+    min_support : float, default=0.01
+        Minimum support threshold
+    max_len : int, optional
+        Maximum itemset length
+    memory_budget : int, optional
+        Maximum bytes of tid-bitsets held at once. Raises MemoryError when
+        the search would exceed it.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Frequent itemsets with 'support' and 'itemsets' columns
+    """
+    matrix = _to_csc(basket_sets)
+    n_rows = matrix.shape[0]
+    columns = np.asarray(basket_sets.columns)
+
+    item_support = np.asarray(matrix.sum(axis=0)).ravel() / n_rows
+    frequent_items = np.flatnonzero(item_support >= min_support)
+
+    n_bytes = (n_rows + 7) // 8
+    held = len(frequent_items) * n_bytes
+    if memory_budget is not None and held > memory_budget:
+        raise MemoryError(
+            f"Tid-bitsets of {len(frequent_items)} frequent items need {held} bytes, "
+            f"over the memory budget of {memory_budget}; raise min_support"
+        )
+    bitsets = pack_tidsets(matrix, frequent_items)
+
+    supports = list(item_support[frequent_items])
+    itemsets = [(i,) for i in frequent_items]
+
+    def extend(prefix, items, prefix_bitsets, held):
+        # prefix_bitsets[j] is the tidset of prefix + (items[j],)
+        for j in range(len(items) - 1):
+            tail = prefix_bitsets[j + 1:]
+            size = tail.nbytes
+            if memory_budget is not None and held + size > memory_budget:
+                raise MemoryError(
+                    f"Eclat needs more than the memory budget of {memory_budget} bytes "
+                    f"at itemset length {len(prefix) + 2}; raise min_support or lower max_len"
+                )
+            joined = prefix_bitsets[j] & tail
+            support = _popcount_rows(joined) / n_rows
+            keep = np.flatnonzero(support >= min_support)
+            if len(keep) == 0:
+                continue
+
+            new_prefix = prefix + (items[j],)
+            new_items = items[j + 1:][keep]
+            supports.extend(support[keep])
+            itemsets.extend(new_prefix + (k,) for k in new_items)
+
+            if len(keep) > 1 and (max_len is None or len(new_prefix) + 2 <= max_len):
+                extend(new_prefix, new_items, joined[keep], held + size)
+
+    if max_len is None or max_len >= 2:
+        extend((), frequent_items, bitsets, held)
+
+    return _as_frame(supports, itemsets, columns)
+
+
+def _as_frame(supports, itemsets, columns):
+    """Build the mlxtend-style result in canonical itemset order."""
+    order = sorted(range(len(itemsets)), key=lambda i: (len(itemsets[i]), itemsets[i]))
+    return pd.DataFrame({
+        'support': np.array([supports[i] for i in order], dtype=np.float64),
+        'itemsets': [frozenset(columns[list(itemsets[i])]) for i in order],
+    })
+
+
+def canonical_order(frequent_itemsets, columns):
+    """
+    Reorder mined itemsets by length, then by item column position.
+
+    This is the order apriori generates itemsets in; applying it to every
+    engine makes their outputs (and the rules derived from them) identical.
+    """
+    position = {name: i for i, name in enumerate(columns)}
+    keys = [tuple(sorted(position[item] for item in itemset))
+            for itemset in frequent_itemsets['itemsets']]
+    order = sorted(range(len(keys)), key=lambda i: (len(keys[i]), keys[i]))
+    return frequent_itemsets.iloc[order].reset_index(drop=True)
+
+
+# Relative slack on the local support threshold, so float rounding can never
+# drop a globally frequent itemset during the partition pass
+_LOCAL_SUPPORT_SLACK = 1e-9
+
+# Candidates whose tid-bitsets are intersected at once in the counting pass
+_COUNT_BATCH = 4096
+
+
+def _mine_partition(matrix, min_support, engine, max_len, memory_budget):
+    """Locally frequent itemsets of one invoice partition, as column positions."""
+    local = pd.DataFrame.sparse.from_spmatrix(matrix, columns=range(matrix.shape[1]))
+    local_support = min_support * (1 - _LOCAL_SUPPORT_SLACK)
+    itemsets = mine_frequent_itemsets(local, min_support=local_support, engine=engine,
+                                      max_len=max_len, memory_budget=memory_budget)
+    return {tuple(sorted(int(i) for i in itemset)) for itemset in itemsets['itemsets']}
+
+
+def _count_partition(matrix, candidates_by_len):
+    """Occurrences of every candidate itemset within one invoice partition."""
+    items = np.unique(np.concatenate([c.ravel() for c in candidates_by_len.values()]))
+    bitsets = pack_tidsets(matrix.tocsc(), items)
+    slot = np.searchsorted(items, np.arange(matrix.shape[1]))
+
+    counts = {}
+    for length, candidates in candidates_by_len.items():
+        rows = slot[candidates]
+        out = np.empty(len(candidates), dtype=np.int64)
+        for start in range(0, len(candidates), _COUNT_BATCH):
+            batch = rows[start:start + _COUNT_BATCH]
+            joined = bitsets[batch[:, 0]]
+            for k in range(1, length):
+                joined = joined & bitsets[batch[:, k]]
+            out[start:start + len(batch)] = _popcount_rows(joined)
+        counts[length] = out
+    return counts
+
+
+def son_mine(basket_sets, min_support=0.01, engine='eclat', max_len=None,
+             memory_budget=None, n_jobs=-1):
+    """
+    Mine frequent itemsets with the SON partition algorithm in parallel.
+
+    Invoices are split into ``n_jobs`` partitions. Each worker process mines
+    the itemsets frequent within its partition (any globally frequent
+    itemset is locally frequent in at least one partition), and a second
+    parallel pass counts every candidate's exact support over all
+    partitions. The result is identical to mining serially.
+
+    Parameters:
+    -----------
+    basket_sets : pd.DataFrame
+        Boolean (optionally sparse) basket matrix, invoices x items
+    min_support : float, default=0.01
+        Minimum support threshold
+    engine : str, default='eclat'
+        Engine used to mine each partition
+    max_len : int, optional
+        Maximum itemset length
+    memory_budget : int, optional
+        Memory budget in bytes for each partition's engine
+    n_jobs : int, default=-1
+        Number of partitions and worker processes; -1 uses all cores
+
+    Returns:
+    --------
+    pd.DataFrame
+        Frequent itemsets with 'support' and 'itemsets' columns
+    """
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    matrix = sparse.csr_matrix(_to_csc(basket_sets))
+    n_rows = matrix.shape[0]
+    bounds = np.linspace(0, n_rows, min(n_jobs, max(n_rows, 1)) + 1).astype(int)
+    partitions = [matrix[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=len(partitions)) as pool:
+        # Pass 1: locally frequent itemsets are the global candidates
+        local_results = pool.map(
+            _mine_partition, partitions,
+            [min_support] * len(partitions), [engine] * len(partitions),
+            [max_len] * len(partitions), [memory_budget] * len(partitions)
+        )
+        candidates = set().union(*local_results)
+        if not candidates:
+            return _as_frame([], [], np.asarray(basket_sets.columns))
+
+        candidates_by_len = {}
+        for itemset in candidates:
+            candidates_by_len.setdefault(len(itemset), []).append(itemset)
+        candidates_by_len = {length: np.array(sorted(group), dtype=np.int64)
+                             for length, group in candidates_by_len.items()}
+
+        # Pass 2: exact global support of every candidate
+        totals = {length: np.zeros(len(c), dtype=np.int64)
+                  for length, c in candidates_by_len.items()}
+        for counts in pool.map(_count_partition, partitions,
+                               [candidates_by_len] * len(partitions)):
+            for length, count in counts.items():
+                totals[length] += count
+
+    supports, itemsets = [], []
+    for length, group in candidates_by_len.items():
+        support = totals[length] / n_rows
+        keep = np.flatnonzero(support >= min_support)
+        supports.extend(support[keep])
+        itemsets.extend(tuple(row) for row in group[keep])
+
+    return _as_frame(supports, itemsets, np.asarray(basket_sets.columns))
+
+
+def mine_frequent_itemsets(basket_sets, min_support=0.01, engine='apriori',
+                           max_len=None, memory_budget=None):
+    """
+    Mine frequent itemsets with the selected engine.
+
+    Parameters:
+    -----------
+    basket_sets : pd.DataFrame
+        Boolean (optionally sparse) basket matrix, invoices x items
+    min_support : float, default=0.01
+        Minimum support threshold
+    engine : str, default='apriori'
+        Mining engine ('apriori', 'fpgrowth' or 'eclat')
+    max_len : int, optional
+        Maximum itemset length
+    memory_budget : int, optional
+        Memory budget in bytes. Enforced by 'eclat'; switches 'apriori' to
+        mlxtend's low-memory candidate generation.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Frequent itemsets with 'support' and 'itemsets' columns
+    """
+    if engine == 'apriori':
+        frequent_itemsets = apriori(basket_sets, min_support=min_support, use_colnames=True,
+                                    max_len=max_len, low_memory=memory_budget is not None)
+    elif engine == 'fpgrowth':
+        frequent_itemsets = fpgrowth(basket_sets, min_support=min_support, use_colnames=True,
+                                     max_len=max_len)
+    elif engine == 'eclat':
+        return eclat(basket_sets, min_support=min_support, max_len=max_len,
+                     memory_budget=memory_budget)
+    else:
+        raise ValueError(f"Unknown mining engine: {engine}")
+
+    return canonical_order(frequent_itemsets, basket_sets.columns)
@@ -8,9 +8,13 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score, accuracy_score, classification_report
 from statsmodels.tsa.arima.model import ARIMA
 from prophet import Prophet
+from .baseline_forecasts import BASELINE_MODELS, forecast_baseline, infer_season_length
 import warnings
 warnings.filterwarnings('ignore')
 
+# (p, d, q) order of the sales ARIMA model
+ARIMA_ORDER = (5, 1, 0)
+
 
 def train_sales_forecast(df, model_type='arima', test_size=0.2):
     """
@@ -21,7 +25,8 @@ def train_sales_forecast(df, model_type='arima', test_size=0.2):
     df : pd.DataFrame
         Time series data with date index
     model_type : str, default='arima'
-        Model type ('arima' or 'prophet')
+        Model type ('arima', 'prophet', or a fast baseline: 'seasonal_naive',
+        'ses' or 'holt_winters')
     test_size : float, default=0.2
         Proportion of data for testing
         
@@ -35,11 +40,35 @@ def train_sales_forecast(df, model_type='arima', test_size=0.2):
     train = df[:train_size]
     test = df[train_size:]
     
+    model, predictions = _fit_and_forecast(train, model_type, steps=len(test))
+    metrics = _forecast_metrics(test['TotalValue'], predictions)
+    
+    return model, predictions, metrics
+
+
+def _fit_and_forecast(train, model_type, steps):
+    """
+    Fit one forecasting model and forecast the next ``steps`` periods.
+    
+    Parameters:
+    -----------
+    train : pd.DataFrame
+        Training series with date index and a 'TotalValue' column
+    model_type : str
+        Model type ('arima', 'prophet', 'seasonal_naive', 'ses' or 'holt_winters')
+    steps : int
+        Number of periods to forecast
+        
+    Returns:
+    --------
+    tuple
+        (model, predictions)
+    """
     if model_type == 'arima':
         # ARIMA model
-        model = ARIMA(train['TotalValue'], order=(5, 1, 0))
+        model = ARIMA(train['TotalValue'], order=ARIMA_ORDER)
         fitted_model = model.fit()
-        predictions = fitted_model.forecast(steps=len(test))
+        predictions = fitted_model.forecast(steps=steps)
         
     elif model_type == 'prophet':
         # Prophet model
@@ -49,21 +78,34 @@ def train_sales_forecast(df, model_type='arima', test_size=0.2):
         model = Prophet()
         model.fit(prophet_df)
         
-        future = model.make_future_dataframe(periods=len(test))
+        future = model.make_future_dataframe(periods=steps)
         forecast = model.predict(future)
-        predictions = forecast.tail(len(test))['yhat'].values
+        predictions = forecast.tail(steps)['yhat'].values
+        
+    elif model_type in BASELINE_MODELS:
+        # NumPy baselines; the "model" is the fitted parameters
+        season_length = infer_season_length(train.index)
+        forecasts, params = forecast_baseline(
+            train['TotalValue'].to_numpy(dtype=np.float64), steps, model_type,
+            season_length=season_length
+        )
+        model = {'model_type': model_type, 'season_length': season_length,
+                 **{k: v[0] if np.ndim(v) else v for k, v in params.items()}}
+        predictions = forecasts[0]
         
     else:
         raise ValueError(f"Unknown model type: {model_type}")
     
-    # Calculate metrics
-    rmse = np.sqrt(mean_squared_error(test['TotalValue'], predictions))
-    mae = mean_absolute_error(test['TotalValue'], predictions)
-    r2 = r2_score(test['TotalValue'], predictions)
-    
-    metrics = {'RMSE': rmse, 'MAE': mae, 'R2': r2}
+    return model, predictions
+
+
+def _forecast_metrics(actual, predictions):
+    """RMSE, MAE and R2 of a forecast against the held-out actuals."""
+    rmse = np.sqrt(mean_squared_error(actual, predictions))
+    mae = mean_absolute_error(actual, predictions)
+    r2 = r2_score(actual, predictions)
     
-    return model, predictions, metrics
+    return {'RMSE': rmse, 'MAE': mae, 'R2': r2}
 
 
 def predict_customer_churn(df, threshold_days=90):
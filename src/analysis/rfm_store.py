@@ -0,0 +1,264 @@
+"""
+Module for incrementally maintained RFM metrics.
+
+``calculate_rfm`` rescans the whole transaction history on every call. The
+RFMStore keeps the running per-customer state instead -- last purchase
+time, the distinct invoices seen and the monetary sum -- so each night's
+new invoices are applied in time proportional to the delta, and the RFM
+table is produced from the state alone. The state persists to a single
+Parquet file.
+
+Distinct invoices are counted exactly (as a set of 64-bit invoice hashes)
+until a customer exceeds ``exact_limit`` invoices; beyond that the set is
+replaced by a HyperLogLog sketch, bounding memory for very large accounts.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Invoices per customer kept exactly before switching to HyperLogLog
+DEFAULT_EXACT_LIMIT = 10_000
+
+# HyperLogLog precision: 2**12 registers, ~1.6% standard error
+_HLL_P = 12
+_HLL_M = 1 << _HLL_P
+
+_NS_PER_DAY = 86_400 * 10**9
+_NAT = np.iinfo(np.int64).min
+
+
+def _hash_invoices(invoices):
+    """Stable 64-bit hashes of invoice numbers."""
+    return pd.util.hash_array(np.asarray(invoices, dtype=str).astype(object))
+
+
+def _bit_length(values):
+    """Number of significant bits of each uint64 value."""
+    values = values.copy()
+    length = np.zeros(values.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = values >= (np.uint64(1) << np.uint64(shift))
+        length[big] += shift
+        values[big] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def _hll_add(registers, hashes):
+    """Add 64-bit hashes to a HyperLogLog register array in place."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = (hashes >> np.uint64(64 - _HLL_P)).astype(np.intp)
+    rest = hashes & np.uint64((1 << (64 - _HLL_P)) - 1)
+    rank = (64 - _HLL_P) - _bit_length(rest) + 1
+    np.maximum.at(registers, index, rank.astype(np.uint8))
+
+
+def _hll_count(registers):
+    """HyperLogLog cardinality estimate, with small-range correction."""
+    alpha = 0.7213 / (1 + 1.079 / _HLL_M)
+    estimate = alpha * _HLL_M * _HLL_M / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * _HLL_M and zeros:
+        estimate = _HLL_M * np.log(_HLL_M / zeros)
+    return int(round(estimate))
+
+
+class RFMStore:
+    """
+    Incrementally updated per-customer RFM state.
+
+    Parameters:
+    -----------
+    exact_limit : int, default=DEFAULT_EXACT_LIMIT
+        Distinct invoices per customer counted exactly; customers above it
+        are counted with a HyperLogLog sketch
+
+    Examples:
+    ---------
+    >>> store = RFMStore.from_transactions(history_df)
+    >>> store.update(todays_df)
+    >>> store.save('data/processed/rfm_store.parquet')
+    >>> rfm = RFMStore.load('data/processed/rfm_store.parquet').to_rfm()
+    """
+
+    def __init__(self, exact_limit=DEFAULT_EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.max_date = _NAT
+
+        self._ids = []
+        self._positions = {}
+        self._last = np.empty(0, dtype=np.int64)
+        self._monetary = np.empty(0, dtype=np.float64)
+        self._invoices = []     # set of invoice hashes, or None once sketched
+        self._sketches = {}     # position -> HyperLogLog registers
+
+    def __len__(self):
+        return len(self._ids)
+
+    @classmethod
+    def from_transactions(cls, df, exact_limit=DEFAULT_EXACT_LIMIT):
+        """Build a store from a full transaction history."""
+        return cls(exact_limit=exact_limit).update(df)
+
+    def _positions_of(self, customers):
+        """Positions of each customer, registering unseen ones."""
+        codes, uniques = pd.factorize(customers)
+
+        positions = np.empty(len(uniques), dtype=np.int64)
+        for i, customer in enumerate(uniques):
+            pos = self._positions.get(customer)
+            if pos is None:
+                pos = len(self._ids)
+                self._positions[customer] = pos
+                self._ids.append(customer)
+                self._invoices.append(set())
+            positions[i] = pos
+
+        n = len(self._ids)
+        if n > len(self._last):
+            capacity = max(n, 2 * len(self._last), 1024)
+            self._last = np.concatenate(
+                [self._last, np.full(capacity - len(self._last), _NAT, dtype=np.int64)])
+            self._monetary = np.concatenate(
+                [self._monetary, np.zeros(capacity - len(self._monetary))])
+        return positions[codes]
+
+    def update(self, df):
+        """
+        Apply a batch of new transactions.
+
+        Runs in time proportional to ``len(df)``. Re-applying invoices that
+        were already loaded does not change Frequency, but does add their
+        value to Monetary again.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Transactions with CustomerID, InvoiceNo, InvoiceDate and TotalValue
+
+        Returns:
+        --------
+        RFMStore
+            self, for chaining
+        """
+        dates = pd.to_datetime(df['InvoiceDate']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        if len(dates):
+            self.max_date = max(self.max_date, int(dates.max()))
+
+        valid = df['CustomerID'].notna().to_numpy()
+        if not valid.any():
+            return self
+        df = df[valid]
+        dates = dates[valid]
+        positions = self._positions_of(df['CustomerID'].to_numpy())
+
+        np.maximum.at(self._last, positions, dates)
+        self._monetary += np.bincount(
+            positions, weights=df['TotalValue'].fillna(0).to_numpy(dtype=np.float64),
+            minlength=len(self._monetary)
+        )
+
+        has_invoice = df['InvoiceNo'].notna().to_numpy()
+        pairs = pd.DataFrame({
+            'pos': positions[has_invoice],
+            'hash': _hash_invoices(df['InvoiceNo'].to_numpy()[has_invoice]),
+        }).drop_duplicates()
+        for pos, hashes in pairs.groupby('pos', sort=False)['hash']:
+            self._add_invoices(pos, hashes.to_numpy())
+        return self
+
+    def _add_invoices(self, pos, hashes):
+        invoices = self._invoices[pos]
+        if invoices is None:
+            _hll_add(self._sketches[pos], hashes)
+            return
+        invoices.update(hashes.tolist())
+        if len(invoices) > self.exact_limit:
+            registers = np.zeros(_HLL_M, dtype=np.uint8)
+            _hll_add(registers, np.fromiter(invoices, dtype=np.uint64, count=len(invoices)))
+            self._sketches[pos] = registers
+            self._invoices[pos] = None
+
+    def _frequency(self):
+        return np.array([
+            len(invoices) if invoices is not None else _hll_count(self._sketches[pos])
+            for pos, invoices in enumerate(self._invoices)
+        ], dtype=np.int64)
+
+    def to_rfm(self, reference_date=None):
+        """
+        RFM metrics per customer, as returned by ``calculate_rfm``.
+
+        Parameters:
+        -----------
+        reference_date : datetime, optional
+            Reference date for recency calculation. If None, uses the latest
+            transaction date loaded.
+
+        Returns:
+        --------
+        pd.DataFrame
+            CustomerID, Recency, Frequency and Monetary, sorted by CustomerID
+        """
+        n = len(self._ids)
+        if reference_date is None:
+            reference = self.max_date
+        else:
+            reference = pd.Timestamp(reference_date).value
+
+        last = self._last[:n]
+        recency = pd.Series((reference - last) // _NS_PER_DAY)
+        if (last == _NAT).any():
+            # Customers whose transactions all lack a date, as in groupby's max
+            recency = recency.where(last != _NAT)
+        rfm = pd.DataFrame({
+            'CustomerID': pd.Series(self._ids, dtype=None if n else object),
+            'Recency': recency,
+            'Frequency': self._frequency(),
+            'Monetary': self._monetary[:n],
+        })
+        rfm['Recency'] = rfm['Recency'].clip(lower=0)
+        return rfm.sort_values('CustomerID', kind='mergesort').reset_index(drop=True)
+
+    def save(self, path):
+        """Write the store to a Parquet file."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        n = len(self._ids)
+        table = pa.table({
+            'CustomerID': pa.array(pd.Series(self._ids, dtype=None if n else object)),
+            'LastPurchase': pa.array(self._last[:n]),
+            'Monetary': pa.array(self._monetary[:n]),
+            'Invoices': pa.array([sorted(s) if s is not None else None for s in self._invoices],
+                                 type=pa.list_(pa.uint64())),
+            'Sketch': pa.array([self._sketches[pos].tobytes() if s is None else None
+                                for pos, s in enumerate(self._invoices)], type=pa.binary()),
+        })
+        table = table.replace_schema_metadata({
+            'max_date': str(self.max_date),
+            'exact_limit': str(self.exact_limit),
+        })
+        pq.write_table(table, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by ``save``."""
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        metadata = table.schema.metadata
+        store = cls(exact_limit=int(metadata[b'exact_limit']))
+        store.max_date = int(metadata[b'max_date'])
+
+        store._ids = table.column('CustomerID').to_pandas().tolist()
+        store._positions = {customer: pos for pos, customer in enumerate(store._ids)}
+        store._last = table.column('LastPurchase').to_numpy().astype(np.int64)
+        store._monetary = table.column('Monetary').to_numpy().astype(np.float64)
+        for pos, (invoices, sketch) in enumerate(zip(table.column('Invoices').to_pylist(),
+                                                     table.column('Sketch').to_pylist())):
+            if invoices is None:
+                store._invoices.append(None)
+                store._sketches[pos] = np.frombuffer(sketch, dtype=np.uint8).copy()
+            else:
+                store._invoices.append(set(invoices))
+        return store
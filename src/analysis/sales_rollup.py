@@ -0,0 +1,96 @@
+"""
+Module for the pre-aggregated country x period sales table.
+
+The country dashboard plots yearly (or monthly) sales per country. The
+rollup is computed once from a TemporalCube of the cleaned transactions and
+cached next to the source CSV (see ``src.data.data_cache``), so it is only
+rebuilt when the data changes; dashboards and the backend read the small
+cached table instead of the transactions.
+"""
+
+from ..data.data_cache import load_cached
+from ..data.load_data import load_retail_data
+from ..data.preprocess_data import clean_data
+from .temporal_cube import TemporalCube
+
+SALES_PERIODS = ('year', 'month', 'day')
+
+# Columns of every rollup, after the period columns
+SALES_COLUMNS = ['Total_Sales', 'Total_Quantity', 'Num_Transactions', 'Unique_Invoices']
+
+# Bump when the rollup's definition changes, so cached tables are rebuilt
+_ROLLUP_VERSION = 1
+
+
+def country_sales(data, period='year'):
+    """
+    Sales per country and year (or month).
+
+    Parameters:
+    -----------
+    data : pd.DataFrame or TemporalCube
+        Cleaned transactions with InvoiceDate, InvoiceNo, Country, Quantity
+        and TotalValue (computed from UnitPrice if missing), or their cube
+    period : str, default='year'
+        'year', 'month' or 'day'
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per country and period: Country, Year (and Month), or
+        Date for daily rollups, then
+        Total_Sales, Total_Quantity, Num_Transactions and Unique_Invoices,
+        sorted by country and period
+    """
+    if period not in SALES_PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    if isinstance(data, TemporalCube):
+        cube = data
+    else:
+        if 'TotalValue' not in data.columns:
+            data = data.assign(TotalValue=data['Quantity'] * data['UnitPrice'])
+        cube = TemporalCube.from_transactions(data)
+
+    by = {'year': ['Country', 'Year'], 'month': ['Country', 'Year', 'Month'],
+          'day': ['Country', 'Date']}[period]
+    rollup = cube.rollup(by).rename(columns={'Total_Value': 'Total_Sales'})
+    rollup = rollup[SALES_COLUMNS].reset_index()
+    rollup['Country'] = rollup['Country'].astype(str)
+    return rollup
+
+
+def load_country_sales(file_path, period='year', cache_dir=None):
+    """
+    Cached country sales rollup of a UCI Online Retail CSV.
+
+    The first call loads and cleans the transactions and writes the rollup
+    to the data cache; later calls read the cached table until the CSV
+    changes.
+
+    Parameters:
+    -----------
+    file_path : str
+        Path to the UCI Online Retail CSV
+    period : str, default='year'
+        'year', 'month' or 'day'
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the CSV
+
+    Returns:
+    --------
+    pd.DataFrame
+        As returned by country_sales
+    """
+    if period not in SALES_PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+
+    def build(path):
+        transactions = load_retail_data(
+            path, columns=['InvoiceNo', 'StockCode', 'Description', 'Quantity',
+                           'InvoiceDate', 'UnitPrice', 'Country'],
+            cache_dir=cache_dir
+        )
+        return country_sales(clean_data(transactions), period=period)
+
+    return load_cached(file_path, build, f"country_sales_{period}", cache_dir=cache_dir,
+                       options={'version': _ROLLUP_VERSION})
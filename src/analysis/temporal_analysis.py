@@ -1,10 +1,19 @@
 """
 Module for temporal pattern analysis.
+
+Every analysis is a view over a TemporalCube. Pass a cube built once with
+``TemporalCube.from_transactions(df)`` to run a full temporal report from a
+single pass over the data; passing a DataFrame builds the cube on the fly.
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime
+from .temporal_cube import TemporalCube
+
+
+def _as_cube(data):
+    """Cube for a transaction DataFrame, or the cube itself."""
+    if isinstance(data, TemporalCube):
+        return data
+    return TemporalCube.from_transactions(data)
 
 
 def analyze_hourly(df):
@@ -13,22 +22,15 @@ def analyze_hourly(df):
     
     Parameters:
     -----------
-    df : pd.DataFrame
-        Transaction dataset with InvoiceDate column
+    df : pd.DataFrame or TemporalCube
+        Transaction dataset with InvoiceDate column, or its temporal cube
         
     Returns:
     --------
     pd.DataFrame
         Aggregated hourly statistics
     """
-    hourly_stats = df.groupby('Hour').agg({
-        'Quantity': ['sum', 'mean', 'count'],
-        'TotalValue': ['sum', 'mean'],
-        'InvoiceNo': 'nunique'
-    }).round(2)
-    
-    hourly_stats.columns = ['Total_Quantity', 'Avg_Quantity', 'Num_Transactions',
-                           'Total_Value', 'Avg_Value', 'Unique_Invoices']
+    hourly_stats = _as_cube(df).rollup('Hour').round(2)
     
     return hourly_stats
 
@@ -39,22 +41,15 @@ def analyze_daily(df):
     
     Parameters:
     -----------
-    df : pd.DataFrame
-        Transaction dataset with InvoiceDate column
+    df : pd.DataFrame or TemporalCube
+        Transaction dataset with InvoiceDate column, or its temporal cube
         
     Returns:
     --------
     pd.DataFrame
         Aggregated daily statistics
     """
-    daily_stats = df.groupby('DayOfWeek').agg({
-        'Quantity': ['sum', 'mean', 'count'],
-        'TotalValue': ['sum', 'mean'],
-        'InvoiceNo': 'nunique'
-    }).round(2)
-    
-    daily_stats.columns = ['Total_Quantity', 'Avg_Quantity', 'Num_Transactions',
-                           'Total_Value', 'Avg_Value', 'Unique_Invoices']
+    daily_stats = _as_cube(df).rollup('DayOfWeek').round(2)
     
     # Add day names
     day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -69,22 +64,15 @@ def analyze_monthly(df):
     
     Parameters:
     -----------
-    df : pd.DataFrame
-        Transaction dataset with InvoiceDate column
+    df : pd.DataFrame or TemporalCube
+        Transaction dataset with InvoiceDate column, or its temporal cube
         
     Returns:
     --------
     pd.DataFrame
         Aggregated monthly statistics
     """
-    monthly_stats = df.groupby('Month').agg({
-        'Quantity': ['sum', 'mean', 'count'],
-        'TotalValue': ['sum', 'mean'],
-        'InvoiceNo': 'nunique'
-    }).round(2)
-    
-    monthly_stats.columns = ['Total_Quantity', 'Avg_Quantity', 'Num_Transactions',
-                            'Total_Value', 'Avg_Value', 'Unique_Invoices']
+    monthly_stats = _as_cube(df).rollup('Month').round(2)
     
     month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
@@ -92,3 +80,36 @@ def analyze_monthly(df):
     
     return monthly_stats
 
+
+def analyze_quarterly(df):
+    """
+    Analyze purchase patterns by calendar quarter.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame or TemporalCube
+        Transaction dataset with InvoiceDate column, or its temporal cube
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Aggregated statistics per YearQuarter period
+    """
+    return _as_cube(df).rollup('YearQuarter').round(2)
+
+
+def analyze_seasonal(df):
+    """
+    Analyze purchase patterns by season (Winter is December-February).
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame or TemporalCube
+        Transaction dataset with InvoiceDate column, or its temporal cube
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Aggregated seasonal statistics, Winter to Autumn
+    """
+    return _as_cube(df).rollup('Season').round(2)
@@ -0,0 +1,309 @@
+"""
+Module for a multi-granularity temporal aggregate cube.
+
+One pass over the transactions aggregates them into cells keyed by
+(date, hour, country): quantity and value sums and counts, plus the set of
+distinct invoices in each cell, stored as unique (cell, invoice) pairs.
+Hourly, daily, monthly, quarterly, seasonal and per-country views are then
+rolled up from the cells alone. Invoice counts stay exact because a rollup
+counts the distinct invoices over the union of its cells' sets, rather than
+summing per-cell counts.
+
+Cells are mergeable partial aggregates (sums, counts, sums of squares and
+invoice sets), so cubes of separate loads combine with ``TemporalCube.merge``
+into exactly the cube of the combined data.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ..data.preprocess_data import SEASON_DTYPE, _SEASON_CODES
+
+_NS_PER_DAY = 86_400 * 10**9
+_N_HOURS = 24
+
+# Granularities a rollup can group by
+CUBE_DIMENSIONS = ('Date', 'Hour', 'Country', 'DayOfWeek', 'Month', 'Quarter', 'Year',
+                   'Season', 'YearMonth', 'YearQuarter')
+
+# Statistics of every rollup, as in analyze_hourly
+CUBE_STATS = ['Total_Quantity', 'Avg_Quantity', 'Num_Transactions',
+              'Total_Value', 'Avg_Value', 'Unique_Invoices']
+
+CELL_KEYS = ['Date', 'Hour', 'Country']
+CELL_STATS = ['Quantity_Sum', 'Quantity_Count', 'Quantity_SumSq',
+              'Value_Sum', 'Value_Count', 'Value_SumSq']
+
+
+def _sorted_unique(values):
+    """Sorted distinct values of an integer array (faster than np.unique here)."""
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+class TemporalCube:
+    """
+    (date, hour, country) aggregates of a transaction dataset.
+
+    Attributes:
+    -----------
+    cells : pd.DataFrame
+        One row per non-empty cell: the CELL_KEYS and CELL_STATS columns
+        (counts are of non-missing values, as pandas 'count' and 'mean'
+        use)
+    pair_cells, pair_invoices : np.ndarray
+        Unique (cell row, invoice code) pairs
+    invoices : np.ndarray
+        Invoice numbers indexed by invoice code
+    """
+
+    def __init__(self, cells, pair_cells, pair_invoices, invoices):
+        self.cells = cells
+        self.pair_cells = pair_cells
+        self.pair_invoices = pair_invoices
+        self.invoices = invoices
+
+    @classmethod
+    def from_transactions(cls, df):
+        """
+        Build the cube in one pass over a transaction dataset.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Transactions with InvoiceDate, InvoiceNo, Quantity and TotalValue
+            columns, and optionally Country. Rows without an InvoiceDate
+            are skipped.
+
+        Returns:
+        --------
+        TemporalCube
+        """
+        dates = pd.to_datetime(df['InvoiceDate']).to_numpy(dtype='datetime64[ns]')
+        ns = dates.view(np.int64)
+        valid = ~np.isnat(dates)
+        ns = ns[valid]
+
+        day = ns // _NS_PER_DAY
+        hour = (ns - day * _NS_PER_DAY) // (3_600 * 10**9)
+        if 'Country' in df.columns:
+            country_codes, countries = pd.factorize(df['Country'].to_numpy()[valid],
+                                                    use_na_sentinel=False)
+        else:
+            country_codes, countries = np.zeros(len(ns), dtype=np.intp), np.array([np.nan])
+
+        # Dense cell key, ordered by date, hour, then first appearance of the country
+        first_day = day.min() if len(day) else 0
+        key = ((day - first_day) * _N_HOURS + hour) * len(countries) + country_codes
+        cell_keys, cell_of_row = np.unique(key, return_inverse=True)
+        n_cells = len(cell_keys)
+
+        quantity = df['Quantity'].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+        value = df['TotalValue'].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+        has_quantity, has_value = ~np.isnan(quantity), ~np.isnan(value)
+        quantity = np.where(has_quantity, quantity, 0)
+        value = np.where(has_value, value, 0)
+        quantity_sum = np.bincount(cell_of_row, quantity, minlength=n_cells)
+        if pd.api.types.is_integer_dtype(df['Quantity']):
+            # Integer quantities sum exactly in float64 up to 2**53
+            quantity_sum = quantity_sum.astype(np.int64)
+
+        cell_country = cell_keys % len(countries)
+        cell_slot = cell_keys // len(countries)
+        cells = pd.DataFrame({
+            'Date': ((cell_slot // _N_HOURS + first_day) * _NS_PER_DAY).astype('datetime64[ns]'),
+            'Hour': (cell_slot % _N_HOURS).astype(np.int8),
+            'Country': countries[cell_country],
+            'Quantity_Sum': quantity_sum,
+            'Quantity_Count': np.bincount(cell_of_row[has_quantity], minlength=n_cells),
+            'Quantity_SumSq': np.bincount(cell_of_row, quantity * quantity, minlength=n_cells),
+            'Value_Sum': np.bincount(cell_of_row, value, minlength=n_cells),
+            'Value_Count': np.bincount(cell_of_row[has_value], minlength=n_cells),
+            'Value_SumSq': np.bincount(cell_of_row, value * value, minlength=n_cells),
+        })
+
+        # Invoice sets; missing invoice numbers are not counted, as in nunique
+        invoice_values = df['InvoiceNo'].to_numpy()[valid]
+        invoice_codes, invoices = pd.factorize(invoice_values)
+        has_invoice = invoice_codes >= 0
+        pairs = _sorted_unique(cell_of_row[has_invoice].astype(np.int64) * max(len(invoices), 1)
+                          + invoice_codes[has_invoice])
+        pair_cells = (pairs // max(len(invoices), 1)).astype(np.int32)
+        pair_invoices = (pairs % max(len(invoices), 1)).astype(np.int32)
+
+        return cls(cells, pair_cells, pair_invoices, np.asarray(invoices))
+
+    def to_frames(self):
+        """
+        The cube as two flat tables, e.g. for storage.
+
+        Returns:
+        --------
+        tuple
+            (cells, invoices): the cells table, and one row per distinct
+            (Date, Hour, Country, InvoiceNo) with invoice numbers as strings
+        """
+        invoices = self.cells[CELL_KEYS].iloc[self.pair_cells].reset_index(drop=True)
+        invoices['InvoiceNo'] = self.invoices[self.pair_invoices].astype(str)
+        return self.cells.reset_index(drop=True), invoices
+
+    @classmethod
+    def from_frames(cls, cells, invoices):
+        """
+        Cube from cell and invoice tables, merging repeated cells.
+
+        Rows of ``cells`` with the same (Date, Hour, Country) are partial
+        aggregates of one cell and are summed; invoice rows are deduplicated.
+
+        Parameters:
+        -----------
+        cells : pd.DataFrame
+            CELL_KEYS and CELL_STATS columns
+        invoices : pd.DataFrame
+            CELL_KEYS and InvoiceNo columns
+
+        Returns:
+        --------
+        TemporalCube
+        """
+        merged = (cells.groupby(CELL_KEYS, sort=True, dropna=False, observed=True)[CELL_STATS]
+                       .sum().reset_index())
+        merged['Hour'] = merged['Hour'].astype(np.int8)
+        cell_index = pd.MultiIndex.from_frame(merged[CELL_KEYS])
+
+        pair_cell_of_row = cell_index.get_indexer(pd.MultiIndex.from_frame(invoices[CELL_KEYS]))
+        if (pair_cell_of_row < 0).any():
+            raise ValueError("Invoice rows reference cells missing from the cells table")
+        invoice_codes, invoice_values = pd.factorize(invoices['InvoiceNo'].astype(str))
+        n_invoices = max(len(invoice_values), 1)
+        pairs = _sorted_unique(pair_cell_of_row.astype(np.int64) * n_invoices + invoice_codes)
+
+        return cls(merged, (pairs // n_invoices).astype(np.int32),
+                   (pairs % n_invoices).astype(np.int32), np.asarray(invoice_values))
+
+    @classmethod
+    def merge(cls, cubes):
+        """
+        Combine cubes of separate batches of transactions.
+
+        The result equals the cube of all the batches' rows together,
+        including exact distinct-invoice counts across batches.
+
+        Parameters:
+        -----------
+        cubes : list of TemporalCube
+
+        Returns:
+        --------
+        TemporalCube
+        """
+        frames = [cube.to_frames() for cube in cubes]
+        return cls.from_frames(pd.concat([cells for cells, _ in frames], ignore_index=True),
+                               pd.concat([invoices for _, invoices in frames],
+                                         ignore_index=True))
+
+    def _dimension(self, name, cells):
+        """Values of one rollup dimension for each cell."""
+        dates = cells['Date'].dt
+        if name in ('Date', 'Country'):
+            return cells[name]
+        if name == 'Hour':
+            # Stored as int8; rolled up as int32, like the other calendar
+            # dimensions and ``Series.dt.hour``
+            return cells['Hour'].astype(np.int32)
+        if name == 'DayOfWeek':
+            return dates.dayofweek
+        if name == 'Month':
+            return dates.month
+        if name == 'Quarter':
+            return dates.quarter
+        if name == 'Year':
+            return dates.year
+        if name == 'Season':
+            return pd.Series(pd.Categorical.from_codes(_SEASON_CODES[dates.month.to_numpy()],
+                                                       dtype=SEASON_DTYPE), index=cells.index)
+        if name == 'YearMonth':
+            return dates.to_period('M')
+        if name == 'YearQuarter':
+            return dates.to_period('Q')
+        raise ValueError(f"Unknown cube dimension: {name}")
+
+    def rollup(self, by, countries=None, date_range=None, with_std=False):
+        """
+        Aggregate the cube to one or more granularities.
+
+        Parameters:
+        -----------
+        by : str or list of str
+            Dimension(s) from CUBE_DIMENSIONS, e.g. 'Hour' or
+            ['Country', 'YearMonth']
+        countries : list of str, optional
+            Only include these countries
+        date_range : tuple, optional
+            (start, end) dates, start inclusive and end exclusive; either
+            may be None
+        with_std : bool, default=False
+            Add Std_Quantity and Std_Value (sample standard deviations,
+            from the sums of squares)
+
+        Returns:
+        --------
+        pd.DataFrame
+            CUBE_STATS columns indexed by the requested dimension(s)
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        keep = np.ones(len(self.cells), dtype=bool)
+        if countries is not None:
+            keep &= self.cells['Country'].isin(list(countries)).to_numpy()
+        if date_range is not None:
+            start, end = date_range
+            if start is not None:
+                keep &= (self.cells['Date'] >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                keep &= (self.cells['Date'] < pd.Timestamp(end)).to_numpy()
+        cells = self.cells[keep]
+
+        keys = pd.DataFrame({name: self._dimension(name, cells) for name in by})
+        grouper = keys.groupby(by, sort=True, observed=True)
+        index = grouper.size().index
+        # -1 marks cells with a missing key, which groupby drops
+        group_of_cell = grouper.ngroup().to_numpy()
+        grouped = group_of_cell >= 0
+
+        def total(column):
+            return np.bincount(group_of_cell[grouped], cells[column].to_numpy()[grouped],
+                               minlength=len(index))
+
+        quantity_sum, quantity_count = total('Quantity_Sum'), total('Quantity_Count')
+        value_sum, value_count = total('Value_Sum'), total('Value_Count')
+        if pd.api.types.is_integer_dtype(cells['Quantity_Sum']):
+            quantity_sum = quantity_sum.astype(np.int64)
+
+        # Exact distinct invoices: deduplicate (group, invoice) pairs
+        cell_group = np.full(len(self.cells), -1, dtype=np.int64)
+        cell_group[np.flatnonzero(keep)] = group_of_cell
+        pair_group = cell_group[self.pair_cells]
+        in_scope = pair_group >= 0
+        n_invoices = max(len(self.invoices), 1)
+        distinct = _sorted_unique(pair_group[in_scope] * n_invoices + self.pair_invoices[in_scope])
+        unique_invoices = np.bincount(distinct // n_invoices, minlength=len(index))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = pd.DataFrame({
+                'Total_Quantity': quantity_sum,
+                'Avg_Quantity': quantity_sum / quantity_count,
+                'Num_Transactions': quantity_count.astype(np.int64),
+                'Total_Value': value_sum,
+                'Avg_Value': value_sum / value_count,
+                'Unique_Invoices': unique_invoices,
+            }, index=index)
+            if with_std:
+                for name, n, total_sum, sumsq in (
+                    ('Std_Quantity', quantity_count, quantity_sum, total('Quantity_SumSq')),
+                    ('Std_Value', value_count, value_sum, total('Value_SumSq')),
+                ):
+                    variance = (sumsq - total_sum * total_sum / n) / (n - 1)
+                    result[name] = np.sqrt(np.maximum(variance, 0))
+        return result
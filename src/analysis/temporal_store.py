@@ -0,0 +1,150 @@
+"""
+Module for an append-only store of temporal aggregates.
+
+Rather than recomputing every temporal aggregate from the full history
+after each data load, the TemporalStore keeps the mergeable per-day
+partials of a TemporalCube on disk. Each ``append`` aggregates only the new
+rows and writes them as a new part (a cells and an invoices Parquet file);
+nothing already stored is rewritten. A date-range query reads just the
+parts and row groups overlapping the range and merges their partials, which
+gives exactly the cube -- and so the hourly, daily and monthly statistics --
+of a full recompute over those dates.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .temporal_cube import TemporalCube
+
+_MANIFEST = 'manifest.json'
+
+
+class TemporalStore:
+    """
+    Directory of TemporalCube partials, one part per appended batch.
+
+    Parameters:
+    -----------
+    path : str
+        Store directory, created on first append
+
+    Examples:
+    ---------
+    >>> store = TemporalStore('data/processed/temporal_store')
+    >>> store.append(todays_transactions)
+    >>> analyze_hourly(store.query('2011-11-01', '2011-12-01'))
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        manifest = self.path / _MANIFEST
+        self.parts = json.loads(manifest.read_text())['parts'] if manifest.exists() else []
+
+    def __len__(self):
+        return len(self.parts)
+
+    def _write_manifest(self):
+        # Written last and atomically: a part exists once the manifest lists it
+        tmp = self.path / f"{_MANIFEST}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps({'parts': self.parts}, indent=2))
+        os.replace(tmp, self.path / _MANIFEST)
+
+    def _write_part(self, cube, name):
+        cells, invoices = cube.to_frames()
+        cells.to_parquet(self.path / f"{name}.cells.parquet", index=False)
+        invoices.to_parquet(self.path / f"{name}.invoices.parquet", index=False)
+        return {
+            'name': name,
+            'start': cells['Date'].min().isoformat() if len(cells) else None,
+            'end': cells['Date'].max().isoformat() if len(cells) else None,
+            'cells': len(cells),
+        }
+
+    def append(self, df):
+        """
+        Add a batch of transactions, in time proportional to the batch.
+
+        Batches may overlap dates already stored (e.g. late-arriving rows);
+        their partials are merged at query time.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            New transactions, as for TemporalCube.from_transactions
+
+        Returns:
+        --------
+        dict
+            Manifest entry of the new part
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        number = max((int(p['name'].split('-')[1]) for p in self.parts), default=0) + 1
+        part = self._write_part(TemporalCube.from_transactions(df), f"part-{number:06d}")
+        self.parts.append(part)
+        self._write_manifest()
+        return part
+
+    def query(self, start=None, end=None):
+        """
+        Cube of the stored transactions dated within a range.
+
+        The cube is stored by day, so both bounds are truncated to their
+        date: a time of day on either bound is ignored.
+
+        Parameters:
+        -----------
+        start : str or datetime, optional
+            First date included
+        end : str or datetime, optional
+            First date excluded
+
+        Returns:
+        --------
+        TemporalCube
+            Equal to ``TemporalCube.from_transactions`` over the same rows
+        """
+        start = pd.Timestamp(start).normalize() if start is not None else None
+        end = pd.Timestamp(end).normalize() if end is not None else None
+        filters = ([('Date', '>=', start.to_pydatetime())] if start is not None else []) + \
+                  ([('Date', '<', end.to_pydatetime())] if end is not None else [])
+
+        cells, invoices = [], []
+        for part in self.parts:
+            if part['start'] is None:
+                continue
+            if start is not None and pd.Timestamp(part['end']) < start:
+                continue
+            if end is not None and pd.Timestamp(part['start']) >= end:
+                continue
+            for frames, kind in ((cells, 'cells'), (invoices, 'invoices')):
+                table = pq.read_table(self.path / f"{part['name']}.{kind}.parquet",
+                                      filters=filters or None, memory_map=True)
+                frames.append(table.to_pandas())
+
+        if not cells:
+            return TemporalCube.from_transactions(pd.DataFrame({
+                'InvoiceDate': pd.Series(dtype='datetime64[ns]'), 'InvoiceNo': [],
+                'Quantity': pd.Series(dtype='int64'), 'TotalValue': pd.Series(dtype='float64'),
+            }))
+        return TemporalCube.from_frames(pd.concat(cells, ignore_index=True),
+                                        pd.concat(invoices, ignore_index=True))
+
+    def compact(self):
+        """
+        Merge all parts into one, so queries read a single part.
+
+        The merged part is written before the old ones are removed.
+        """
+        if len(self.parts) < 2:
+            return
+        old_parts = self.parts
+        number = max(int(p['name'].split('-')[1]) for p in old_parts) + 1
+        self.parts = [self._write_part(self.query(), f"part-{number:06d}")]
+        self._write_manifest()
+        for part in old_parts:
+            for kind in ('cells', 'invoices'):
+                (self.path / f"{part['name']}.{kind}.parquet").unlink(missing_ok=True)
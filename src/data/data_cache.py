@@ -0,0 +1,360 @@
+"""
+Module for caching parsed CSV datasets as typed Parquet files.
+
+Parsing the UCI CSV with default type inference is slow and leaves every
+code column as Python objects. The first load writes a typed copy
+(categoricals, datetime64, lossless int32/float32 downcasts) next to the
+source in a ``.cache`` directory; later loads read it memory-mapped. A
+sidecar JSON file records the source's size, mtime and SHA-256, so the
+cache is rebuilt automatically when the CSV changes.
+
+Reads can project columns and filter rows. Against the cache, filters are
+pushed into pyarrow, which skips whole row groups using their min/max
+statistics; without the cache the CSV is read in chunks with ``usecols``
+and each chunk is filtered before the next is parsed.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Bump when the conversion rules change, so old caches are rebuilt
+CACHE_FORMAT_VERSION = 2
+
+# Rows per Parquet row group
+ROW_GROUP_SIZE = 65_536
+
+# Rows per chunk when filtering a CSV without the cache
+CSV_CHUNK_SIZE = 200_000
+
+_FILTER_OPS = ('==', '=', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+
+def file_sha256(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(file_path, tag, cache_dir=None):
+    """
+    Parquet and sidecar metadata paths of a source file's cache.
+
+    Parameters:
+    -----------
+    file_path : str
+        Source CSV
+    tag : str
+        Distinguishes caches of the same file built by different loaders
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the source
+
+    Returns:
+    --------
+    tuple
+        (parquet_path, metadata_path)
+    """
+    source = Path(file_path).resolve()
+    directory = Path(cache_dir) if cache_dir else source.parent / '.cache'
+    stem = f"{source.stem}.{tag}"
+    return directory / f"{stem}.parquet", directory / f"{stem}.json"
+
+
+def _source_state(file_path):
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_fresh(file_path, parquet_path, meta_path, options):
+    """Whether the cache matches the source file, refreshing a stale mtime."""
+    if not (parquet_path.exists() and meta_path.exists()):
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return False
+    if meta.get('version') != CACHE_FORMAT_VERSION or meta.get('options') != options:
+        return False
+
+    state = _source_state(file_path)
+    if meta.get('size') != state['size']:
+        return False
+    if meta.get('mtime_ns') == state['mtime_ns']:
+        return True
+
+    # Touched but possibly unchanged: fall back to comparing content hashes
+    if meta.get('sha256') != file_sha256(file_path):
+        return False
+    meta.update(state)
+    meta_path.write_text(json.dumps(meta, indent=2))
+    return True
+
+
+def downcast_numeric(df):
+    """
+    Downcast numeric columns to int32/float32 where no value changes.
+
+    Integer columns are narrowed when their range fits int32; float columns
+    only when every value round-trips through float32 exactly (e.g. IDs
+    stored as floats), so prices and other decimals keep full precision.
+    """
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_integer_dtype(values) and values.dtype.itemsize > 4:
+            info = np.iinfo(np.int32)
+            if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                df[col] = values.astype(np.int32)
+        elif pd.api.types.is_float_dtype(values) and values.dtype.itemsize > 4:
+            narrowed = values.to_numpy().astype(np.float32)
+            if np.array_equal(narrowed.astype(np.float64), values.to_numpy(), equal_nan=True):
+                df[col] = narrowed
+    return df
+
+
+def categorize(df, columns=None, max_ratio=0.5):
+    """
+    Convert string columns to categoricals.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Frame converted in place
+    columns : list of str, optional
+        Columns to convert; if None, every object column whose distinct
+        values are at most ``max_ratio`` of its rows
+    max_ratio : float, default=0.5
+        Cardinality limit used when ``columns`` is None
+    """
+    if columns is None:
+        columns = [col for col in df.columns
+                   if df[col].dtype == object and df[col].nunique() <= max_ratio * len(df)]
+    for col in columns:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def normalize_filters(filters):
+    """
+    Filters as a list of AND-ed groups that are OR-ed together (pyarrow DNF).
+
+    Parameters:
+    -----------
+    filters : list, optional
+        ``(column, op, value)`` tuples, all of which must hold, or a list of
+        such lists, any of which must hold. ``op`` is one of '==', '!=',
+        '<', '<=', '>', '>=', 'in' or 'not in'.
+
+    Returns:
+    --------
+    list of list of tuple or None
+    """
+    if not filters:
+        return None
+    groups = [filters] if isinstance(filters[0], tuple) else filters
+    for group in groups:
+        for col, op, value in group:
+            if op not in _FILTER_OPS:
+                raise ValueError(f"Unknown filter operator: {op}")
+    return [list(group) for group in groups]
+
+
+def filter_columns(filters):
+    """Columns referenced by normalized filters, in first-use order."""
+    return list(dict.fromkeys(col for group in filters or [] for col, _, _ in group))
+
+
+def _coerce(values, value):
+    """Filter value in the type of the column it is compared with."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if isinstance(value, (list, tuple, set)):
+            return [pd.Timestamp(v) for v in value]
+        return pd.Timestamp(value)
+    return value
+
+
+def filter_mask(df, filters):
+    """
+    Boolean mask of the rows of ``df`` that pass normalized filters.
+
+    Missing values fail every comparison, as in pyarrow.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    for group in filters:
+        keep = np.ones(len(df), dtype=bool)
+        for col, op, value in group:
+            values = df[col]
+            value = _coerce(values, value)
+            if op in ('==', '='):
+                passed = values == value
+            elif op == '!=':
+                passed = (values != value) & values.notna()
+            elif op == '<':
+                passed = values < value
+            elif op == '<=':
+                passed = values <= value
+            elif op == '>':
+                passed = values > value
+            elif op == '>=':
+                passed = values >= value
+            elif op == 'in':
+                passed = values.isin(list(value))
+            else:
+                passed = ~values.isin(list(value)) & values.notna()
+            keep &= np.asarray(passed, dtype=bool)
+        mask |= keep
+    return mask
+
+
+def _arrow_filters(filters, schema):
+    """Normalized filters with values pyarrow can compare to each column."""
+    arrow = []
+    for group in filters:
+        converted = []
+        for col, op, value in group:
+            if col in schema.names and pa.types.is_timestamp(schema.field(col).type):
+                value = ([pd.Timestamp(v).to_pydatetime() for v in value]
+                         if isinstance(value, (list, tuple, set))
+                         else pd.Timestamp(value).to_pydatetime())
+            converted.append((col, '==' if op == '=' else op, value))
+        arrow.append(converted)
+    return arrow
+
+
+def read_parquet(path, columns=None, filters=None):
+    """
+    Memory-mapped Parquet read with column projection and row-group pruning.
+
+    Parameters:
+    -----------
+    path : str
+        Parquet file
+    columns : list of str, optional
+        Columns to return; all if None
+    filters : list, optional
+        Normalized filters (see ``normalize_filters``)
+
+    Returns:
+    --------
+    pd.DataFrame
+    """
+    if filters:
+        filters = _arrow_filters(filters, pq.read_schema(path))
+    table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+    df = table.to_pandas()
+    if filters:
+        # Dictionaries are stored whole; keep only the selected rows' values
+        for col in df.select_dtypes('category').columns:
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def read_csv_filtered(file_path, columns=None, filters=None, convert=None,
+                      chunksize=CSV_CHUNK_SIZE, **read_kwargs):
+    """
+    Read only the needed columns of a CSV, filtering rows chunk by chunk.
+
+    Parameters:
+    -----------
+    file_path : str
+        Source CSV
+    columns : list of str, optional
+        Columns to return; all if None
+    filters : list, optional
+        Normalized filters (see ``normalize_filters``)
+    convert : callable, optional
+        Applied to each chunk before filtering (e.g. date parsing)
+    chunksize : int, default=CSV_CHUNK_SIZE
+        Rows parsed at a time when filtering
+    **read_kwargs
+        Passed to ``pd.read_csv``
+
+    Returns:
+    --------
+    pd.DataFrame
+    """
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + filter_columns(filters)))
+    if not filters:
+        df = pd.read_csv(file_path, usecols=usecols, **read_kwargs)
+        df = convert(df) if convert else df
+    else:
+        chunks = []
+        for chunk in pd.read_csv(file_path, usecols=usecols, chunksize=chunksize, **read_kwargs):
+            chunk = convert(chunk) if convert else chunk
+            chunks.append(chunk[filter_mask(chunk, filters)])
+        df = pd.concat(chunks, ignore_index=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def load_cached(file_path, build, tag, cache_dir=None, options=None, columns=None,
+                filters=None):
+    """
+    Return the typed frame for ``file_path``, building its cache if needed.
+
+    Parameters:
+    -----------
+    file_path : str
+        Source CSV
+    build : callable
+        ``build(file_path)`` parses the source into the typed frame to cache
+    tag : str
+        Cache name suffix for this loader
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the source
+    options : dict, optional
+        Loader options (e.g. encoding); a change invalidates the cache
+    columns : list of str, optional
+        Columns to return; all if None
+    filters : list, optional
+        Normalized row filters, pushed down to the Parquet reader
+
+    Returns:
+    --------
+    pd.DataFrame
+        The typed dataset
+    """
+    options = options or {}
+    parquet_path, meta_path = cache_paths(file_path, tag, cache_dir)
+
+    if _is_fresh(file_path, parquet_path, meta_path, options):
+        return read_parquet(parquet_path, columns=columns, filters=filters)
+
+    state = _source_state(file_path)
+    df = build(file_path)
+    tmp_path = parquet_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_path, engine='pyarrow', index=False, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, parquet_path)
+        meta_path.write_text(json.dumps({
+            'version': CACHE_FORMAT_VERSION,
+            'source': str(Path(file_path).resolve()),
+            'options': options,
+            'sha256': file_sha256(file_path),
+            **state,
+        }, indent=2))
+    except (OSError, pa.ArrowException) as e:
+        tmp_path.unlink(missing_ok=True)
+        warnings.warn(f"Could not write data cache {parquet_path}: {e}")
+    else:
+        if columns is not None or filters:
+            return read_parquet(parquet_path, columns=columns, filters=filters)
+        return df
+
+    if filters:
+        df = df[filter_mask(df, filters)].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
@@ -1,33 +1,109 @@
 """
 Module for loading retail transaction data.
+
+Both loaders cache a typed Parquet copy of the CSV (see ``data_cache``), so
+only the first load pays for CSV parsing and type conversion. Column
+projection and row filters are pushed down into the reader, so a load costs
+time and memory in proportion to the selected subset.
 """
 
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from .data_cache import (
+    load_cached, categorize, downcast_numeric, normalize_filters, read_csv_filtered
+)
+
+# UCI Online Retail columns stored as categoricals in the cache
+RETAIL_CATEGORICAL_COLUMNS = ['InvoiceNo', 'StockCode', 'Description', 'Country']
+
+# Codes such as 85123A and 22423 share a column; read them all as text so
+# chunked type inference cannot split one column into ints and strings
+RETAIL_TEXT_DTYPES = {column: str for column in RETAIL_CATEGORICAL_COLUMNS}
+
+
+def _parse_dates(df):
+    if 'InvoiceDate' in df.columns:
+        df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
+    return df
+
+
+def _read_retail_csv(file_path, encoding, columns=None, filters=None):
+    """Parse the UCI CSV into compact, lossless dtypes."""
+    df = read_csv_filtered(file_path, columns=columns, filters=filters,
+                           convert=_parse_dates, encoding=encoding,
+                           dtype=RETAIL_TEXT_DTYPES)
+    categorize(df, RETAIL_CATEGORICAL_COLUMNS)
+    return downcast_numeric(df)
+
 
-def load_retail_data(file_path, encoding='latin-1'):
+def _read_kaggle_csv(file_path, encoding, columns=None, filters=None):
+    """Parse the Kaggle CSV; repeated strings become categoricals."""
+    df = read_csv_filtered(file_path, columns=columns, filters=filters, encoding=encoding)
+    categorize(df)
+    return downcast_numeric(df)
+
+
+def _with_date_range(filters, date_range, date_col):
+    """Normalized filters with an inclusive-start, exclusive-end date range added."""
+    filters = normalize_filters(filters)
+    if date_range is None:
+        return filters
+    start, end = date_range
+    bounds = ([(date_col, '>=', pd.Timestamp(start))] if start is not None else []) + \
+             ([(date_col, '<', pd.Timestamp(end))] if end is not None else [])
+    if not bounds:
+        return filters
+    return [group + bounds for group in filters] if filters else [bounds]
+
+
+def load_retail_data(file_path, encoding='latin-1', columns=None, filters=None,
+                     date_range=None, use_cache=True, cache_dir=None):
     """
     Load the UCI Online Retail dataset.
     
+    InvoiceDate is parsed to datetime64, code and country columns are
+    categoricals, and numeric columns are narrowed to int32/float32 only
+    where every value is preserved (UnitPrice stays float64).
+    
     Parameters:
     -----------
     file_path : str
         Path to the CSV file
     encoding : str, default='latin-1'
         File encoding
+    columns : list of str, optional
+        Columns to load; all if None
+    filters : list, optional
+        Row filters as ``(column, op, value)`` tuples that must all hold
+        (or a list of such lists, any of which must hold), e.g.
+        ``[('Country', '==', 'France')]``. Ops: '==', '!=', '<', '<=', '>',
+        '>=', 'in', 'not in'.
+    date_range : tuple, optional
+        (start, end) InvoiceDate bounds, start inclusive and end exclusive;
+        either may be None
+    use_cache : bool, default=True
+        Read from (and on first load, write) a typed Parquet cache, rebuilt
+        whenever the CSV changes
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the CSV
         
     Returns:
     --------
     pd.DataFrame
         Loaded dataset
     """
-    df = pd.read_csv(file_path, encoding=encoding)
-    return df
+    filters = _with_date_range(filters, date_range, 'InvoiceDate')
+    if not use_cache:
+        return _read_retail_csv(file_path, encoding, columns=columns, filters=filters)
+    return load_cached(file_path, lambda path: _read_retail_csv(path, encoding), 'retail',
+                       cache_dir=cache_dir, options={'encoding': encoding},
+                       columns=columns, filters=filters)
 
 
-def load_kaggle_data(file_path, encoding='utf-8'):
+def load_kaggle_data(file_path, encoding='utf-8', columns=None, filters=None,
+                     use_cache=True, cache_dir=None):
     """
     Load Kaggle grocery dataset.
     
@@ -37,12 +113,24 @@ def load_kaggle_data(file_path, encoding='utf-8'):
         Path to the CSV file
     encoding : str, default='utf-8'
         File encoding
+    columns : list of str, optional
+        Columns to load; all if None
+    filters : list, optional
+        Row filters, as in load_retail_data
+    use_cache : bool, default=True
+        Read from (and on first load, write) a typed Parquet cache, rebuilt
+        whenever the CSV changes
+    cache_dir : str, optional
+        Cache directory; defaults to ``.cache`` next to the CSV
         
     Returns:
     --------
     pd.DataFrame
         Loaded dataset
     """
-    df = pd.read_csv(file_path, encoding=encoding)
-    return df
-
+    filters = normalize_filters(filters)
+    if not use_cache:
+        return _read_kaggle_csv(file_path, encoding, columns=columns, filters=filters)
+    return load_cached(file_path, lambda path: _read_kaggle_csv(path, encoding), 'kaggle',
+                       cache_dir=cache_dir, options={'encoding': encoding},
+                       columns=columns, filters=filters)
@@ -6,6 +6,19 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+SEASONS = ['Winter', 'Spring', 'Summer', 'Autumn']
+
+# Ordered categoricals used by create_features(compact=True)
+DAY_NAME_DTYPE = pd.CategoricalDtype(DAY_NAMES, ordered=True)
+MONTH_NAME_DTYPE = pd.CategoricalDtype(MONTH_NAMES, ordered=True)
+SEASON_DTYPE = pd.CategoricalDtype(SEASONS, ordered=True)
+
+_FEATURE_COLUMNS = ['TotalValue', 'Hour', 'DayOfWeek', 'DayName', 'Month', 'MonthName',
+                    'Year', 'Quarter', 'Date', 'Season']
+
 
 def clean_data(df):
     """
@@ -21,63 +34,107 @@ def clean_data(df):
     pd.DataFrame
         Cleaned dataset
     """
-    df_clean = df.copy()
-    
-    # Remove rows with negative quantities
-    df_clean = df_clean[df_clean['Quantity'] > 0]
-    
-    # Remove rows with zero or negative prices
-    df_clean = df_clean[df_clean['UnitPrice'] > 0]
+    # One combined mask, so the frame is copied once rather than per step:
+    # positive quantities and prices, no cancelled invoices (typically
+    # starting with 'C') and no missing critical information
+    keep = (
+        (df['Quantity'] > 0)
+        & (df['UnitPrice'] > 0)
+        & ~df['InvoiceNo'].astype(str).str.startswith('C')
+        & df[['InvoiceNo', 'StockCode', 'Description']].notna().all(axis=1)
+    )
+    df_clean = df[keep].copy(deep=False)
     
-    # Remove cancelled invoices (typically start with 'C')
-    df_clean = df_clean[~df_clean['InvoiceNo'].astype(str).str.startswith('C')]
-    
-    # Convert InvoiceDate to datetime
-    df_clean['InvoiceDate'] = pd.to_datetime(df_clean['InvoiceDate'])
-    
-    # Remove rows with missing critical information
-    df_clean = df_clean.dropna(subset=['InvoiceNo', 'StockCode', 'Description'])
+    # Convert InvoiceDate to datetime (already done by the cached loader)
+    if not pd.api.types.is_datetime64_any_dtype(df_clean['InvoiceDate']):
+        df_clean['InvoiceDate'] = pd.to_datetime(df_clean['InvoiceDate'])
     
     return df_clean
 
 
-def create_features(df):
+def create_features(df, compact=False, report_memory=False):
     """
     Create derived features from the cleaned dataset.
     
+    The input frame is not modified, but its columns are shared with the
+    result rather than copied, so ``create_features(clean_data(df))``
+    holds each original column once.
+    
     Parameters:
     -----------
     df : pd.DataFrame
         Cleaned dataset
+    compact : bool, default=False
+        Store features compactly: ordered categoricals for DayName,
+        MonthName and Season, int8 Hour/DayOfWeek/Month/Quarter, int16
+        Year, and Date as datetime64 midnights instead of ``datetime.date``
+        objects. Values, ordering and grouping are unchanged.
+    report_memory : bool, default=False
+        Print the memory added by the new features
         
     Returns:
     --------
     pd.DataFrame
         Dataset with new features
     """
-    df_featured = df.copy()
+    df_featured = df.copy(deep=False)
+    if report_memory:
+        before = df_featured.memory_usage(deep=True).sum()
     
     # Calculate total transaction value
     df_featured['TotalValue'] = df_featured['Quantity'] * df_featured['UnitPrice']
     
     # Extract temporal features
-    df_featured['Hour'] = df_featured['InvoiceDate'].dt.hour
-    df_featured['DayOfWeek'] = df_featured['InvoiceDate'].dt.dayofweek
-    df_featured['DayName'] = df_featured['InvoiceDate'].dt.day_name()
-    df_featured['Month'] = df_featured['InvoiceDate'].dt.month
-    df_featured['MonthName'] = df_featured['InvoiceDate'].dt.month_name()
-    df_featured['Year'] = df_featured['InvoiceDate'].dt.year
-    df_featured['Quarter'] = df_featured['InvoiceDate'].dt.quarter
-    
-    # Extract date components
-    df_featured['Date'] = df_featured['InvoiceDate'].dt.date
+    dates = df_featured['InvoiceDate'].dt
+    if compact:
+        df_featured['Hour'] = _small_int(dates.hour, np.int8)
+        df_featured['DayOfWeek'] = _small_int(dates.dayofweek, np.int8)
+        df_featured['Month'] = _small_int(dates.month, np.int8)
+        df_featured['Year'] = _small_int(dates.year, np.int16)
+        df_featured['Quarter'] = _small_int(dates.quarter, np.int8)
+        df_featured['Date'] = dates.normalize()
+        
+        # Category codes; -1 marks a missing InvoiceDate
+        weekday = dates.dayofweek.fillna(-1).to_numpy(dtype=np.int8)
+        month = dates.month.fillna(0).to_numpy(dtype=np.int8)
+        df_featured['DayName'] = pd.Categorical.from_codes(weekday, dtype=DAY_NAME_DTYPE)
+        df_featured['MonthName'] = pd.Categorical.from_codes(month - 1, dtype=MONTH_NAME_DTYPE)
+        df_featured['Season'] = pd.Categorical.from_codes(_SEASON_CODES[month],
+                                                          dtype=SEASON_DTYPE)
+        
+        # Keep the legacy column order; features already in df stay in place
+        df_featured = df_featured[list(df.columns)
+                                  + [c for c in _FEATURE_COLUMNS if c not in df.columns]]
+    else:
+        df_featured['Hour'] = dates.hour
+        df_featured['DayOfWeek'] = dates.dayofweek
+        df_featured['DayName'] = dates.day_name()
+        df_featured['Month'] = dates.month
+        df_featured['MonthName'] = dates.month_name()
+        df_featured['Year'] = dates.year
+        df_featured['Quarter'] = dates.quarter
+        
+        # Extract date components
+        df_featured['Date'] = dates.date
+        
+        # Determine season
+        df_featured['Season'] = df_featured['Month'].map(_MONTH_SEASONS)
     
-    # Determine season
-    df_featured['Season'] = df_featured['Month'].apply(get_season)
+    if report_memory:
+        after = df_featured.memory_usage(deep=True).sum()
+        print(f"create_features: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB "
+              f"(+{(after - before) / 1e6:.1f} MB)")
     
     return df_featured
 
 
+def _small_int(values, dtype):
+    """Narrow an integer feature; nullable when InvoiceDate has gaps."""
+    if values.isna().any():
+        return values.astype(pd.Int8Dtype() if dtype == np.int8 else pd.Int16Dtype())
+    return values.astype(dtype)
+
+
 def get_season(month):
     """
     Map month to season.
@@ -101,3 +158,9 @@ def get_season(month):
     else:
         return 'Autumn'
 
+
+_MONTH_SEASONS = {month: get_season(month) for month in range(1, 13)}
+
+# Season category code by month number (index 0 marks a missing month)
+_SEASON_CODES = np.array([-1] + [SEASONS.index(_MONTH_SEASONS[m]) for m in range(1, 13)],
+                         dtype=np.int8)
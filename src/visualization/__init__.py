@@ -4,9 +4,16 @@ Visualization modules for retail analysis.
 
 from .interactive_charts import create_country_dashboard, plot_interactive_sales
 from .static_plots import plot_temporal_patterns, plot_customer_segments
+from .chart_data import (
+    DEFAULT_POINT_BUDGET, lttb_indices, downsample_series, stratified_sample, density_bins,
+    scatter_data
+)
+from .report_renderer import render_report
 
 __all__ = [
     'create_country_dashboard', 'plot_interactive_sales',
-    'plot_temporal_patterns', 'plot_customer_segments'
+    'plot_temporal_patterns', 'plot_customer_segments',
+    'DEFAULT_POINT_BUDGET', 'lttb_indices', 'downsample_series', 'stratified_sample',
+    'density_bins', 'scatter_data', 'render_report'
 ]
 
@@ -0,0 +1,224 @@
+"""
+Module for reducing chart data to a fixed point budget.
+
+Charts stay responsive only if the number of points they draw does not grow
+with the dataset. Time series are downsampled with Largest-Triangle-Three-
+Buckets (LTTB), which keeps the peaks and troughs that define a line's
+shape; scatter plots are either sampled stratified by group (e.g. customer
+cluster), so small clusters stay visible, or binned into a 2-D density grid.
+Data already within the budget is returned unchanged.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Points per chart unless the caller asks otherwise
+DEFAULT_POINT_BUDGET = 5_000
+
+SCATTER_METHODS = ('sample', 'bins')
+
+
+def _numeric(values):
+    """Values as float64, with datetimes as nanoseconds."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points are always kept. The rest of the series is
+    split into ``n_out - 2`` equal buckets, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    next bucket's average is kept.
+
+    Parameters:
+    -----------
+    x : array-like
+        Sorted x values (numbers or datetimes)
+    y : array-like
+        y values
+    n_out : int
+        Points to keep
+
+    Returns:
+    --------
+    np.ndarray
+        Sorted indices into x and y
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.intp)
+
+    x, y = _numeric(x), _numeric(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+
+    # Bucket averages from prefix sums; the last "next bucket" is the end point
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    starts, ends = edges[1:], np.append(edges[2:], n)
+    avg_x = (cum_x[ends] - cum_x[starts]) / (ends - starts)
+    avg_y = (cum_y[ends] - cum_y[starts]) / (ends - starts)
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(df, x, y, budget=DEFAULT_POINT_BUDGET):
+    """
+    LTTB-downsample a time series frame to at most ``budget`` rows.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Series data sorted by ``x``
+    x, y : str
+        Columns for the x and y axes
+    budget : int, default=DEFAULT_POINT_BUDGET
+        Maximum rows returned
+
+    Returns:
+    --------
+    pd.DataFrame
+        The kept rows, in order
+    """
+    if len(df) <= budget:
+        return df
+    df = df[df[y].notna()]
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), budget)]
+
+
+def stratified_sample(df, by, budget=DEFAULT_POINT_BUDGET, random_state=42):
+    """
+    Random sample of at most ``budget`` rows, stratified by group.
+
+    Each group first gets up to a quarter of an even share of the budget,
+    so small groups remain visible; the rest is split in proportion to
+    group size.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Rows to sample
+    by : str
+        Group column, e.g. 'Cluster'
+    budget : int, default=DEFAULT_POINT_BUDGET
+        Maximum rows returned
+    random_state : int, default=42
+        Random seed
+
+    Returns:
+    --------
+    pd.DataFrame
+        Sampled rows in their original order
+    """
+    if len(df) <= budget:
+        return df
+    codes, groups = pd.factorize(df[by], use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(groups))
+
+    guaranteed = np.minimum(sizes, budget // (4 * len(groups)))
+    spare = sizes - guaranteed
+    extra = np.floor((budget - guaranteed.sum()) * spare / max(spare.sum(), 1)).astype(np.int64)
+    quota = np.minimum(sizes, guaranteed + extra)
+
+    # Rank rows within their group in random order; keep the first quota
+    rng = np.random.default_rng(random_state)
+    order = np.argsort(codes + rng.random(len(df)), kind='stable')
+    group_start = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(len(df)) - group_start[codes[order]]
+    keep = np.sort(order[rank < quota[codes[order]]])
+    return df.iloc[keep]
+
+
+def density_bins(df, x, y, by=None, budget=DEFAULT_POINT_BUDGET):
+    """
+    2-D histogram of a scatter, as one row per non-empty bin.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Points to bin
+    x, y : str
+        Columns for the x and y axes
+    by : str, optional
+        Group column; each group gets its own grid
+    budget : int, default=DEFAULT_POINT_BUDGET
+        Maximum bins returned; the grid is sqrt(budget / groups) on a side
+
+    Returns:
+    --------
+    pd.DataFrame
+        Bin centre columns ``x`` and ``y``, ``by`` if given, and 'count'
+    """
+    df = df[df[x].notna() & df[y].notna()]
+    codes, groups = (pd.factorize(df[by], use_na_sentinel=False) if by
+                     else (np.zeros(len(df), dtype=np.intp), np.array([None])))
+    side = max(int(np.sqrt(budget / max(len(groups), 1))), 1)
+
+    xs, ys = _numeric(df[x]), _numeric(df[y])
+    x_edges = np.linspace(xs.min(), xs.max(), side + 1) if len(xs) else np.zeros(side + 1)
+    y_edges = np.linspace(ys.min(), ys.max(), side + 1) if len(ys) else np.zeros(side + 1)
+    ix = np.clip(np.searchsorted(x_edges, xs, side='right') - 1, 0, side - 1)
+    iy = np.clip(np.searchsorted(y_edges, ys, side='right') - 1, 0, side - 1)
+
+    counts = np.bincount((codes * side + ix) * side + iy, minlength=len(groups) * side * side)
+    cell = np.flatnonzero(counts)
+    group, rest = np.divmod(cell, side * side)
+    bx, by_ = np.divmod(rest, side)
+    result = pd.DataFrame({
+        x: (x_edges[bx] + x_edges[bx + 1]) / 2,
+        y: (y_edges[by_] + y_edges[by_ + 1]) / 2,
+        'count': counts[cell],
+    })
+    if by:
+        result.insert(2, by, groups[group])
+    return result
+
+
+def scatter_data(df, x, y, by=None, budget=DEFAULT_POINT_BUDGET, method='sample',
+                 random_state=42):
+    """
+    Scatter points reduced to the budget by sampling or density binning.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Points
+    x, y : str
+        Columns for the x and y axes
+    by : str, optional
+        Group column (e.g. 'Cluster') to stratify samples or bins by
+    budget : int, default=DEFAULT_POINT_BUDGET
+        Maximum points (or bins) returned
+    method : str, default='sample'
+        'sample' (stratified random sample) or 'bins' (density grid)
+    random_state : int, default=42
+        Random seed for sampling
+
+    Returns:
+    --------
+    pd.DataFrame
+        Sampled rows, or bins with a 'count' column
+    """
+    if method not in SCATTER_METHODS:
+        raise ValueError(f"Unknown scatter method: {method}")
+    if method == 'bins':
+        return density_bins(df, x, y, by=by, budget=budget)
+    if by is None:
+        return df.sample(n=budget, random_state=random_state).sort_index() \
+            if len(df) > budget else df
+    return stratified_sample(df, by, budget=budget, random_state=random_state)
@@ -8,6 +8,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import streamlit as st
 
+from .chart_data import DEFAULT_POINT_BUDGET, downsample_series
+
 
 def create_country_dashboard(df):
     """
@@ -43,16 +45,28 @@ def create_country_dashboard(df):
     return fig
 
 
-def plot_interactive_sales(df, country=None):
+def plot_interactive_sales(df, country=None, x='Year', y='Total_Sales',
+                           max_points=DEFAULT_POINT_BUDGET):
     """
     Plot interactive sales visualization with country filter.
     
+    Traces are built from one ``groupby`` over the frame, so every
+    country's trace comes from a single pass rather than one filter per
+    country. Long traces are LTTB-downsampled so the figure holds at most
+    ``max_points`` points in total.
+    
     Parameters:
     -----------
     df : pd.DataFrame
-        Sales data
+        Sales data, e.g. from ``src.analysis.country_sales``
     country : str, optional
         Specific country to filter
+    x : str, default='Year'
+        Column for the x axis
+    y : str, default='Total_Sales'
+        Column for the y axis
+    max_points : int, default=DEFAULT_POINT_BUDGET
+        Point budget shared evenly by the traces
         
     Returns:
     --------
@@ -64,21 +78,23 @@ def plot_interactive_sales(df, country=None):
     
     fig = go.Figure()
     
-    for country_name in df['Country'].unique():
-        country_data = df[df['Country'] == country_name]
+    # Groups in order of first appearance, as df['Country'].unique() gives
+    groups = df.groupby('Country', sort=False, observed=True)
+    trace_budget = max(max_points // max(groups.ngroups, 1), 3)
+    for country_name, country_data in groups:
+        country_data = downsample_series(country_data, x, y, budget=trace_budget)
         fig.add_trace(go.Scatter(
-            x=country_data['Year'],
-            y=country_data['Total_Sales'],
+            x=country_data[x],
+            y=country_data[y],
             mode='lines+markers',
             name=country_name
         ))
     
     fig.update_layout(
         title='Sales Trends Over Time',
-        xaxis_title='Year',
+        xaxis_title=x,
         yaxis_title='Total Sales ($)',
         hovermode='x unified'
     )
     
     return fig
-
@@ -0,0 +1,279 @@
+"""
+Module for headless batch rendering of the report figures.
+
+Every figure of the report pack is drawn into its own ``matplotlib.figure.Figure``
+(never through pyplot's global state) and saved through the Agg-based
+canvases, so figures render safely in parallel worker processes. Each worker
+loads the data itself through the cached loaders, so only chart names and
+parameters cross process boundaries.
+
+A figure is skipped when its cache key -- a hash of the source data's
+contents, the chart's parameters and the output formats -- matches the key
+recorded in the bundle's manifest and its files exist. One command writes
+the whole bundle:
+
+    python -m src.visualization.report_renderer "data/raw/Online Retail.csv" --out reports/figures
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from matplotlib.figure import Figure
+
+from ..analysis.association_rules import generate_rules, visualize_rules
+from ..analysis.customer_segmentation import load_customer_segments
+from ..analysis.temporal_analysis import analyze_daily, analyze_hourly, analyze_monthly
+from ..data.data_cache import file_sha256
+from ..data.load_data import load_retail_data
+from ..data.preprocess_data import clean_data, create_features
+from .chart_data import DEFAULT_POINT_BUDGET
+from .static_plots import plot_customer_segments, plot_temporal_patterns
+
+# Bump when a chart's drawing code changes, so cached figures are redrawn
+RENDERER_VERSION = 1
+
+REPORT_FORMATS = ('png', 'pdf', 'svg')
+
+_MANIFEST = 'manifest.json'
+
+# Report-level parameters and their defaults
+DEFAULT_PARAMS = {
+    'min_support': 0.02,
+    'top_n': 10,
+    'n_clusters': 4,
+    'max_points': DEFAULT_POINT_BUDGET,
+}
+
+
+def _transactions(data_path):
+    return create_features(clean_data(load_retail_data(data_path)), compact=True)
+
+
+def _draw_temporal(analyze, pattern_type):
+    def draw(data_path, params, fig):
+        plot_temporal_patterns(analyze(_transactions(data_path)), pattern_type, fig=fig)
+    return draw
+
+
+def _draw_segments(data_path, params, fig):
+    segments = load_customer_segments(data_path, n_clusters=params['n_clusters'])
+    plot_customer_segments(segments, max_points=params['max_points'], fig=fig)
+
+
+def _draw_rules(data_path, params, fig):
+    rules = generate_rules(_transactions(data_path), min_support=params['min_support'],
+                           engine='eclat')
+    visualize_rules(rules, top_n=params['top_n'], fig=fig)
+
+
+# name -> (draw function, figure size, parameters the figure depends on)
+CHARTS = {
+    'temporal_hourly': (_draw_temporal(analyze_hourly, 'hourly'), (12, 6), ()),
+    'temporal_daily': (_draw_temporal(analyze_daily, 'daily'), (12, 6), ()),
+    'temporal_monthly': (_draw_temporal(analyze_monthly, 'monthly'), (12, 6), ()),
+    'customer_segments': (_draw_segments, (15, 5), ('n_clusters', 'max_points')),
+    'association_rules': (_draw_rules, (15, 5), ('min_support', 'top_n')),
+}
+
+
+def chart_key(name, data_hash, params, formats, dpi):
+    """Cache key of one chart: changes whenever its output could change."""
+    _, figsize, depends_on = CHARTS[name]
+    payload = {
+        'version': RENDERER_VERSION,
+        'chart': name,
+        'data': data_hash,
+        'params': {k: params[k] for k in depends_on},
+        'figsize': figsize,
+        'formats': list(formats),
+        'dpi': dpi,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _render_chart(name, data_path, params, out_dir, formats, dpi):
+    """Draw one chart into a fresh Figure and save it; runs in a worker process."""
+    start = time.perf_counter()
+    draw, figsize, _ = CHARTS[name]
+    fig = Figure(figsize=figsize, dpi=dpi)
+    draw(data_path, params, fig)
+
+    files = []
+    for fmt in formats:
+        path = Path(out_dir) / f"{name}.{fmt}"
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        fig.savefig(tmp, format=fmt, dpi=dpi)
+        os.replace(tmp, path)
+        files.append(path.name)
+    return {'files': files, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def _up_to_date(out_dir, entry, key):
+    """Whether a manifest entry's files exist and were drawn for ``key``."""
+    return (entry.get('key') == key
+            and all((out_dir / f).exists() for f in entry.get('files', [])))
+
+
+def _load_manifest(out_dir):
+    try:
+        return json.loads((out_dir / _MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {'charts': {}}
+
+
+def _write_index(out_dir, manifest):
+    """Minimal HTML page showing every chart of the bundle."""
+    sections = []
+    for name, entry in manifest['charts'].items():
+        if entry['status'] == 'failed':
+            body = f"<p>Failed: {html.escape(entry['error'])}</p>"
+        else:
+            body = ''.join(
+                f'<img src="{f}" alt="{name}" style="max-width:100%">'
+                if f.endswith(('.png', '.svg')) else f'<p><a href="{f}">{f}</a></p>'
+                for f in entry['files']
+            )
+        if entry['status'] == 'stale':
+            body = "<p>Stale: drawn with different parameters or formats than this report.</p>" + body
+        sections.append(f"<h2>{html.escape(name)}</h2>{body}")
+    (out_dir / 'index.html').write_text(
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Retail report</title>"
+        f"</head><body><h1>Retail report</h1>{''.join(sections)}</body></html>"
+    )
+
+
+def render_report(data_path, out_dir, charts=None, formats=('png',), dpi=100,
+                  n_jobs=None, force=False, **params):
+    """
+    Render the report figures for a dataset into a bundle directory.
+
+    Parameters:
+    -----------
+    data_path : str
+        UCI Online Retail CSV
+    out_dir : str
+        Bundle directory: one file per chart and format, ``manifest.json``
+        and ``index.html``
+    charts : list of str, optional
+        Charts to render (keys of CHARTS); all if None
+    formats : tuple of str, default=('png',)
+        Output formats: 'png', 'pdf' and/or 'svg'
+    dpi : int, default=100
+        Figure resolution
+    n_jobs : int, optional
+        Worker processes; defaults to the number of CPUs
+    force : bool, default=False
+        Redraw every chart, ignoring the cache
+    **params
+        Overrides of DEFAULT_PARAMS (min_support, top_n, n_clusters,
+        max_points)
+
+    Returns:
+    --------
+    dict
+        The manifest: per chart its status ('rendered', 'cached', 'failed',
+        or 'stale' for an unselected chart drawn with other parameters or
+        formats), cache key, files, seconds and any error
+    """
+    charts = list(CHARTS) if charts is None else list(charts)
+    for name in charts:
+        if name not in CHARTS:
+            raise ValueError(f"Unknown chart: {name}")
+    for fmt in formats:
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+    params = {**DEFAULT_PARAMS, **params}
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(out_dir)['charts']
+    data_hash = file_sha256(data_path)
+
+    entries, to_render = {}, []
+    for name in charts:
+        key = chart_key(name, data_hash, params, formats, dpi)
+        old = previous.get(name, {})
+        if not force and _up_to_date(out_dir, old, key):
+            entries[name] = {**old, 'status': 'cached'}
+        else:
+            to_render.append((name, key))
+
+    if to_render:
+        # Build the typed data cache once rather than in every worker
+        load_retail_data(data_path, columns=['InvoiceNo'])
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = {
+                name: (key, pool.submit(_render_chart, name, str(data_path), params,
+                                        str(out_dir), tuple(formats), dpi))
+                for name, key in to_render
+            }
+            for name, (key, future) in futures.items():
+                try:
+                    entries[name] = {'status': 'rendered', 'key': key, 'error': None,
+                                     **future.result()}
+                except Exception as e:
+                    # No key recorded, so the chart is retried on the next run
+                    entries[name] = {'status': 'failed', 'key': None, 'files': [],
+                                     'seconds': None, 'error': f"{type(e).__name__}: {e}"}
+
+    # Charts not selected this time keep their entries (and key, so they stay
+    # cached for the parameters they were drawn with); they are 'stale' if
+    # those differ from this run's
+    for name, entry in previous.items():
+        if name in CHARTS and name not in entries and entry.get('key'):
+            current = _up_to_date(out_dir, entry, chart_key(name, data_hash, params,
+                                                            formats, dpi))
+            entries[name] = {**entry, 'status': 'cached' if current else 'stale'}
+        elif name in CHARTS and name not in entries:
+            entries[name] = entry
+
+    manifest = {
+        'source': str(Path(data_path).resolve()),
+        'data_sha256': data_hash,
+        'params': params,
+        'charts': {name: entries[name] for name in CHARTS if name in entries},
+    }
+    tmp = out_dir / f"{_MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, out_dir / _MANIFEST)
+    _write_index(out_dir, manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the report figures into a bundle.")
+    parser.add_argument("data_path", help="UCI Online Retail CSV")
+    parser.add_argument("--out", default="reports/figures", help="Bundle directory")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), help="Charts to render")
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=REPORT_FORMATS)
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Ignore the figure cache")
+    parser.add_argument("--min-support", type=float, default=DEFAULT_PARAMS['min_support'])
+    parser.add_argument("--top-n", type=int, default=DEFAULT_PARAMS['top_n'])
+    parser.add_argument("--n-clusters", type=int, default=DEFAULT_PARAMS['n_clusters'])
+    parser.add_argument("--max-points", type=int, default=DEFAULT_PARAMS['max_points'])
+    args = parser.parse_args()
+
+    manifest = render_report(
+        args.data_path, args.out, charts=args.charts, formats=tuple(args.formats),
+        dpi=args.dpi, n_jobs=args.jobs, force=args.force, min_support=args.min_support,
+        top_n=args.top_n, n_clusters=args.n_clusters, max_points=args.max_points,
+    )
+    for name, entry in manifest['charts'].items():
+        detail = entry['error'] if entry['status'] == 'failed' else ', '.join(entry['files'])
+        print(f"{name:<20} {entry['status']:<8} {detail}")
+    print(f"Report bundle: {Path(args.out) / 'index.html'}")
+
+
+if __name__ == "__main__":
+    main()
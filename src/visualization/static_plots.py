@@ -8,8 +8,10 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import seaborn as sns
 
+from .chart_data import DEFAULT_POINT_BUDGET, stratified_sample
 
-def plot_temporal_patterns(df, pattern_type='hourly'):
+
+def plot_temporal_patterns(df, pattern_type='hourly', fig=None):
     """
     Plot temporal purchase patterns.
     
@@ -19,13 +21,18 @@ def plot_temporal_patterns(df, pattern_type='hourly'):
         Aggregated temporal data
     pattern_type : str, default='hourly'
         Type of pattern ('hourly', 'daily', 'monthly')
+    fig : matplotlib.figure.Figure, optional
+        Empty figure to draw into, e.g. a ``Figure()`` outside pyplot for
+        headless rendering; a new pyplot figure if None
         
     Returns:
     --------
     matplotlib.figure.Figure
         Plot figure
     """
-    fig, ax = plt.subplots(figsize=(12, 6))
+    if fig is None:
+        fig = plt.figure(figsize=(12, 6))
+    ax = fig.subplots()
     
     if pattern_type == 'hourly':
         ax.plot(df.index, df['Total_Value'], marker='o')
@@ -46,40 +53,49 @@ def plot_temporal_patterns(df, pattern_type='hourly'):
     ax.set_title(f'{pattern_type.title()} Purchase Patterns')
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 
-def plot_customer_segments(rfm_df):
+def plot_customer_segments(rfm_df, max_points=DEFAULT_POINT_BUDGET, fig=None):
     """
     Plot customer segmentation visualization.
     
+    Scatter panels draw a cluster-stratified sample of at most
+    ``max_points`` customers, so rendering time does not grow with the
+    customer base; cluster sizes are counted over all customers.
+    
     Parameters:
     -----------
     rfm_df : pd.DataFrame
         RFM dataframe with cluster labels
+    max_points : int, default=DEFAULT_POINT_BUDGET
+        Maximum customers drawn in each scatter panel
+    fig : matplotlib.figure.Figure, optional
+        Empty figure to draw into; a new pyplot figure if None
         
     Returns:
     --------
     matplotlib.figure.Figure
         Plot figure
     """
-    fig = plt.figure(figsize=(15, 5))
+    if fig is None:
+        fig = plt.figure(figsize=(15, 5))
+    points = stratified_sample(rfm_df, 'Cluster', budget=max_points)
     
     # 3D scatter plot
     ax1 = fig.add_subplot(131, projection='3d')
-    scatter = ax1.scatter(rfm_df['Recency'], rfm_df['Frequency'], 
-                         rfm_df['Monetary'], c=rfm_df['Cluster'], cmap='viridis')
+    scatter = ax1.scatter(points['Recency'], points['Frequency'], 
+                         points['Monetary'], c=points['Cluster'], cmap='viridis')
     ax1.set_xlabel('Recency')
     ax1.set_ylabel('Frequency')
     ax1.set_zlabel('Monetary')
     ax1.set_title('Customer Segments (3D)')
-    plt.colorbar(scatter, ax=ax1)
+    fig.colorbar(scatter, ax=ax1)
     
     # RF vs M
     ax2 = fig.add_subplot(132)
-    for cluster in rfm_df['Cluster'].unique():
-        cluster_data = rfm_df[rfm_df['Cluster'] == cluster]
+    for cluster, cluster_data in points.groupby('Cluster', sort=False):
         ax2.scatter(cluster_data['Recency'], cluster_data['Frequency'], 
                    label=f'Cluster {cluster}', alpha=0.6)
     ax2.set_xlabel('Recency')
@@ -97,6 +113,6 @@ def plot_customer_segments(rfm_df):
     ax3.set_title('Cluster Sizes')
     ax3.grid(True, alpha=0.3, axis='y')
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
@@ -1,7 +1,10 @@
 import pathlib
+import time
 
 import requests
 
+BACKEND_URL = "http://localhost:8000"
+
 
 def test_single_file(csv_path: pathlib.Path, periodicity: str = "monthly") -> None:
     """Send one CSV file to the /api/predict endpoint and print the response."""
@@ -15,7 +18,7 @@ def test_single_file(csv_path: pathlib.Path, periodicity: str = "monthly") -> No
 
     print(f"\n=== Testing {csv_path} (periodicity={periodicity}) ===")
     resp = requests.post(
-        "http://localhost:8000/api/predict", files=files, data=data, timeout=15
+        f"{BACKEND_URL}/api/predict", files=files, data=data, timeout=15
     )
     print("Status code:", resp.status_code)
     try:
@@ -25,6 +28,37 @@ def test_single_file(csv_path: pathlib.Path, periodicity: str = "monthly") -> No
         print("Raw text:", resp.text)
 
 
+def test_single_file_job(
+    csv_path: pathlib.Path, periodicity: str = "monthly", max_wait: float = 300
+) -> None:
+    """Submit one CSV file to /api/jobs, poll until it finishes and print the result."""
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found at {csv_path}")
+
+    files = {
+        "file": (csv_path.name, csv_path.read_bytes(), "text/csv"),
+    }
+    data = {"periodicity": periodicity}
+
+    print(f"\n=== Testing job for {csv_path} (periodicity={periodicity}) ===")
+    resp = requests.post(f"{BACKEND_URL}/api/jobs", files=files, data=data, timeout=15)
+    print("Submit status code:", resp.status_code)
+    job = resp.json()
+    if resp.status_code != 202:
+        print("Response JSON:", job)
+        return
+
+    deadline = time.time() + max_wait
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.5)
+        job = requests.get(f"{BACKEND_URL}{job['statusUrl']}", timeout=5).json()
+        print(f"  status={job['status']} progress={job['progress']:.0%}")
+
+    result = requests.get(f"{BACKEND_URL}{job['resultUrl']}", timeout=5)
+    print("Result status code:", result.status_code)
+    print("Response JSON:", result.json())
+
+
 def main() -> None:
     """Run simple smoke tests for all generated test CSVs."""
     root = pathlib.Path(__file__).parent
@@ -43,10 +77,14 @@ def main() -> None:
             "Run tests/generate_test_reports.py first."
         )
 
-    print("Sending test requests to http://localhost:8000/api/predict ...")
+    print(f"Sending test requests to {BACKEND_URL}/api/predict ...")
     for csv_path in csv_files:
         test_single_file(csv_path, periodicity="monthly")
 
+    print(f"\nSending test jobs to {BACKEND_URL}/api/jobs ...")
+    for csv_path in csv_files:
+        test_single_file_job(csv_path, periodicity="yearly")
+
 
 if __name__ == "__main__":
     main()
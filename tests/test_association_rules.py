@@ -0,0 +1,80 @@
+"""
+Tests that every frequent itemset engine, serial or SON-partitioned,
+produces the same itemsets and rules as apriori.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.association_rules import encode_baskets, generate_rules
+from src.analysis.frequent_itemsets import mine_frequent_itemsets, son_mine
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    rng = np.random.default_rng(0)
+    products = [f'PRODUCT {i:02d}' for i in range(40)]
+    # Skewed popularity, plus bundles bought together, so itemsets up to
+    # length 3 are frequent
+    weights = 1 / np.arange(1, len(products) + 1)
+    bundles = [products[:3], products[5:7], products[10:13]]
+    rows = []
+    for invoice in range(1500):
+        basket = set(rng.choice(products, rng.integers(1, 6), p=weights / weights.sum()))
+        if rng.random() < 0.3:
+            basket.update(bundles[rng.integers(len(bundles))])
+        rows.extend({'InvoiceNo': f'{536000 + invoice}', 'Description': str(item),
+                     'Quantity': int(rng.integers(1, 5))} for item in basket)
+    df = pd.DataFrame(rows)
+    # A returned item is not in the basket
+    df.loc[rng.choice(len(df), 50, replace=False), 'Quantity'] = -1
+    return df
+
+
+@pytest.fixture(scope='module')
+def baskets(transactions):
+    return encode_baskets(transactions)
+
+
+@pytest.fixture(scope='module')
+def apriori_itemsets(baskets):
+    return mine_frequent_itemsets(baskets, min_support=0.02, engine='apriori')
+
+
+def _assert_same_itemsets(itemsets, expected):
+    assert list(itemsets['itemsets']) == list(expected['itemsets'])
+    np.testing.assert_allclose(itemsets['support'], expected['support'])
+
+
+@pytest.mark.parametrize('engine', ['eclat', 'fpgrowth'])
+def test_engines_match_apriori(baskets, apriori_itemsets, engine):
+    assert apriori_itemsets['itemsets'].map(len).max() >= 3
+    _assert_same_itemsets(mine_frequent_itemsets(baskets, min_support=0.02, engine=engine),
+                          apriori_itemsets)
+
+
+@pytest.mark.parametrize('n_jobs', [2, 3])
+def test_son_matches_apriori(baskets, apriori_itemsets, n_jobs):
+    _assert_same_itemsets(son_mine(baskets, min_support=0.02, engine='eclat', n_jobs=n_jobs),
+                          apriori_itemsets)
+
+
+def test_eclat_respects_max_len(baskets, apriori_itemsets):
+    itemsets = mine_frequent_itemsets(baskets, min_support=0.02, engine='eclat', max_len=2)
+    _assert_same_itemsets(itemsets, apriori_itemsets[apriori_itemsets['itemsets'].map(len) <= 2]
+                          .reset_index(drop=True))
+
+
+def test_rules_identical_across_engines(transactions):
+    expected = generate_rules(transactions, min_support=0.02, engine='apriori')
+    assert len(expected) > 0
+    for kwargs in ({'engine': 'eclat'}, {'engine': 'fpgrowth'}, {'engine': 'eclat', 'n_jobs': 2}):
+        rules = generate_rules(transactions, min_support=0.02, **kwargs)
+        pd.testing.assert_frame_equal(rules.reset_index(drop=True),
+                                      expected.reset_index(drop=True))
+
+
+def test_unknown_engine(baskets):
+    with pytest.raises(ValueError):
+        mine_frequent_itemsets(baskets, engine='bogus')
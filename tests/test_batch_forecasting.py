@@ -0,0 +1,54 @@
+"""
+Tests for checkpointed batch forecasting (src/analysis/batch_forecasting.py).
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.batch_forecasting import forecast_series_batch
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2023-01-01', periods=60, freq='D')
+    return pd.DataFrame([
+        {'Country': country, 'Date': date, 'TotalValue': 100 + 10 * i + rng.normal(0, 5)}
+        for i, country in enumerate(['France', 'Germany', 'Spain', 'United Kingdom'])
+        for date in dates
+    ])
+
+
+def _run(series, checkpoint, model_type='holt_winters'):
+    return forecast_series_batch(series, 'Country', model_type=model_type, horizon=3,
+                                 n_jobs=2, checkpoint_path=str(checkpoint), progress=False)
+
+
+def test_resume_skips_completed_series(series, tmp_path):
+    checkpoint = tmp_path / 'batch.jsonl'
+    forecasts, metrics = _run(series, checkpoint)
+    assert (metrics['status'] == 'ok').all()
+
+    # Keep two finished series, one marked so a recomputation would show
+    lines = checkpoint.read_text().splitlines()[:2]
+    kept = json.loads(lines[0])
+    kept['metrics']['RMSE'] = -1.0
+    checkpoint.write_text('\n'.join([json.dumps(kept), lines[1]]) + '\n')
+
+    resumed_forecasts, resumed = _run(series, checkpoint)
+    resumed = resumed.set_index('Country')
+    assert resumed.loc[kept['key'][0], 'RMSE'] == -1.0
+    others = metrics.set_index('Country').drop(index=kept['key'][0])
+    pd.testing.assert_series_equal(resumed.loc[others.index, 'RMSE'], others['RMSE'])
+    assert len(resumed_forecasts) == len(forecasts)
+    assert len(checkpoint.read_text().splitlines()) == len(metrics)
+
+
+def test_resume_with_other_config_raises(series, tmp_path):
+    checkpoint = tmp_path / 'batch.jsonl'
+    _run(series, checkpoint, model_type='holt_winters')
+    with pytest.raises(ValueError, match='checkpoint_path'):
+        _run(series, checkpoint, model_type='ses')
@@ -0,0 +1,84 @@
+"""
+Tests for streaming CSV ingestion (backend/ingest.py) against pandas.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ingest import MEDIAN_EXACT_LIMIT, MEDIAN_RELATIVE_ACCURACY, _MedianSketch, aggregate_csv
+
+
+@pytest.fixture
+def report():
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 500, n), unit='D'),
+        'revenue': rng.normal(100, 60, n).round(2),
+        'quantity': rng.integers(1, 10, n),
+        'customer_id': rng.integers(10_000, 10_150, n).astype('float64'),
+        'product_id': rng.choice([f'P{i}' for i in range(80)], n),
+    })
+    # Missing ids make some chunks parse customer ids as floats, others as ints
+    df.loc[rng.choice(n, 25, replace=False), 'customer_id'] = np.nan
+    df.loc[rng.choice(n, 10, replace=False), 'product_id'] = None
+    csv = df.to_csv(index=False, float_format='%.15g').encode()
+    return pd.read_csv(io.BytesIO(csv), parse_dates=['date']), csv
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 333, 100_000])
+def test_matches_pandas_groupby(report, chunksize):
+    df, csv = report
+    result = aggregate_csv(io.BytesIO(csv), chunksize=chunksize)
+
+    assert result.n_rows == len(df)
+    assert result.total_revenue == pytest.approx(df['revenue'].sum())
+    assert result.total_quantity == df['quantity'].sum()
+    assert result.median_exact
+    assert result.median_revenue == df['revenue'].median()
+    assert result.max_date == df['date'].max()
+
+    customers = df.assign(customer_id=df['customer_id'].dropna().astype('int64').astype(str))
+    by_customer = customers.groupby('customer_id')
+    np.testing.assert_array_equal(result.customer_ids, by_customer.size().index)
+    np.testing.assert_allclose(result.customer_revenue, by_customer['revenue'].sum())
+    np.testing.assert_array_equal(result.customer_visits, by_customer.size())
+    np.testing.assert_array_equal(result.customer_last_purchase, by_customer['date'].max())
+
+    by_product = df.groupby('product_id')
+    np.testing.assert_array_equal(result.product_ids, by_product.size().index)
+    np.testing.assert_allclose(result.product_revenue, by_product['revenue'].sum())
+    np.testing.assert_array_equal(result.product_quantity, by_product['quantity'].sum())
+
+    monthly = df.groupby(df['date'].dt.to_period('M'))['revenue'].sum()
+    monthly = monthly.reindex(pd.period_range(monthly.index.min(), monthly.index.max()),
+                              fill_value=0)
+    np.testing.assert_array_equal(result.month_starts.astype(str), monthly.index.astype(str))
+    np.testing.assert_allclose(result.monthly_revenue, monthly)
+
+
+def test_median_sketch_switches_past_exact_limit():
+    values = np.random.default_rng(1).lognormal(4, 1.5, 5000)
+    sketch = _MedianSketch(exact_limit=1000)
+    for chunk in np.array_split(values, 13):
+        sketch.update(chunk)
+    assert not sketch.exact
+    assert sketch.median() == pytest.approx(np.median(values), rel=MEDIAN_RELATIVE_ACCURACY)
+
+
+@pytest.mark.parametrize('distinct', [MEDIAN_EXACT_LIMIT, MEDIAN_EXACT_LIMIT + 1000])
+def test_median_past_default_exact_limit(distinct):
+    rng = np.random.default_rng(2)
+    revenue = rng.permutation(np.arange(1, distinct + 1) / 100)
+    csv = pd.DataFrame({
+        'date': '2023-01-01', 'revenue': revenue, 'quantity': 1,
+        'customer_id': 1, 'product_id': 1,
+    }).to_csv(index=False).encode()
+
+    result = aggregate_csv(io.BytesIO(csv), chunksize=10_000)
+    assert result.median_exact == (distinct <= MEDIAN_EXACT_LIMIT)
+    assert result.median_revenue == pytest.approx(np.median(revenue),
+                                                  rel=MEDIAN_RELATIVE_ACCURACY)
@@ -0,0 +1,66 @@
+"""
+Tests for the incrementally maintained RFM state (src/analysis/rfm_store.py).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.customer_segmentation import calculate_rfm
+from src.analysis.rfm_store import RFMStore
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        'InvoiceNo': rng.integers(500_000, 502_000, n).astype(str),
+        'InvoiceDate': pd.Timestamp('2011-01-01')
+                       + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n), unit='min'),
+        'CustomerID': rng.integers(12_000, 12_400, n).astype('float64'),
+        'TotalValue': rng.normal(20, 15, n).round(2),
+    })
+    df.loc[rng.choice(n, 50, replace=False), 'CustomerID'] = np.nan
+    return df.sort_values('InvoiceDate', ignore_index=True)
+
+
+def _batches(df, n):
+    return [df.iloc[rows] for rows in np.array_split(np.arange(len(df)), n)]
+
+
+def test_incremental_updates_match_calculate_rfm(transactions, tmp_path):
+    store = RFMStore()
+    for batch in _batches(transactions, 3):
+        store.update(batch)
+        # Persisting between batches must not change the result
+        store.save(tmp_path / 'rfm.parquet')
+        store = RFMStore.load(tmp_path / 'rfm.parquet')
+
+    pd.testing.assert_frame_equal(store.to_rfm(), calculate_rfm(transactions))
+    reference = pd.Timestamp('2012-01-15')
+    pd.testing.assert_frame_equal(store.to_rfm(reference),
+                                  calculate_rfm(transactions, reference))
+
+
+def test_out_of_order_batches(transactions):
+    shuffled = transactions.sample(frac=1, random_state=0)
+    store = RFMStore()
+    for batch in _batches(shuffled, 7):
+        store.update(batch)
+    pd.testing.assert_frame_equal(store.to_rfm(), calculate_rfm(transactions))
+
+
+def test_frequency_sketch_past_exact_limit():
+    n = 3000
+    df = pd.DataFrame({
+        'InvoiceNo': np.arange(n).astype(str),
+        'InvoiceDate': pd.Timestamp('2011-01-01'),
+        'CustomerID': 1.0,
+        'TotalValue': 1.0,
+    })
+    store = RFMStore(exact_limit=100)
+    for batch in _batches(df, 5):
+        store.update(batch)
+    frequency = store.to_rfm()['Frequency'].iloc[0]
+    assert frequency == pytest.approx(n, rel=0.05)
@@ -0,0 +1,93 @@
+"""
+Tests for the compiled association rule index (backend/rule_index.py).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.rule_index import _ARRAYS, RuleIndex
+
+
+@pytest.fixture
+def rules():
+    rng = np.random.default_rng(0)
+    items = [f'ITEM {i}' for i in range(30)]
+    rows = []
+    for _ in range(200):
+        chosen = [str(item) for item in rng.choice(items, rng.integers(2, 5), replace=False)]
+        split = rng.integers(1, len(chosen))
+        rows.append({
+            'antecedents': frozenset(chosen[:split]),
+            'consequents': frozenset(chosen[split:]),
+            'support': rng.uniform(0.01, 0.1),
+            'confidence': rng.uniform(0.3, 1),
+            # Rounded so some rules tie on lift
+            'lift': round(rng.uniform(1, 20), 0),
+        })
+    return pd.DataFrame(rows)
+
+
+def _brute_force(rules, basket, k):
+    """Recommendations by scanning every rule in stable lift order."""
+    ranked = rules.iloc[np.argsort(-rules['lift'].to_numpy(), kind='mergesort')]
+    recommendations, seen = [], set(basket)
+    for rule in ranked.itertuples():
+        if not rule.antecedents <= set(basket):
+            continue
+        for item in sorted(rule.consequents - seen):
+            seen.add(item)
+            recommendations.append((item, rule.lift, sorted(rule.antecedents)))
+    return recommendations[:k]
+
+
+def test_save_load_round_trip(rules, tmp_path):
+    index = RuleIndex.from_rules(rules)
+    index.save(tmp_path / 'rules.idx')
+    loaded = RuleIndex.load(tmp_path / 'rules.idx')
+
+    assert len(loaded) == len(rules)
+    assert loaded.items == index.items
+    for name in _ARRAYS:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(index, name))
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / 'rules.idx').write_bytes(b'not an index')
+    with pytest.raises(ValueError):
+        RuleIndex.load(tmp_path / 'rules.idx')
+
+
+@pytest.mark.parametrize('k', [1, 5, 50])
+def test_recommend_matches_brute_force(rules, tmp_path, k):
+    RuleIndex.from_rules(rules).save(tmp_path / 'rules.idx')
+    index = RuleIndex.load(tmp_path / 'rules.idx')
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        basket = list(rng.choice(index.items, rng.integers(1, 8), replace=False))
+        got = [(r['item'], r['lift'], sorted(r['antecedents']))
+               for r in index.recommend(basket + ['NOT AN ITEM'], k=k)]
+        expected = _brute_force(rules, basket, k)
+        # Items recommended by the same rule may come in either order
+        assert sorted(got) == sorted(expected)
+        assert [lift for _, lift, _ in got] == [lift for _, lift, _ in expected]
+
+
+def test_is_current_tracks_csv(rules, tmp_path):
+    csv = tmp_path / 'rules.csv'
+    rules.to_csv(csv, index=False)
+    index = RuleIndex.from_csv(csv)
+    index.save(tmp_path / 'rules.idx')
+    loaded = RuleIndex.load(tmp_path / 'rules.idx')
+    assert loaded.is_current(csv)
+    assert loaded.recommend(['ITEM 1', 'ITEM 2']) == index.recommend(['ITEM 1', 'ITEM 2'])
+
+    # Touched but unchanged: still current
+    stat = os.stat(csv)
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert loaded.is_current(csv)
+
+    rules.iloc[1:].to_csv(csv, index=False)
+    assert not loaded.is_current(csv)